@@ -0,0 +1,101 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+path_type = sa.Enum("EXCEPTIONAL_TALENT", "EXCEPTIONAL_PROMISE", name="pathtype")
+standard_type = sa.Enum("MC", "OC1", "OC2", "OC3", name="standardtype")
+evidence_status = sa.Enum("DRAFT", "GENERATED", "EXPORTED", name="evidencestatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "applications",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("path_type", path_type, nullable=False),
+        sa.Column("mc_selected", sa.Boolean()),
+        sa.Column("oc1_selected", sa.Boolean()),
+        sa.Column("oc2_selected", sa.Boolean()),
+        sa.Column("oc3_selected", sa.Boolean()),
+        sa.Column("recommendation_data", sa.JSON()),
+        sa.Column("current_stage", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "materials",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("application_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("applications.id"), nullable=False),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("file_type", sa.String(), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=False),
+        sa.Column("upload_date", sa.Date(), nullable=False),
+        sa.Column("title", sa.String()),
+        sa.Column("material_type", sa.String()),
+        sa.Column("suggested_standard", standard_type),
+        sa.Column("strength_rating", sa.Integer()),
+        sa.Column("classification_data", sa.JSON()),
+        sa.Column("evidence_description", sa.Text()),
+        sa.Column("additional_links", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "evidence",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("application_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("applications.id"), nullable=False),
+        sa.Column("evidence_number", sa.Integer(), nullable=False),
+        sa.Column("standard_type", standard_type, nullable=False),
+        sa.Column("evidence_type", sa.String()),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("page_count", sa.Integer()),
+        sa.Column("pdf_path", sa.String()),
+        sa.Column("status", evidence_status),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "evidence_materials",
+        sa.Column("evidence_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("evidence.id"), primary_key=True),
+        sa.Column("material_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("materials.id"), primary_key=True),
+        sa.Column("page_range", sa.String()),
+        sa.Column("order", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("evidence_materials")
+    op.drop_table("evidence")
+    op.drop_table("materials")
+    op.drop_table("applications")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
+    evidence_status.drop(op.get_bind(), checkfirst=True)
+    standard_type.drop(op.get_bind(), checkfirst=True)
+    path_type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""Composite indexes for the application aggregate read
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_evidence_application_standard_number",
+        "evidence",
+        ["application_id", "standard_type", "evidence_number"],
+    )
+    op.create_index(
+        "ix_materials_application_suggested_standard",
+        "materials",
+        ["application_id", "suggested_standard"],
+    )
+    # The (evidence_id, material_id) primary key covers lookups by evidence;
+    # this covers the reverse direction (which evidence uses a material).
+    op.create_index("ix_evidence_materials_material_id", "evidence_materials", ["material_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_evidence_materials_material_id", table_name="evidence_materials")
+    op.drop_index("ix_materials_application_suggested_standard", table_name="materials")
+    op.drop_index("ix_evidence_application_standard_number", table_name="evidence")
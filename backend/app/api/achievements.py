@@ -2,89 +2,69 @@
 API endpoints for achievement templates and achievement-based material management.
 """
 
-from fastapi import APIRouter
-from app.services.achievement_templates import AchievementTemplates
+from fastapi import APIRouter, Request
+from typing import Dict, List, Optional
+from app.api.documents import MATERIALS
+from app.schemas.schemas import AchievementSubmission
+from app.services.achievement_templates import AchievementTemplates, TemplateCatalog
+from app.services.achievement_validation import AchievementValidator, MaterialLookup
+from app.services.listing import bytes_response
 
 router = APIRouter()
 templates_service = AchievementTemplates()
+template_catalog = TemplateCatalog(templates_service.get_all_templates())
+validator = AchievementValidator(templates_service.get_all_templates())
+
+# Templates only change with a deploy, which changes the ETag
+TEMPLATE_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
 
 
 @router.get("/templates")
-async def get_all_templates():
+async def get_all_templates(request: Request):
     """Get all available achievement templates."""
-    all_templates = templates_service.get_all_templates()
-    return {
-        "templates": {
-            key: {
-                "achievement_type": template.achievement_type,
-                "name": template.name,
-                "description": template.description,
-                "required_fields": [
-                    {
-                        "field_id": field.field_id,
-                        "label": field.label,
-                        "field_type": field.field_type.value,
-                        "required": field.required,
-                        "help_text": field.help_text,
-                        "validation": field.validation,
-                        "multiple": field.multiple,
-                    }
-                    for field in template.required_fields
-                ],
-                "optional_fields": [
-                    {
-                        "field_id": field.field_id,
-                        "label": field.label,
-                        "field_type": field.field_type.value,
-                        "required": field.required,
-                        "help_text": field.help_text,
-                        "validation": field.validation,
-                        "multiple": field.multiple,
-                    }
-                    for field in template.optional_fields
-                ],
-                "suggested_standard": template.suggested_standard,
-            }
-            for key, template in all_templates.items()
-        }
-    }
+    return bytes_response(
+        request,
+        template_catalog.catalog_body,
+        template_catalog.catalog_etag,
+        {"Cache-Control": TEMPLATE_CACHE_CONTROL},
+    )
 
 
 @router.get("/templates/{achievement_type}")
-async def get_template(achievement_type: str):
+async def get_template(request: Request, achievement_type: str):
     """Get template for a specific achievement type."""
-    template = templates_service.get_template(achievement_type)
-    if not template:
+    compiled = template_catalog.get(achievement_type)
+    if not compiled:
         return {"error": "Template not found"}
-    
-    return {
-        "achievement_type": template.achievement_type,
-        "name": template.name,
-        "description": template.description,
-        "required_fields": [
-            {
-                "field_id": field.field_id,
-                "label": field.label,
-                "field_type": field.field_type.value,
-                "required": field.required,
-                "help_text": field.help_text,
-                "validation": field.validation,
-                "multiple": field.multiple,
-            }
-            for field in template.required_fields
-        ],
-        "optional_fields": [
-            {
-                "field_id": field.field_id,
-                "label": field.label,
-                "field_type": field.field_type.value,
-                "required": field.required,
-                "help_text": field.help_text,
-                "validation": field.validation,
-                "multiple": field.multiple,
-            }
-            for field in template.optional_fields
-        ],
-        "suggested_standard": template.suggested_standard,
-    }
 
+    body, etag = compiled
+    return bytes_response(request, body, etag, {"Cache-Control": TEMPLATE_CACHE_CONTROL})
+
+
+def _material_lookup(application_id: Optional[str]) -> MaterialLookup:
+    """File fields must reference uploaded materials (of the same application, when given)."""
+    def lookup(material_id: str) -> Optional[Dict]:
+        material = MATERIALS.get(material_id)
+        if material and application_id and material.get("applicationId") != application_id:
+            return None
+        return material
+    return lookup
+
+
+@router.post("/validate")
+async def validate_achievement(submission: AchievementSubmission):
+    """Validate an achievement submission against its template, reporting errors per field."""
+    return validator.validate(
+        submission.achievementType,
+        submission.fields,
+        _material_lookup(submission.applicationId),
+    )
+
+
+@router.post("/validate-batch/{application_id}")
+async def validate_application_achievements(application_id: str, submissions: List[AchievementSubmission]):
+    """Validate all achievements of an application in one request."""
+    return validator.validate_many(
+        [(submission.achievementType, submission.fields) for submission in submissions],
+        _material_lookup(application_id),
+    )
@@ -0,0 +1,76 @@
+"""
+API endpoints for application-level views (dashboard summary, full aggregate).
+"""
+
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, Request
+from app.services.application_summary import summary_service
+from app.services.listing import json_response
+from app.services.telemetry import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+
+def get_db():
+    # SQLAlchemy and the models are loaded on the first database request, not at startup
+    from app.models.database import get_db as get_database_session
+
+    yield from get_database_session()
+
+
+@router.get("/{application_id}/summary")
+async def get_application_summary(request: Request, application_id: str):
+    """
+    Get dashboard totals for an application: evidence per standard, total pages,
+    materials per suggested standard, average strength rating and current stage.
+    """
+    return json_response(request, summary_service.get_summary(application_id))
+
+
+def _database_id(application_id: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(application_id)
+    except ValueError:
+        return None
+
+
+@router.get("/{application_id}/aggregate")
+def get_application_aggregate(request: Request, application_id: str, db=Depends(get_db)):
+    """
+    Get an application with all materials and evidence (with ordered materials)
+    for the Stage 3 and Stage 4 views. Applications in the database are loaded
+    in a fixed number of queries, reported in the X-DB-Query-Count header; any
+    other application id is served from the in-memory material and evidence stores.
+    """
+    from app.services.application_aggregate import build_memory_aggregate
+
+    database_id = _database_id(application_id)
+    if database_id is not None:
+        from sqlalchemy.exc import SQLAlchemyError
+        from app.models.database import count_queries
+        from app.services.application_aggregate import load_application_aggregate, serialize_aggregate
+
+        try:
+            with count_queries(db.connection()) as queries:
+                application = load_application_aggregate(db, database_id)
+                payload = serialize_aggregate(application) if application is not None else None
+        except SQLAlchemyError as e:
+            # No database configured (the in-memory MVP setup); fall through to the stores
+            logger.warning("aggregate_database_unavailable", error=str(e))
+            payload = None
+        if payload is not None:
+            return json_response(request, payload, {"X-DB-Query-Count": str(queries[0])})
+
+    from app.api.documents import MATERIALS
+    from app.api.evidence import save_evidence
+
+    payload = build_memory_aggregate(
+        application_id,
+        MATERIALS.values(),
+        getattr(save_evidence, "evidence_store", {}).values(),
+        summary_service.get_summary(application_id)["currentStage"],
+    )
+    return json_response(request, payload)
@@ -0,0 +1,113 @@
+"""
+API endpoints for assembling evidence PDFs from selected pages of uploaded materials.
+"""
+
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.responses import Response
+from typing import Dict, List, Optional, Tuple
+from app.api.documents import MATERIALS
+from app.api.evidence import save_evidence
+from app.schemas.schemas import EvidenceAssemblyRequest, EvidenceMaterialSelection, EvidenceQuota, PdfOutputOptions
+from app.services.telemetry import PDF_BYTES, span
+from app.services.text_extraction import is_pdf
+from app.services.workers import run_in_process
+
+router = APIRouter()
+
+
+def _resolve_parts(selections: List[EvidenceMaterialSelection]) -> List[Tuple[str, Optional[str], int]]:
+    """Map material selections to (content hash, page range, order) parts."""
+    parts = []
+    for selection in selections:
+        material = MATERIALS.get(selection.materialId)
+        if not material or not material.get("contentHash"):
+            raise HTTPException(status_code=404, detail=f"Material not found: {selection.materialId}")
+        if not is_pdf(material.get("fileType"), material.get("fileName")):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Material {material.get('fileName')} is not a PDF and cannot be assembled",
+            )
+        parts.append((material["contentHash"], selection.pageRange, selection.order))
+    return parts
+
+
+async def _assemble_response(
+    selections: List[EvidenceMaterialSelection],
+    filename: str,
+    output: Optional[PdfOutputOptions] = None,
+) -> Response:
+    if not selections:
+        raise HTTPException(status_code=400, detail="No materials selected")
+    from app.services.pdf_assembly import assemble_pdf
+
+    parts = _resolve_parts(selections)
+    try:
+        with span("assembly.pdf_encode", parts=len(parts)):
+            pdf_bytes, page_count = await run_in_process(
+                assemble_pdf, parts, None, output.model_dump() if output else None
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error assembling PDF: {str(e)}")
+
+    PDF_BYTES.inc(len(pdf_bytes), kind="assembly")
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'inline; filename="{filename}"',
+            "X-Page-Count": str(page_count),
+        },
+    )
+
+
+@router.post("/assemble")
+async def assemble_evidence(request: EvidenceAssemblyRequest):
+    """
+    Assemble a PDF from selected pages of uploaded materials, in the given order.
+    Pages are copied from the source PDFs as-is, without re-rendering, unless
+    `output` asks for a size-optimized file.
+    """
+    return await _assemble_response(request.materials, "evidence.pdf", request.output)
+
+
+@router.post("/generate-pdf/{evidence_id}")
+async def generate_evidence_pdf(evidence_id: str, output: Optional[PdfOutputOptions] = Body(None)):
+    """
+    Assemble the PDF for a saved evidence from its materials and page selections.
+    An optional body of PdfOutputOptions requests a size-optimized file.
+    """
+    evidence_store = getattr(save_evidence, "evidence_store", {})
+    evidence = evidence_store.get(evidence_id)
+    if not evidence:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+
+    selections = [EvidenceMaterialSelection(**item) for item in evidence.get("materials", [])]
+    return await _assemble_response(selections, f"evidence-{evidence_id}.pdf", output)
+
+
+@router.post("/auto-assemble/{application_id}")
+async def auto_assemble_evidence(application_id: str, quota: Optional[EvidenceQuota] = Body(None)) -> Dict:
+    """
+    Propose evidence files for an application: assigns classified PDF materials to
+    evidence slots under the quota, the 3-page limit and no reuse (see evidence_solver).
+    Without a quota, MC gets 4 and the two best-supplied optional criteria get 3 each.
+    A quota must have MC 4 and a total of at most 10 that matches its parts.
+    """
+    from app.services.evidence_solver import solve_evidence_assembly
+
+    quota_dict = None
+    if quota:
+        quota_dict = quota.model_dump(exclude={"total"})
+        if min(quota_dict.values()) < 0:
+            raise HTTPException(status_code=400, detail="Evidence quotas cannot be negative")
+        if quota.mc != 4:
+            raise HTTPException(status_code=400, detail="The evidence quota must include 4 MC evidence files")
+        if quota.total != sum(quota_dict.values()):
+            raise HTTPException(status_code=400, detail="The evidence quota total does not match its parts")
+        if quota.total > 10:
+            raise HTTPException(status_code=400, detail="The evidence quota total cannot exceed 10")
+
+    materials = [m for m in MATERIALS.values() if m.get("applicationId") == application_id]
+    return solve_evidence_assembly(materials, quota_dict)
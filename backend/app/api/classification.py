@@ -1,43 +1,59 @@
 """
-Mock classification API to simulate AI classifier suggestions.
+Classification API: suggests a standard, evidence type and strength for uploaded materials
+using the local document classifier. Results are stored on the material.
 """
 
 from fastapi import APIRouter, HTTPException
-from typing import Dict
+from pydantic import BaseModel
+from typing import Dict, List
+from app.api.documents import MATERIALS
 
 router = APIRouter()
 
 
+async def classify_material_batch(materials: List[Dict], force: bool = False) -> Dict:
+    # The classifier (numpy) is loaded on first use rather than at startup
+    from app.services.material_classification import classify_materials
+
+    return await classify_materials(materials, force=force)
+
+
+class BatchClassificationRequest(BaseModel):
+    materialIds: List[str]
+
+
 @router.post("/classify/{material_id}")
 async def classify_material(material_id: str) -> Dict:
-    # Mock logic based on filename keywords
-    # In real implementation, call Onerouter API here
-    suggested = {
-        "recommendedStandard": "MC",
-        "fileType": "General Document",
-        "strengthRating": 3,
-        "aiAnalysis": "General supporting document. Consider pairing with performance review.",
-    }
-    if "salary" in material_id.lower() or "bonus" in material_id.lower():
-        suggested.update({
-            "recommendedStandard": "MC",
-            "fileType": "Salary Proof",
-            "strengthRating": 5,
-            "aiAnalysis": "High salary suggests recognition as leading talent. Merge with performance review.",
-        })
-    elif "metrics" in material_id.lower() or "users" in material_id.lower():
-        suggested.update({
-            "recommendedStandard": "OC1",
-            "fileType": "Product Metrics",
-            "strengthRating": 5,
-            "aiAnalysis": "Strong product metrics indicate significant contribution.",
-        })
-    elif "revenue" in material_id.lower() or "contract" in material_id.lower():
-        suggested.update({
-            "recommendedStandard": "OC3",
-            "fileType": "Financial Data / Contract",
-            "strengthRating": 4,
-            "aiAnalysis": "Financial success supports commercial success criterion.",
-        })
-
-    return suggested
+    material = MATERIALS.get(material_id)
+    if not material:
+        raise HTTPException(status_code=404, detail="Material not found")
+    try:
+        await classify_material_batch([material])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error classifying material: {str(e)}")
+    return material["classificationData"]
+
+
+@router.post("/classify-batch")
+async def classify_materials(request: BatchClassificationRequest) -> Dict:
+    """Classify several materials in one call. Results are keyed by material id."""
+    missing = [material_id for material_id in request.materialIds if material_id not in MATERIALS]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Materials not found: {', '.join(missing)}")
+    try:
+        return await classify_material_batch([MATERIALS[material_id] for material_id in request.materialIds])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error classifying materials: {str(e)}")
+
+
+@router.post("/classify-all/{application_id}")
+async def classify_all_materials(application_id: str, force: bool = False) -> Dict:
+    """
+    Classify every material of an application that has no classification from the
+    current classifier version, and return all suggestions in one response.
+    """
+    materials = [m for m in MATERIALS.values() if m.get("applicationId") == application_id]
+    try:
+        return await classify_material_batch(materials, force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error classifying materials: {str(e)}")
@@ -3,13 +3,28 @@ API endpoints for criteria matching and recommendations.
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from typing import List
+import orjson
 from app.schemas.schemas import QuestionnaireAnswers, RecommendationData
 from app.services.criteria_matcher import CriteriaMatcher
+from app.services.criteria_cache import match_cache
 
 router = APIRouter()
 criteria_matcher = CriteriaMatcher()
 
 
+def _serialize_recommendation(canonical: dict) -> bytes:
+    """
+    The response fields after questionnaireAnswers, serialized as the tail of a
+    JSON object. Only this part is cached: it depends on the canonical answers,
+    while each response echoes the answers exactly as they were sent.
+    """
+    recommendation = criteria_matcher.match_criteria(canonical).model_dump(mode="json")
+    del recommendation["questionnaireAnswers"]
+    return orjson.dumps(recommendation)[1:]
+
+
 @router.post("/match", response_model=RecommendationData)
 async def match_criteria(answers: QuestionnaireAnswers):
     """
@@ -22,9 +37,39 @@ async def match_criteria(answers: QuestionnaireAnswers):
         RecommendationData with recommended path, standards, and evidence quotas
     """
     try:
-        answers_dict = answers.model_dump()
-        recommendation = criteria_matcher.match_criteria(answers_dict)
-        return recommendation
+        # Identical (or reordered) answers are served from the cache as pre-serialized bytes
+        submitted = answers.model_dump(mode="json")
+        recommendation = match_cache.get_or_compute(
+            submitted,
+            criteria_matcher.definitions_fingerprint(),
+            _serialize_recommendation,
+        )
+        content = b'{"questionnaireAnswers":' + orjson.dumps(submitted) + b"," + recommendation
+        return Response(content=content, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error matching criteria: {str(e)}")
 
+
+
+@router.get("/match/cache-stats")
+async def get_match_cache_stats():
+    """Hit-rate and size metrics for the criteria match cache."""
+    return match_cache.stats()
+
+
+@router.post("/match/batch")
+async def match_criteria_batch(answers: List[QuestionnaireAnswers]):
+    """
+    Analyze many questionnaires in one call (cohort and what-if analysis).
+    
+    Returns:
+        List of RecommendationData, in the same order as the input
+    """
+    try:
+        recommendations = criteria_matcher.match_criteria_batch_dicts([a.model_dump() for a in answers])
+        return Response(
+            content=orjson.dumps(recommendations),
+            media_type="application/json",
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching criteria: {str(e)}")
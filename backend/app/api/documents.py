@@ -2,15 +2,30 @@
 Documents API: upload, list, update, delete (MVP, in-memory store for now).
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import Response
+from typing import List, Dict, Optional
 from datetime import date, datetime
+import asyncio
 import uuid
+from app.services.storage import content_hash, get_object_store, material_key
+from app.services.image_derivatives import derivative_info_key, image_derivative_service, is_image
+from app.services.pdf_thumbnails import THUMBNAIL_SIZES, count_pages, thumbnail_service
+from app.services.admission import register_tenant_resolver
+from app.services.application_summary import summary_service
+from app.services.search_index import search_index
+from app.services.text_extraction import is_pdf, text_extraction_service, text_key
+from app.services.workers import run_in_process
+from app.services.listing import DEFAULT_PAGE_SIZE, json_response, paginate, parse_fields, project
 
 router = APIRouter()
 
 # In-memory store for MVP demo
 MATERIALS: Dict[str, Dict] = {}
+# Admission control queues material requests per owning application
+register_tenant_resolver("material_id", lambda material_id: MATERIALS.get(material_id, {}).get("applicationId"))
+
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024
 
 
 @router.post("/upload")
@@ -18,37 +33,93 @@ async def upload_document(
     file: UploadFile = File(...),
     applicationId: str = Form(...),
 ):
-    if file.spool_max_size and file.spool_max_size > 5 * 1024 * 1024:
+    data = await file.read()
+    if len(data) > MAX_UPLOAD_SIZE:
         raise HTTPException(status_code=400, detail="File too large (max 5MB)")
 
+    # Store the original once per distinct content. Store calls are network
+    # requests with S3, so they run in a thread rather than on the event loop
+    digest = content_hash(data)
+    key = material_key(digest)
+    store = get_object_store()
+    if not await asyncio.to_thread(store.exists, key):
+        await asyncio.to_thread(store.put, key, data, file.content_type)
+
+    page_count = await run_in_process(count_pages, data) if is_pdf(file.content_type, file.filename) else 1
+
     material_id = str(uuid.uuid4())
     now = datetime.utcnow()
     MATERIALS[material_id] = {
         "id": material_id,
         "applicationId": applicationId,
         "fileName": file.filename,
-        "filePath": "memory://uploaded",
+        "filePath": key,
         "fileType": file.content_type,
-        "fileSize": 0,
+        "fileSize": len(data),
+        "contentHash": digest,
+        "pageCount": page_count,
         "uploadDate": date.today().isoformat(),
         "title": file.filename,
         "createdAt": now.isoformat(),
         "updatedAt": now.isoformat(),
     }
+    summary_service.material_added(MATERIALS[material_id])
+    # Extract text in the background so later stages read it precomputed
+    if not await asyncio.to_thread(store.exists, text_key(digest)):
+        text_extraction_service.schedule(digest, file.content_type, file.filename)
+    # Prepare the print-ready image now so previews and exports do no pixel work
+    if is_image(file.content_type, file.filename) and not await asyncio.to_thread(
+        store.exists, derivative_info_key(digest)
+    ):
+        image_derivative_service.schedule(digest)
+    # Searchable by name now and by its text once extraction finishes
+    search_index.material_added(MATERIALS[material_id])
     return MATERIALS[material_id]
 
 
 @router.get("")
-async def list_documents(applicationId: str):
-    return [m for m in MATERIALS.values() if m.get("applicationId") == applicationId]
+async def list_documents(
+    request: Request,
+    applicationId: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+    standard: Optional[str] = None,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """
+    List materials for an application, oldest first, one page at a time.
+    Returns the page and the cursor for the next one (null on the last page).
+    `status` is "classified" or "unclassified".
+    """
+    materials = [
+        m for m in MATERIALS.values()
+        if m.get("applicationId") == applicationId
+        and (standard is None or m.get("suggestedStandard") == standard)
+        and (type is None or m.get("materialType") == type)
+        and (status is None or ("classified" if m.get("classificationData") else "unclassified") == status)
+    ]
+    page, next_cursor = paginate(materials, cursor, limit)
+    return json_response(request, {
+        "materials": project(page, parse_fields(fields)),
+        "nextCursor": next_cursor,
+    })
 
 
 @router.put("/{material_id}")
 async def update_document(material_id: str, data: Dict):
     if material_id not in MATERIALS:
         raise HTTPException(status_code=404, detail="Material not found")
+    strength = data.get("strengthRating")
+    # Validated before anything changes; the dashboard summary adds these up
+    if strength is not None and (isinstance(strength, bool) or not isinstance(strength, int) or not 1 <= strength <= 5):
+        raise HTTPException(status_code=400, detail="strengthRating must be an integer from 1 to 5")
+    before = dict(MATERIALS[material_id])
     MATERIALS[material_id].update(data)
     MATERIALS[material_id]["updatedAt"] = datetime.utcnow().isoformat()
+    summary_service.material_updated(before, MATERIALS[material_id])
+    search_index.material_updated(MATERIALS[material_id])
     return MATERIALS[material_id]
 
 
@@ -56,5 +127,55 @@ async def update_document(material_id: str, data: Dict):
 async def delete_document(material_id: str):
     if material_id not in MATERIALS:
         raise HTTPException(status_code=404, detail="Material not found")
-    del MATERIALS[material_id]
+    material = MATERIALS.pop(material_id)
+    summary_service.material_removed(material)
+    search_index.material_removed(material)
     return {"ok": True}
+
+
+@router.get("/{material_id}/text")
+async def get_document_text(material_id: str):
+    """Get the extracted text of a material, one entry per page."""
+    material = MATERIALS.get(material_id)
+    if not material or not material.get("contentHash"):
+        raise HTTPException(status_code=404, detail="Material not found")
+    try:
+        pages = await text_extraction_service.get_pages(
+            material["contentHash"], material.get("fileType"), material.get("fileName")
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting text: {str(e)}")
+    return {"materialId": material_id, "pages": pages}
+
+
+@router.get("/{material_id}/pages/{page}/thumbnail")
+async def get_page_thumbnail(material_id: str, page: int, size: str = "medium"):
+    """
+    Get a PNG thumbnail of one page of an uploaded PDF.
+    Rendered on first request and cached; responses are immutable for a given content hash.
+    """
+    material = MATERIALS.get(material_id)
+    if not material or not material.get("contentHash"):
+        raise HTTPException(status_code=404, detail="Material not found")
+    if not is_pdf(material.get("fileType"), material.get("fileName")):
+        raise HTTPException(status_code=400, detail="Thumbnails are only available for PDF materials")
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"Size must be one of: {', '.join(THUMBNAIL_SIZES)}")
+    if page < 1 or page > material.get("pageCount", 0):
+        raise HTTPException(status_code=404, detail="Page not found")
+
+    try:
+        image = await thumbnail_service.get_thumbnail(material["contentHash"], page, size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering page: {str(e)}")
+    if image is None:
+        raise HTTPException(status_code=404, detail="Material content not found")
+
+    return Response(
+        content=image,
+        media_type="image/png",
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{material["contentHash"]}-{page}-{size}"',
+        },
+    )
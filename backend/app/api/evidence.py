@@ -2,103 +2,101 @@
 API endpoints for evidence building and preview generation.
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi import APIRouter, File, Form, HTTPException, Request
 from fastapi.responses import Response
-from typing import List
+from starlette.datastructures import UploadFile
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import asyncio
 import io
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from PIL import Image
-import tempfile
-import os
+import json
 from app.services.entity_enrichment import EntityEnrichmentService
+from app.services.fonts import font_registry
+from app.services.image_derivatives import image_derivative_service, is_image, normalize_image
+from app.services.pdf_output import DEFAULT_JPEG_QUALITY, ImageEmbedder, new_canvas, optimize_pdf
+from app.services.workers import run_in_process
+from app.api.documents import MATERIALS
+from app.schemas.schemas import EvidenceMaterialSelection
+from app.services.admission import register_tenant_resolver
+from app.services.application_summary import summary_service
+from app.services.search_index import search_index
+from app.services.listing import DEFAULT_PAGE_SIZE, json_response, paginate, parse_fields, project
+from app.services.telemetry import IMAGES_PROCESSED, PDF_BYTES, get_logger, span
 
 router = APIRouter()
+logger = get_logger(__name__)
 
+# Largest area (in points) an image takes in the preview flow
+PREVIEW_IMAGE_MAX_HEIGHT = 300
 
-@router.post("/generate-preview")
-async def generate_preview(
-    request: Request,
-    textContent: str = Form(""),
-    evidenceType: str = Form(...),
-    standard: str = Form(...),
-):
-    """
-    Generate a preview PDF combining uploaded images and text content.
-    This creates a formatted evidence preview using AI-assisted layout.
-    """
-    try:
-        print(f"Generating preview for: {evidenceType}, Standard: {standard}")
-        print(f"Text content length: {len(textContent) if textContent else 0}")
-        
-        # Parse multipart form data to get images
-        form = await request.form()
-        images_list = []
-        # FastAPI returns multiple files with same key as a list
-        images_field = form.getlist("images")
-        for item in images_field:
-            if isinstance(item, UploadFile):
-                images_list.append(item)
-        
-        print(f"Number of images: {len(images_list)}")
-        # Create PDF buffer
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        # Page 1: Cover/Title
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(50, height - 100, evidenceType)
-        c.setFont("Helvetica", 12)
-        c.drawString(50, height - 130, f"Standard: {standard}")
-        c.drawString(50, height - 150, "Evidence Preview - Generated by AI")
-
-        # Page 2+: Content
-        y_position = height - 100
-
-        # Enrich text with entity background information
-        # Use original text by default, only enrich if quick
-        enriched_content = textContent
-        if textContent.strip():
-            try:
-                # Try to enrich, but don't block if it takes too long
-                enrichment_result = EntityEnrichmentService.enrich_text(textContent)
-                enriched_content = enrichment_result["enriched_text"]
-            except Exception as e:
-                print(f"Error enriching text (using original): {e}")
-                # Always fallback to original text if enrichment fails
-                enriched_content = textContent
 
+def _parse_material_ids(material_ids: str) -> List[str]:
+    """Accept a JSON list or a comma-separated string of material ids."""
+    material_ids = material_ids.strip()
+    if not material_ids:
+        return []
+    if material_ids.startswith("["):
+        return [str(material_id) for material_id in json.loads(material_ids)]
+    return [material_id.strip() for material_id in material_ids.split(",") if material_id.strip()]
+
+
+def _fit(info: Dict, max_width: float, max_height: float) -> Tuple[float, float]:
+    """Display size in points of a prepared image, at its target DPI, shrunk to fit the box."""
+    width = info["width"] * 72 / info["dpi"]
+    height = info["height"] * 72 / info["dpi"]
+    scale = min(1.0, max_width / width, max_height / height)
+    return width * scale, height * scale
+
+
+def _render_preview(
+    evidence_type: str,
+    standard: str,
+    enriched_content: str,
+    prepared: List,
+    fonts: Dict,
+    has_images: bool,
+) -> bytes:
+    """Lay out and encode the preview PDF (runs in a thread)."""
+    # Heavy rendering libraries are imported on first use to keep startup fast
+    from reportlab.lib.pagesizes import letter
+
+    # Create PDF buffer
+    buffer = io.BytesIO()
+    c = new_canvas(buffer, pagesize=letter)
+    images = ImageEmbedder(c)
+    width, height = letter
+
+    regular, bold = fonts["regular"], fonts["bold"]
+
+    def draw_lines(text, font, size, x, leading):
+        """Draw wrapped text from y_position down, starting new pages as needed."""
+        nonlocal y_position
+        for line in font.wrap(text, size, width - x - 50):
+            if y_position < 50:
+                c.showPage()
+                y_position = height - 50
+            font.draw(c, x, y_position, line, size)
+            y_position -= leading
+
+    # Page 1: Cover/Title
+    bold.draw(c, 50, height - 100, evidence_type, 20)
+    regular.draw(c, 50, height - 130, f"Standard: {standard}", 12)
+    regular.draw(c, 50, height - 150, "Evidence Preview - Generated by AI", 12)
+
+    # Page 2+: Content
+    y_position = height - 100
+
+    with span("preview.layout"):
         # Add text content if provided
         if enriched_content and enriched_content.strip():
             # Add original evidence description
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, y_position, "Evidence Description:")
+            bold.draw(c, 50, y_position, "Evidence Description:", 14)
             y_position -= 30
 
-            c.setFont("Helvetica", 11)
             # Extract original text (before enrichment section)
             original_text = enriched_content.split("--- Contextual Background Information ---")[0].strip()
-            
-            # Simple text wrapping for original text
-            words = original_text.split()
-            line = ""
-            for word in words:
-                if c.stringWidth(line + word, "Helvetica", 11) < width - 100:
-                    line += word + " "
-                else:
-                    if line:
-                        c.drawString(50, y_position, line.strip())
-                        y_position -= 15
-                    line = word + " "
-                    if y_position < 50:
-                        c.showPage()
-                        y_position = height - 50
-            if line:
-                c.drawString(50, y_position, line.strip())
-                y_position -= 30
+            draw_lines(original_text, regular, 11, 50, 15)
+            y_position -= 15
 
             # Add background information section if available
             if "--- Contextual Background Information ---" in enriched_content:
@@ -106,16 +104,14 @@ async def generate_preview(
                 if y_position < 100:
                     c.showPage()
                     y_position = height - 50
-                
-                c.setFont("Helvetica-Bold", 12)
-                c.drawString(50, y_position, "Contextual Background Information:")
+
+                bold.draw(c, 50, y_position, "Contextual Background Information:", 12)
                 y_position -= 25
-                
-                c.setFont("Helvetica", 10)
+
                 # Extract and add background sections
                 background_section = enriched_content.split("--- Contextual Background Information ---")[1]
                 background_paragraphs = background_section.split("[Background:")
-                
+
                 for para in background_paragraphs:
                     if para.strip():
                         # Format: Entity Name] Background text
@@ -123,90 +119,156 @@ async def generate_preview(
                             entity_part, bg_text = para.split("]", 1)
                             entity_name = entity_part.strip()
                             bg_text = bg_text.strip()
-                            
+
                             # Add entity name in bold
-                            c.setFont("Helvetica-Bold", 10)
-                            c.drawString(50, y_position, f"{entity_name}:")
+                            bold.draw(c, 50, y_position, f"{entity_name}:", 10)
                             y_position -= 15
-                            
+
                             # Add background text
-                            c.setFont("Helvetica", 9)
-                            words = bg_text.split()
-                            line = ""
-                            for word in words:
-                                if c.stringWidth(line + word, "Helvetica", 9) < width - 100:
-                                    line += word + " "
-                                else:
-                                    if line:
-                                        c.drawString(60, y_position, line.strip())
-                                        y_position -= 12
-                                    line = word + " "
-                                    if y_position < 50:
-                                        c.showPage()
-                                        y_position = height - 50
-                            if line:
-                                c.drawString(60, y_position, line.strip())
-                                y_position -= 20
-                
+                            draw_lines(bg_text, regular, 9, 60, 12)
+                            y_position -= 8
+
                 y_position -= 20
-        elif not images_list:
+        elif not has_images:
             # If no text and no images, add a message
-            c.setFont("Helvetica", 11)
-            c.drawString(50, y_position, "No content provided. Please add text or images.")
+            regular.draw(c, 50, y_position, "No content provided. Please add text or images.", 11)
 
-        # Add images
-        for idx, image_file in enumerate(images_list):
-            if y_position < 200:
-                c.showPage()
-                y_position = height - 50
+    # Add images
+    for idx, item in enumerate(prepared):
+        if isinstance(item, Exception):
+            IMAGES_PROCESSED.inc(status="error")
+            logger.warning("image_processing_failed", index=idx, error=str(item))
+            continue
+        caption, data, info = item
+        if y_position < 200:
+            c.showPage()
+            y_position = height - 50
 
-            try:
-                # Read image
-                image_data = await image_file.read()
-                img = Image.open(io.BytesIO(image_data))
-
-                # Resize if too large
-                max_width = width - 100
-                max_height = 300
-                img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-
-                # Save to temp file for reportlab
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-                    img.save(tmp.name, "PNG")
-                    tmp_path = tmp.name
-
-                # Add image to PDF
-                c.drawImage(tmp_path, 50, y_position - img.height, width=img.width, height=img.height)
-                y_position -= img.height + 20
-
-                # Clean up temp file
-                os.unlink(tmp_path)
-
-                # Add caption
-                c.setFont("Helvetica", 9)
-                c.drawString(50, y_position, f"Image {idx + 1}: {image_file.filename}")
-                y_position -= 20
+        # Embedded as stored (JPEG passes straight through), drawn at its target DPI
+        draw_width, draw_height = _fit(info, width - 100, PREVIEW_IMAGE_MAX_HEIGHT)
+        images.draw(data, 50, y_position - draw_height, draw_width, draw_height)
+        y_position -= draw_height + 20
 
-            except Exception as e:
-                print(f"Error processing image {image_file.filename}: {e}")
-                continue
+        # Add caption
+        regular.draw(c, 50, y_position, f"Image {idx + 1}: {caption}", 9)
+        y_position -= 20
+        IMAGES_PROCESSED.inc(status="ok")
 
-        # Ensure we have at least one page
-        if not images_list and not (enriched_content and enriched_content.strip()):
-            c.setFont("Helvetica", 11)
-            c.drawString(50, height - 100, "No content provided.")
+    # Ensure we have at least one page
+    if not prepared and not (enriched_content and enriched_content.strip()):
+        regular.draw(c, 50, height - 100, "No content provided.", 11)
 
+    with span("preview.pdf_encode"):
         c.save()
-        buffer.seek(0)
+    return buffer.getvalue()
+
+
+@router.post("/generate-preview")
+async def generate_preview(
+    request: Request,
+    textContent: str = Form(""),
+    evidenceType: str = Form(...),
+    standard: str = Form(...),
+    materialIds: str = Form(""),  # uploaded image materials to include, JSON list or comma-separated
+    targetSizeKb: Optional[int] = Form(None),  # recompress images until the PDF fits
+):
+    """
+    Generate a preview PDF combining images and text content.
+    This creates a formatted evidence preview using AI-assisted layout.
+    Images are referenced by material id and embedded from their upload-time
+    derivatives; images posted with the form are normalized in the worker pool.
+    """
+    try:
+        # Parse multipart form data to get images
+        form = await request.form()
+        images_list = []
+        # FastAPI returns multiple files with same key as a list
+        images_field = form.getlist("images")
+        for item in images_field:
+            if isinstance(item, UploadFile):
+                images_list.append(item)
+
+        try:
+            image_materials = [MATERIALS.get(material_id) for material_id in _parse_material_ids(materialIds)]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid materialIds: {str(e)}")
+        if any(material is None for material in image_materials):
+            raise HTTPException(status_code=404, detail="Material not found")
+        for material in image_materials:
+            if not is_image(material.get("fileType"), material.get("fileName")):
+                raise HTTPException(status_code=400, detail=f"Material {material.get('fileName')} is not an image")
         
-        print(f"PDF generated successfully, size: {len(buffer.getvalue())} bytes")
+        logger.info(
+            "preview_started",
+            evidence_type=evidenceType,
+            standard=standard,
+            text_length=len(textContent) if textContent else 0,
+            images=len(images_list) + len(image_materials),
+        )
+        # Fonts are registered at startup; text falls back per run for CJK and other scripts
+        fonts = await font_registry.chains()
+
+        # Enrich text with entity background information (blocking HTTP lookups, so in a thread)
+        # Use original text by default, only enrich if quick
+        async def enrich():
+            if not textContent.strip():
+                return textContent
+            try:
+                with span("preview.enrichment"):
+                    enrichment_result = await asyncio.to_thread(EntityEnrichmentService.enrich_text, textContent)
+                return enrichment_result["enriched_text"]
+            except Exception as e:
+                logger.warning("enrichment_failed", error=str(e))
+                # Always fallback to original text if enrichment fails
+                return textContent
+
+        # Prepared images: stored derivatives for materials, normalized in the pool for form uploads
+        async def prepare_material(material):
+            data, info = await image_derivative_service.get(material["contentHash"])
+            return material.get("title") or material.get("fileName"), data, info
+
+        async def prepare_upload(image_file):
+            image_data = await image_file.read()
+            with span("preview.image", bytes=len(image_data)):
+                data, info = await run_in_process(normalize_image, image_data)
+            return image_file.filename, data, info
+
+        enriched_content, prepared = await asyncio.gather(
+            enrich(),
+            asyncio.gather(
+                *[prepare_material(material) for material in image_materials],
+                *[prepare_upload(image_file) for image_file in images_list],
+                return_exceptions=True,
+            ),
+        )
+
+        # Page layout and encoding are CPU-bound; keep them off the event loop
+        pdf_bytes = await asyncio.to_thread(
+            _render_preview,
+            evidenceType,
+            standard,
+            enriched_content,
+            prepared,
+            fonts,
+            bool(images_list or image_materials),
+        )
+
+        # Images are stored print-ready already; only a size target needs another pass
+        if targetSizeKb and len(pdf_bytes) > targetSizeKb * 1024:
+            with span("preview.pdf_optimize", bytes=len(pdf_bytes)):
+                pdf_bytes = await run_in_process(optimize_pdf, pdf_bytes, DEFAULT_JPEG_QUALITY, targetSizeKb * 1024)
+
+        PDF_BYTES.inc(len(pdf_bytes), kind="preview")
+        logger.info("preview_generated", bytes=len(pdf_bytes))
 
         return Response(
-            content=buffer.getvalue(),
+            content=pdf_bytes,
             media_type="application/pdf",
             headers={"Content-Disposition": f'inline; filename="evidence-preview.pdf"'},
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating preview: {str(e)}")
 
@@ -218,6 +280,7 @@ async def save_evidence(
     standard: str = Form(...),
     textContent: str = Form(""),
     applicationId: str = Form("demo-app"),  # For now using demo, later from auth
+    materials: str = Form(""),  # JSON list of {materialId, pageRange, order}
 ):
     """
     Save evidence to database and storage.
@@ -260,6 +323,29 @@ async def save_evidence(
             if isinstance(item, UploadFile):
                 images_list.append(item)
         
+        # Materials (and page selections) to assemble into the evidence PDF
+        selected_materials = []
+        if materials.strip():
+            try:
+                selected_materials = [
+                    EvidenceMaterialSelection(**item).model_dump()
+                    for item in json.loads(materials)
+                ]
+            except (ValueError, TypeError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid materials: {str(e)}")
+
+        from app.services.pdf_assembly import parse_page_range
+
+        page_count = 0
+        for selection in selected_materials:
+            material = MATERIALS.get(selection["materialId"])
+            if not material:
+                raise HTTPException(status_code=404, detail=f"Material not found: {selection['materialId']}")
+            try:
+                page_count += len(parse_page_range(selection["pageRange"], material.get("pageCount", 1)))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
         # Generate evidence ID
         import uuid
         evidence_id = str(uuid.uuid4())
@@ -273,6 +359,8 @@ async def save_evidence(
             "textContent": textContent,
             "imageCount": len(images_list),
             "imageNames": [img.filename for img in images_list],
+            "materials": selected_materials,
+            "pageCount": page_count,
             "applicationId": applicationId,
             "createdAt": datetime.utcnow().isoformat(),
             "status": "Draft",
@@ -282,20 +370,42 @@ async def save_evidence(
         if not hasattr(save_evidence, "evidence_store"):
             save_evidence.evidence_store = {}
         save_evidence.evidence_store[evidence_id] = evidence_data
+        summary_service.evidence_added(evidence_data)
+        search_index.evidence_added(evidence_data)
         
         return {
             "message": "Evidence saved successfully",
             "evidence_id": evidence_id,
             "evidence": evidence_data
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving evidence: {str(e)}")
 
 
+
+def _evidence_application(evidence_id: str) -> Optional[str]:
+    return getattr(save_evidence, "evidence_store", {}).get(evidence_id, {}).get("applicationId")
+
+
+# Admission control queues evidence requests (e.g. generate-pdf) per owning application
+register_tenant_resolver("evidence_id", _evidence_application)
+
 @router.get("/list")
-async def list_evidence(applicationId: str = "demo-app"):
+async def list_evidence(
+    request: Request,
+    applicationId: str = "demo-app",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+    standard: Optional[str] = None,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+):
     """
-    List all saved evidence for an application.
+    List saved evidence for an application, oldest first, one page at a time.
+    Use `fields=` to leave out large fields such as textContent.
     """
     if not hasattr(save_evidence, "evidence_store"):
         save_evidence.evidence_store = {}
@@ -303,9 +413,16 @@ async def list_evidence(applicationId: str = "demo-app"):
     evidence_list = [
         ev for ev in save_evidence.evidence_store.values()
         if ev.get("applicationId") == applicationId
+        and (standard is None or ev.get("standard") == standard)
+        and (type is None or ev.get("evidenceType") == type)
+        and (status is None or ev.get("status") == status)
     ]
+    page, next_cursor = paginate(evidence_list, cursor, limit)
     
-    return {"evidence": evidence_list}
+    return json_response(request, {
+        "evidence": project(page, parse_fields(fields)),
+        "nextCursor": next_cursor,
+    })
 
 
 @router.get("/{evidence_id}")
@@ -334,6 +451,8 @@ async def delete_evidence(evidence_id: str):
     if evidence_id not in save_evidence.evidence_store:
         raise HTTPException(status_code=404, detail="Evidence not found")
     
-    del save_evidence.evidence_store[evidence_id]
+    evidence = save_evidence.evidence_store.pop(evidence_id)
+    summary_service.evidence_removed(evidence)
+    search_index.evidence_removed(evidence)
     return {"message": "Evidence deleted successfully"}
 
@@ -0,0 +1,38 @@
+"""
+API endpoints for the Stage 4 quality check and export.
+"""
+
+from fastapi import APIRouter, HTTPException
+from app.api.documents import MATERIALS
+from app.api.evidence import save_evidence
+from app.schemas.schemas import QualityCheckResult
+from app.services.quality_check import quality_checker
+from app.services.telemetry import span
+
+router = APIRouter()
+
+
+@router.get("/quality-check/{application_id}", response_model=QualityCheckResult)
+async def quality_check(application_id: str) -> QualityCheckResult:
+    """
+    Run the final checklist for an application: evidence counts per standard,
+    page limits, five-year dates, readability and duplicate materials, with an
+    overall score and warnings. Only evidence changed since the last run is re-examined.
+    """
+    evidence_store = getattr(save_evidence, "evidence_store", {})
+    evidences = sorted(
+        (ev for ev in evidence_store.values() if ev.get("applicationId") == application_id),
+        key=lambda ev: (ev.get("createdAt") or "", ev["id"]),
+    )
+    strengths = [
+        m["strengthRating"]
+        for m in MATERIALS.values()
+        if m.get("applicationId") == application_id and m.get("strengthRating") is not None
+    ]
+    quality_checker.prune(evidence_store)
+    try:
+        with span("export.quality_check", evidence=len(evidences)):
+            result = await quality_checker.check(evidences, MATERIALS, strengths)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking quality: {str(e)}")
+    return QualityCheckResult(**result)
@@ -0,0 +1,28 @@
+"""
+API endpoints for downloading request profiles (admin only).
+"""
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.services.profiling import is_admin, load_profile
+
+router = APIRouter()
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json", x_profile: Optional[str] = Header(None)):
+    """
+    Download the profile captured for a request, by the id in its X-Profile-Id header.
+    format=collapsed returns stack samples in the collapsed format used by flame graph tools.
+    """
+    if not is_admin(x_profile):
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "collapsed":
+        return PlainTextResponse("\n".join(f"{stack} {count}" for stack, count in profile["stacks"].items()) + "\n")
+    return profile
@@ -0,0 +1,28 @@
+"""
+API endpoint for full-text search within an application.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from app.services.listing import json_response
+from app.services.search_index import DEFAULT_LIMIT, search_index
+
+router = APIRouter()
+
+
+@router.get("")
+async def search(
+    request: Request,
+    applicationId: str,
+    q: str,
+    kind: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
+):
+    """
+    Search an application's materials and evidence by title, type and text,
+    best match first. `kind` is "material" or "evidence". Each result has a
+    snippet with the matching words wrapped in <mark>.
+    """
+    if kind not in (None, "material", "evidence"):
+        raise HTTPException(status_code=400, detail="kind must be 'material' or 'evidence'")
+    return json_response(request, {"results": search_index.search(applicationId, q, kind, limit)})
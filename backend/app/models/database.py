@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -21,3 +22,21 @@ def get_db():
     finally:
         db.close()
 
+
+@contextmanager
+def count_queries(bind=None):
+    """
+    Count SQL statements executed on the engine inside the block.
+    Yields a one-item list whose value is updated as queries run.
+    """
+    bind = bind or engine
+    counter = [0]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, Text, Date, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Text, Date, DateTime, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -73,6 +73,10 @@ class Material(Base):
     
     application = relationship("Application", back_populates="materials")
     evidence_materials = relationship("EvidenceMaterial", back_populates="material")
+    
+    __table_args__ = (
+        Index("ix_materials_application_suggested_standard", "application_id", "suggested_standard"),
+    )
 
 class Evidence(Base):
     __tablename__ = "evidence"
@@ -90,7 +94,13 @@ class Evidence(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     application = relationship("Application", back_populates="evidence")
-    evidence_materials = relationship("EvidenceMaterial", back_populates="evidence")
+    evidence_materials = relationship(
+        "EvidenceMaterial", back_populates="evidence", order_by="EvidenceMaterial.order"
+    )
+    
+    __table_args__ = (
+        Index("ix_evidence_application_standard_number", "application_id", "standard_type", "evidence_number"),
+    )
 
 class EvidenceMaterial(Base):
     __tablename__ = "evidence_materials"
@@ -102,4 +112,7 @@ class EvidenceMaterial(Base):
     
     evidence = relationship("Evidence", back_populates="evidence_materials")
     material = relationship("Material", back_populates="evidence_materials")
-
+    
+    __table_args__ = (
+        Index("ix_evidence_materials_material_id", "material_id"),
+    )
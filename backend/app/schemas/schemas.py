@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation.
 """
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime
 from enum import Enum
@@ -37,6 +37,9 @@ class QuestionnaireAnswers(BaseModel):
 
 
 class StandardRecommendation(BaseModel):
+    # Immutable so prebuilt instances can be shared between recommendations
+    model_config = ConfigDict(frozen=True)
+
     standardType: StandardType
     name: str
     recommendedEvidenceTypes: List[str]
@@ -103,6 +106,8 @@ class MaterialResponse(BaseModel):
     classificationData: Optional[ClassificationData] = None
     evidenceDescription: Optional[str] = None
     additionalLinks: Optional[List[str]] = None
+    # Set by the quality check: {"readable", "issues", "pagesAnalyzed"}
+    readability: Optional[Dict[str, Any]] = None
     createdAt: datetime
     updatedAt: datetime
 
@@ -137,6 +142,31 @@ class EvidenceResponse(BaseModel):
     updatedAt: datetime
 
 
+class EvidenceMaterialSelection(BaseModel):
+    materialId: str
+    pageRange: Optional[str] = None  # e.g., "1-2" if only using pages 1-2
+    order: int
+
+
+class PdfOutputOptions(BaseModel):
+    optimize: bool = True  # JPEG for photographs, compressed streams, shared images
+    jpegQuality: int = Field(80, ge=30, le=95)
+    targetSizeKb: Optional[int] = Field(None, ge=16, le=50 * 1024)  # lower JPEG quality step by step until the PDF fits
+
+
+class EvidenceAssemblyRequest(BaseModel):
+    title: Optional[str] = None
+    materials: List[EvidenceMaterialSelection]
+    output: Optional[PdfOutputOptions] = None
+
+
+# Achievement Schemas
+class AchievementSubmission(BaseModel):
+    achievementType: str
+    applicationId: Optional[str] = None
+    fields: Dict[str, Any]  # field_id -> value; file fields hold material ids
+
+
 # Quality Check Schemas
 class QualityWarning(BaseModel):
     type: str  # "high", "medium", "low"
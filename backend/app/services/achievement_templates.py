@@ -3,8 +3,10 @@ Achievement templates defining required materials for each achievement type.
 Based on Tech Nation requirements for different achievement types.
 """
 
-from typing import Dict, List, Any
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
 from enum import Enum
+import orjson
 
 
 class MaterialFieldType(str, Enum):
@@ -18,7 +20,9 @@ class MaterialFieldType(str, Enum):
 
 class MaterialField:
     """Defines a single material field requirement."""
-    
+
+    __slots__ = ("field_id", "label", "field_type", "required", "help_text", "validation", "multiple")
+
     def __init__(
         self,
         field_id: str,
@@ -37,10 +41,23 @@ class MaterialField:
         self.validation = validation or {}
         self.multiple = multiple
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "field_id": self.field_id,
+            "label": self.label,
+            "field_type": self.field_type.value,
+            "required": self.required,
+            "help_text": self.help_text,
+            "validation": self.validation,
+            "multiple": self.multiple,
+        }
+
 
 class AchievementTemplate:
     """Template defining material requirements for an achievement type."""
-    
+
+    __slots__ = ("achievement_type", "name", "description", "required_fields", "optional_fields", "suggested_standard")
+
     def __init__(
         self,
         achievement_type: str,
@@ -57,6 +74,16 @@ class AchievementTemplate:
         self.optional_fields = optional_fields or []
         self.suggested_standard = suggested_standard
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "achievement_type": self.achievement_type,
+            "name": self.name,
+            "description": self.description,
+            "required_fields": [field.to_dict() for field in self.required_fields],
+            "optional_fields": [field.to_dict() for field in self.optional_fields],
+            "suggested_standard": self.suggested_standard,
+        }
+
 
 class AchievementTemplates:
     """Service providing achievement templates based on Tech Nation requirements."""
@@ -294,3 +321,25 @@ class AchievementTemplates:
         
         return templates
 
+
+def _strong_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class TemplateCatalog:
+    """
+    Templates compiled once into pre-serialized JSON bytes with strong ETags.
+    The catalog is static for the life of the process, so responses are plain byte copies.
+    """
+
+    def __init__(self, templates: Dict[str, AchievementTemplate]):
+        self._templates: Dict[str, Tuple[bytes, str]] = {}
+        for key, template in templates.items():
+            body = orjson.dumps(template.to_dict())
+            self._templates[key] = (body, _strong_etag(body))
+        self.catalog_body = orjson.dumps({"templates": {key: template.to_dict() for key, template in templates.items()}})
+        self.catalog_etag = _strong_etag(self.catalog_body)
+
+    def get(self, achievement_type: str) -> Optional[Tuple[bytes, str]]:
+        """Serialized template and its ETag, or None for an unknown type."""
+        return self._templates.get(achievement_type)
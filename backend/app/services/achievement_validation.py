@@ -0,0 +1,190 @@
+"""
+Server-side validation of achievement submissions.
+Each AchievementTemplate is compiled once into a validator whose field rules are
+pre-resolved into closures, so a submission is checked in a single pass with
+errors reported per field, before any storage, classification or rendering work.
+"""
+
+import re
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.services.achievement_templates import AchievementTemplate, MaterialField, MaterialFieldType
+
+# A rule returns an error message, or None if the value passes
+Rule = Callable[[Any], Optional[str]]
+# Resolves a material id to its material (or None if unknown), for file fields
+MaterialLookup = Callable[[str], Optional[Dict]]
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or value == "" or value == []
+
+
+def _check_text(value: Any) -> Optional[str]:
+    return None if isinstance(value, str) else "must be text"
+
+
+def _check_number(value: Any) -> Optional[str]:
+    if isinstance(value, bool):
+        return "must be a number"
+    if isinstance(value, (int, float)):
+        return None
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return "must be a number"
+    return None
+
+
+def _check_date(value: Any) -> Optional[str]:
+    # fromisoformat also takes other ISO forms (e.g. 20230101); only YYYY-MM-DD round-trips
+    try:
+        valid = isinstance(value, str) and date.fromisoformat(value).isoformat() == value
+    except ValueError:
+        valid = False
+    return None if valid else "must be a date (YYYY-MM-DD)"
+
+
+def _check_link(value: Any) -> Optional[str]:
+    parsed = urlparse(value) if isinstance(value, str) else None
+    if not parsed or parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return "must be an http(s) URL"
+    return None
+
+
+def _check_material_id(value: Any) -> Optional[str]:
+    return None if isinstance(value, str) and value else "must be an uploaded material id"
+
+
+TYPE_CHECKS: Dict[MaterialFieldType, Rule] = {
+    MaterialFieldType.TEXT: _check_text,
+    MaterialFieldType.TEXTAREA: _check_text,
+    MaterialFieldType.NUMBER: _check_number,
+    MaterialFieldType.DATE: _check_date,
+    MaterialFieldType.LINK: _check_link,
+    MaterialFieldType.FILE_UPLOAD: _check_material_id,
+}
+
+
+def _value_rules(validation: Dict[str, Any]) -> List[Rule]:
+    """Rules applied to each individual value of a field."""
+    rules: List[Rule] = []
+    if "min_length" in validation:
+        min_length = validation["min_length"]
+        rules.append(lambda v: f"must be at least {min_length} characters" if len(str(v)) < min_length else None)
+    if "max_length" in validation:
+        max_length = validation["max_length"]
+        rules.append(lambda v: f"must be at most {max_length} characters" if len(str(v)) > max_length else None)
+    if "min" in validation:
+        minimum = validation["min"]
+        rules.append(lambda v: f"must be at least {minimum}" if float(v) < minimum else None)
+    if "max" in validation:
+        maximum = validation["max"]
+        rules.append(lambda v: f"must be at most {maximum}" if float(v) > maximum else None)
+    if "pattern" in validation:
+        pattern = re.compile(validation["pattern"])
+        rules.append(lambda v: "has an invalid format" if not pattern.fullmatch(str(v)) else None)
+    return rules
+
+
+class CompiledField:
+    """A template field with its rules resolved into closures."""
+
+    __slots__ = ("field_id", "required", "multiple", "is_file", "max_files", "type_check", "value_rules")
+
+    def __init__(self, field: MaterialField):
+        self.field_id = field.field_id
+        self.required = field.required
+        self.multiple = field.multiple
+        self.is_file = field.field_type == MaterialFieldType.FILE_UPLOAD
+        self.max_files = field.validation.get("max_files")
+        self.type_check = TYPE_CHECKS[field.field_type]
+        self.value_rules = _value_rules(field.validation)
+
+    def validate(self, value: Any, lookup: Optional[MaterialLookup]) -> List[str]:
+        if _is_blank(value):
+            return ["is required"] if self.required else []
+
+        values = value if isinstance(value, list) else [value]
+        if len(values) > 1 and not self.multiple:
+            return ["accepts a single value"]
+        if self.max_files is not None and len(values) > self.max_files:
+            return [f"accepts at most {self.max_files} files"]
+
+        errors = []
+        for item in values:
+            error = self.type_check(item)
+            if error is None:
+                for rule in self.value_rules:
+                    error = rule(item)
+                    if error:
+                        break
+            if error is None and self.is_file and lookup is not None and lookup(item) is None:
+                error = f"references unknown material {item}"
+            if error:
+                errors.append(error)
+        return errors
+
+
+class CompiledTemplate:
+    """Validator for submissions of one achievement type."""
+
+    __slots__ = ("achievement_type", "fields")
+
+    def __init__(self, template: AchievementTemplate):
+        self.achievement_type = template.achievement_type
+        self.fields: Dict[str, CompiledField] = {
+            field.field_id: CompiledField(field)
+            for field in template.required_fields + template.optional_fields
+        }
+
+    def validate(self, values: Dict[str, Any], lookup: Optional[MaterialLookup] = None) -> Dict[str, List[str]]:
+        """Check all fields in one pass; returns error messages keyed by field id (empty when valid)."""
+        errors: Dict[str, List[str]] = {}
+        for field_id, field in self.fields.items():
+            field_errors = field.validate(values.get(field_id), lookup)
+            if field_errors:
+                errors[field_id] = field_errors
+        for field_id in values.keys() - self.fields.keys():
+            errors[field_id] = ["is not a field of this achievement type"]
+        return errors
+
+
+class AchievementValidator:
+    """Compiled validators for all achievement templates."""
+
+    def __init__(self, templates: Dict[str, AchievementTemplate]):
+        self._compiled = {key: CompiledTemplate(template) for key, template in templates.items()}
+
+    def validate(
+        self,
+        achievement_type: str,
+        values: Dict[str, Any],
+        lookup: Optional[MaterialLookup] = None,
+    ) -> Dict[str, Any]:
+        """
+        Validate one submission.
+
+        Returns:
+            {"achievementType", "valid", "errors": {field_id: [messages]}}
+        """
+        compiled = self._compiled.get(achievement_type)
+        if compiled is None:
+            errors = {"achievementType": [f"unknown achievement type {achievement_type}"]}
+        else:
+            errors = compiled.validate(values, lookup)
+        return {"achievementType": achievement_type, "valid": not errors, "errors": errors}
+
+    def validate_many(
+        self,
+        submissions: List[Tuple[str, Dict[str, Any]]],
+        lookup: Optional[MaterialLookup] = None,
+    ) -> Dict[str, Any]:
+        """Validate a batch of (achievement type, values) submissions, e.g. all of an application's achievements."""
+        results = [self.validate(achievement_type, values, lookup) for achievement_type, values in submissions]
+        return {
+            "valid": all(result["valid"] for result in results),
+            "invalidCount": sum(1 for result in results if not result["valid"]),
+            "results": results,
+        }
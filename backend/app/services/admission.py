@@ -0,0 +1,275 @@
+"""
+Admission control for expensive endpoints.
+Each limited route has a concurrency limit, a per-application limit and a bounded
+wait queue served round-robin across applications, so one applicant hammering
+"Preview" waits behind their own requests instead of everyone else's. When the
+queue is full the request is rejected immediately (429 for a single application
+over its share, 503 when the route is saturated) with a Retry-After hint.
+Routes without a limit pass straight through.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional
+from app.services.application_summary import summary_service
+from app.services.telemetry import Counter, Gauge, Histogram, get_logger, registry, resolve_route
+
+logger = get_logger(__name__)
+
+ADMISSION_IN_FLIGHT = registry.register(Gauge(
+    "admission_in_flight", "Requests admitted and running on limited routes", ("route",),
+))
+ADMISSION_QUEUE_DEPTH = registry.register(Gauge(
+    "admission_queue_depth", "Requests waiting for admission on limited routes", ("route",),
+))
+ADMISSION_REJECTED = registry.register(Counter(
+    "admission_rejected_total", "Requests rejected by admission control", ("route", "reason"),
+))
+ADMISSION_WAIT = registry.register(Histogram(
+    "admission_wait_seconds", "Time spent waiting for admission", ("route",),
+))
+
+# "METHOD /route/template" -> limits. Override or extend with ADMISSION_LIMITS (JSON, same shape).
+#   concurrency: requests running at once; perTenant: of which per application
+#   queue: requests waiting at once; tenantQueue: of which per application
+#   timeout: seconds a request may wait before it is turned away
+HEAVY = {"concurrency": 4, "perTenant": 1, "queue": 32, "tenantQueue": 4, "timeout": 15}
+DEFAULT_LIMITS: Dict[str, Dict] = {
+    "POST /api/evidence/generate-preview": {**HEAVY, "concurrency": 8, "perTenant": 2},
+    "POST /api/classification/classify/{material_id}": HEAVY,
+    "POST /api/classification/classify-batch": HEAVY,
+    "POST /api/classification/classify-all/{application_id}": HEAVY,
+    "POST /api/assembly/assemble": {**HEAVY, "concurrency": 8, "perTenant": 2},
+    "POST /api/assembly/generate-pdf/{evidence_id}": {**HEAVY, "concurrency": 8, "perTenant": 2},
+    "GET /api/export/quality-check/{application_id}": {**HEAVY, "concurrency": 8},
+}
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class FairLimiter:
+    """Concurrency limit with a bounded queue, granting slots round-robin across tenants."""
+
+    def __init__(
+        self,
+        route: str,
+        concurrency: int,
+        perTenant: Optional[int] = None,
+        queue: int = 32,
+        tenantQueue: Optional[int] = None,
+        timeout: float = 15,
+    ):
+        self.route = route
+        self.concurrency = concurrency
+        self.per_tenant = perTenant or concurrency
+        self.max_queue = queue
+        self.tenant_queue = tenantQueue or queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.queued = 0
+        self._tenant_in_flight: Dict[str, int] = {}
+        # Tenants with waiters, in round-robin order
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # Moving average of time a request holds a slot, for Retry-After
+        self._service_time = 1.0
+
+    def _can_run(self, tenant: str) -> bool:
+        return self.in_flight < self.concurrency and self._tenant_in_flight.get(tenant, 0) < self.per_tenant
+
+    def _grant(self, tenant: str) -> None:
+        self.in_flight += 1
+        self._tenant_in_flight[tenant] = self._tenant_in_flight.get(tenant, 0) + 1
+        ADMISSION_IN_FLIGHT.inc(route=self.route)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._service_time * (self.queued + 1) / self.concurrency))
+
+    def _reject(self, status_code: int, reason: str) -> Rejected:
+        ADMISSION_REJECTED.inc(route=self.route, reason=reason)
+        return Rejected(status_code, reason, self.retry_after())
+
+    async def acquire(self, tenant: str) -> None:
+        if not self._waiters and self._can_run(tenant):
+            self._grant(tenant)
+            return
+
+        tenant_waiters = self._waiters.get(tenant)
+        if tenant_waiters is not None and len(tenant_waiters) >= self.tenant_queue:
+            raise self._reject(429, "tenant_queue_full")
+        if self.queued >= self.max_queue:
+            raise self._reject(503, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(tenant, deque()).append(future)
+        self.queued += 1
+        ADMISSION_QUEUE_DEPTH.inc(route=self.route)
+        started = time.perf_counter()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up: hand the slot on
+                self.release(tenant)
+            else:
+                future.cancel()
+                self._remove_waiter(tenant, future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(503, "queue_timeout")
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - started, route=self.route)
+
+    def _remove_waiter(self, tenant: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(tenant)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self.queued -= 1
+            ADMISSION_QUEUE_DEPTH.dec(route=self.route)
+            if not waiters:
+                del self._waiters[tenant]
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting tenants in round-robin order."""
+        while self.in_flight < self.concurrency and self._waiters:
+            for tenant in list(self._waiters):
+                if self._tenant_in_flight.get(tenant, 0) < self.per_tenant:
+                    break
+            else:
+                return  # every waiting tenant is at its own limit
+            waiters = self._waiters.pop(tenant)
+            future = waiters.popleft()
+            self.queued -= 1
+            ADMISSION_QUEUE_DEPTH.dec(route=self.route)
+            if waiters:
+                self._waiters[tenant] = waiters  # back of the rotation
+            self._grant(tenant)
+            future.set_result(None)
+
+    def release(self, tenant: str, service_time: Optional[float] = None) -> None:
+        self.in_flight -= 1
+        remaining = self._tenant_in_flight.get(tenant, 1) - 1
+        if remaining:
+            self._tenant_in_flight[tenant] = remaining
+        else:
+            self._tenant_in_flight.pop(tenant, None)
+        ADMISSION_IN_FLIGHT.dec(route=self.route)
+        if service_time is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * service_time
+        self._dispatch()
+
+
+def load_limits() -> Dict[str, Dict]:
+    limits = {key: dict(value) for key, value in DEFAULT_LIMITS.items()}
+    overrides = os.getenv("ADMISSION_LIMITS")
+    if overrides:
+        for key, value in json.loads(overrides).items():
+            if value is None:
+                limits.pop(key, None)
+            else:
+                limits[key] = {**limits.get(key, HEAVY), **value}
+    return limits
+
+
+# Path parameter -> lookup of the application owning that record, registered by
+# the routers that keep the records (material_id, evidence_id)
+TENANT_RESOLVERS: Dict[str, Callable[[str], Optional[str]]] = {}
+
+
+def register_tenant_resolver(path_param: str, resolver: Callable[[str], Optional[str]]) -> None:
+    TENANT_RESOLVERS[path_param] = resolver
+
+
+def _claimed_application(scope, path_params: Dict[str, str]) -> Optional[str]:
+    """Application id named by the client: path, X-Application-Id header or applicationId query."""
+    for key in ("application_id", "applicationId"):
+        if key in path_params:
+            return str(path_params[key])
+    for name, value in scope["headers"]:
+        if name == b"x-application-id":
+            return value.decode("latin-1")
+    query = scope.get("query_string", b"").decode("latin-1")
+    for pair in query.split("&"):
+        name, _, value = pair.partition("=")
+        if name == "applicationId" and value:
+            return value
+    return None
+
+
+def _tenant(scope, path_params: Dict[str, str]) -> str:
+    """
+    Fairness key: the application owning the material/evidence the request
+    processes, else the application id it names if that application exists,
+    else the client address. Ids for unknown applications are ignored, so a
+    client can't get a fresh share per request by inventing ids.
+    """
+    for key, resolver in TENANT_RESOLVERS.items():
+        if key in path_params:
+            application_id = resolver(str(path_params[key]))
+            if application_id:
+                return application_id
+    application_id = _claimed_application(scope, path_params)
+    if application_id and summary_service.has_application(application_id):
+        return application_id
+    client = scope.get("client")
+    return f"client:{client[0]}" if client else "anonymous"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying FairLimiter admission to the configured routes."""
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = os.getenv("ADMISSION_ENABLED", "1").lower() not in ("0", "false", "no")
+        self.limiters = {
+            key: FairLimiter(key, **config) for key, config in load_limits().items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        route, path_params = resolve_route(scope)
+        limiter = self.limiters.get(f"{scope['method']} {route}")
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        tenant = _tenant(scope, path_params)
+        try:
+            await limiter.acquire(tenant)
+        except Rejected as e:
+            logger.warning("admission_rejected", route=limiter.route, tenant=tenant, reason=e.reason)
+            await _send_rejection(send, e)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(tenant, time.perf_counter() - started)
+
+
+async def _send_rejection(send, rejection: Rejected) -> None:
+    detail = "Too many requests for this application" if rejection.status_code == 429 else "Server busy, try again shortly"
+    body = json.dumps({"detail": detail, "reason": rejection.reason}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": rejection.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(rejection.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
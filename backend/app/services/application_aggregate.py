@@ -0,0 +1,141 @@
+"""
+Loads an application with its materials and evidence (including each evidence's
+ordered materials) in a fixed number of queries, for the Stage 3 and Stage 4 views.
+Applications that live in the in-memory stores get the same shape from those.
+"""
+
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.models.models import Application, Evidence, EvidenceMaterial
+
+
+def load_application_aggregate(db: Session, application_id) -> Optional[Application]:
+    """
+    Load the full application graph eagerly.
+    Issues four queries regardless of size: the application, its materials,
+    its evidence, and the evidence-material links joined to their materials.
+    """
+    statement = (
+        select(Application)
+        .where(Application.id == application_id)
+        .options(
+            selectinload(Application.materials),
+            selectinload(Application.evidence)
+            .selectinload(Evidence.evidence_materials)
+            .joinedload(EvidenceMaterial.material),
+        )
+    )
+    return db.execute(statement).scalars().first()
+
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def serialize_aggregate(application: Application) -> Dict:
+    """Convert a loaded aggregate to the API response shape."""
+    return {
+        "id": str(application.id),
+        "pathType": _enum_value(application.path_type),
+        "currentStage": application.current_stage,
+        "recommendationData": application.recommendation_data,
+        "materials": [
+            {
+                "id": str(material.id),
+                "fileName": material.file_name,
+                "filePath": material.file_path,
+                "fileType": material.file_type,
+                "fileSize": material.file_size,
+                "uploadDate": _isoformat(material.upload_date),
+                "title": material.title,
+                "materialType": material.material_type,
+                "suggestedStandard": _enum_value(material.suggested_standard),
+                "strengthRating": material.strength_rating,
+                "classificationData": material.classification_data,
+            }
+            for material in application.materials
+        ],
+        "evidence": [
+            {
+                "id": str(evidence.id),
+                "evidenceNumber": evidence.evidence_number,
+                "standardType": _enum_value(evidence.standard_type),
+                "evidenceType": evidence.evidence_type,
+                "title": evidence.title,
+                "pageCount": evidence.page_count,
+                "pdfPath": evidence.pdf_path,
+                "status": _enum_value(evidence.status),
+                "materials": [
+                    {
+                        "materialId": str(link.material_id),
+                        "fileName": link.material.file_name,
+                        "pageRange": link.page_range,
+                        "order": link.order,
+                    }
+                    for link in evidence.evidence_materials
+                ],
+            }
+            for evidence in sorted(
+                application.evidence,
+                key=lambda ev: (_enum_value(ev.standard_type), ev.evidence_number),
+            )
+        ],
+    }
+
+
+MATERIAL_FIELDS = [
+    "id", "fileName", "filePath", "fileType", "fileSize", "uploadDate", "title",
+    "materialType", "suggestedStandard", "strengthRating", "classificationData",
+]
+
+
+def build_memory_aggregate(
+    application_id: str, materials: Iterable[Dict], evidences: Iterable[Dict], current_stage: int
+) -> Dict:
+    """
+    The aggregate for an application held in the in-memory stores, shaped like
+    serialize_aggregate. Evidence is numbered per standard in creation order.
+    """
+    materials = [m for m in materials if m.get("applicationId") == application_id]
+    file_names = {m["id"]: m.get("fileName") for m in materials}
+    evidences = sorted(
+        (ev for ev in evidences if ev.get("applicationId") == application_id),
+        key=lambda ev: (ev.get("standard") or "", ev.get("createdAt") or "", ev["id"]),
+    )
+    numbers: Dict[str, int] = {}
+    serialized = []
+    for evidence in evidences:
+        standard = evidence.get("standard")
+        numbers[standard] = numbers.get(standard, 0) + 1
+        serialized.append({
+            "id": evidence["id"],
+            "evidenceNumber": numbers[standard],
+            "standardType": standard,
+            "evidenceType": evidence.get("evidenceType"),
+            "title": evidence.get("title"),
+            "pageCount": evidence.get("pageCount"),
+            "pdfPath": evidence.get("pdfPath"),
+            "status": evidence.get("status"),
+            "materials": [
+                {
+                    "materialId": selection["materialId"],
+                    "fileName": file_names.get(selection["materialId"]),
+                    "pageRange": selection.get("pageRange"),
+                    "order": selection.get("order"),
+                }
+                for selection in sorted(evidence.get("materials", []), key=lambda s: s.get("order") or 0)
+            ],
+        })
+    return {
+        "id": application_id,
+        "pathType": None,
+        "currentStage": current_stage,
+        "recommendationData": None,
+        "materials": [{field: m.get(field) for field in MATERIAL_FIELDS} for m in materials],
+        "evidence": serialized,
+    }
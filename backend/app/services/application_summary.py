@@ -0,0 +1,129 @@
+"""
+Per-application dashboard summary, maintained incrementally.
+Each material or evidence write applies its delta to the summary in the same
+synchronous step as the write itself, so reading the dashboard is a single
+lookup no matter how much content the application holds.
+"""
+
+import threading
+from copy import deepcopy
+from datetime import datetime
+from typing import Dict
+
+STANDARDS = ["MC", "OC1", "OC2", "OC3"]
+
+
+def _empty_summary(application_id: str) -> Dict:
+    return {
+        "applicationId": application_id,
+        "materialCount": 0,
+        "materialsBySuggestedStandard": {standard: 0 for standard in STANDARDS},
+        "evidenceCount": 0,
+        "evidenceCountByStandard": {standard: 0 for standard in STANDARDS},
+        "totalPages": 0,
+        "strengthTotal": 0,
+        "strengthRatedCount": 0,
+        "averageStrength": None,
+        "currentStage": 1,
+        "updatedAt": None,
+    }
+
+
+def _current_stage(summary: Dict) -> int:
+    """Derive the workflow stage from the running counts."""
+    counts = summary["evidenceCountByStandard"]
+    if counts["MC"] >= 4 and sum(1 for key in ["OC1", "OC2", "OC3"] if counts[key] >= 3) >= 2:
+        return 4
+    if summary["evidenceCount"] > 0:
+        return 3
+    if summary["materialCount"] > 0:
+        return 2
+    return 1
+
+
+class ApplicationSummaryService:
+    """Keeps running totals per application, updated on every write."""
+
+    def __init__(self):
+        self._summaries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def has_application(self, application_id: str) -> bool:
+        """Whether any material or evidence has been stored for the application."""
+        return application_id in self._summaries
+
+    def get_summary(self, application_id: str) -> Dict:
+        """Return a copy of the current summary for an application."""
+        with self._lock:
+            summary = self._summaries.get(application_id) or _empty_summary(application_id)
+            return deepcopy(summary)
+
+    def _apply_material(self, material: Dict, sign: int) -> None:
+        summary = self._summaries.setdefault(
+            material["applicationId"], _empty_summary(material["applicationId"])
+        )
+        summary["materialCount"] += sign
+        standard = material.get("suggestedStandard")
+        if standard in summary["materialsBySuggestedStandard"]:
+            summary["materialsBySuggestedStandard"][standard] += sign
+        strength = material.get("strengthRating")
+        if strength is not None:
+            summary["strengthTotal"] += sign * strength
+            summary["strengthRatedCount"] += sign
+        self._finish(summary)
+
+    def _apply_evidence(self, evidence: Dict, sign: int) -> None:
+        summary = self._summaries.setdefault(
+            evidence["applicationId"], _empty_summary(evidence["applicationId"])
+        )
+        summary["evidenceCount"] += sign
+        standard = evidence.get("standard")
+        if standard in summary["evidenceCountByStandard"]:
+            summary["evidenceCountByStandard"][standard] += sign
+        summary["totalPages"] += sign * (evidence.get("pageCount") or 0)
+        self._finish(summary)
+
+    @staticmethod
+    def _finish(summary: Dict) -> None:
+        rated = summary["strengthRatedCount"]
+        summary["averageStrength"] = round(summary["strengthTotal"] / rated, 2) if rated else None
+        summary["currentStage"] = _current_stage(summary)
+        summary["updatedAt"] = datetime.utcnow().isoformat()
+
+    def material_added(self, material: Dict) -> None:
+        with self._lock:
+            self._apply_material(material, 1)
+
+    def material_removed(self, material: Dict) -> None:
+        with self._lock:
+            self._apply_material(material, -1)
+
+    def material_updated(self, before: Dict, after: Dict) -> None:
+        """
+        Replace a material's contribution (e.g., after classification or an edit).
+        Both deltas apply or neither does, so a bad value can't leave the totals half-updated.
+        """
+        with self._lock:
+            application_ids = {before["applicationId"], after["applicationId"]}
+            saved = {key: deepcopy(self._summaries[key]) for key in application_ids if key in self._summaries}
+            try:
+                self._apply_material(before, -1)
+                self._apply_material(after, 1)
+            except Exception:
+                for key in application_ids:
+                    if key in saved:
+                        self._summaries[key] = saved[key]
+                    else:
+                        self._summaries.pop(key, None)
+                raise
+
+    def evidence_added(self, evidence: Dict) -> None:
+        with self._lock:
+            self._apply_evidence(evidence, 1)
+
+    def evidence_removed(self, evidence: Dict) -> None:
+        with self._lock:
+            self._apply_evidence(evidence, -1)
+
+
+summary_service = ApplicationSummaryService()
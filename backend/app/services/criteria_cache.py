@@ -0,0 +1,111 @@
+"""
+Memoization of criteria matching results.
+Results are keyed by a canonical hash of the questionnaire answers and stored as
+pre-serialized JSON bytes, so repeat requests skip matching, pydantic validation
+and JSON encoding. The cached bytes must not echo the answers back, since
+equivalent answers share an entry. The cache is cleared whenever
+standard_definitions change.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+import orjson
+
+LIST_FIELDS = ("selectedRoles", "leadershipRoles", "achievements")
+
+
+def canonicalize_answers(answers: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize answers so equivalent questionnaires compare equal: list fields are
+    sorted and optional fields whose defaults don't change the result are made explicit.
+    """
+    canonical = dict(answers)
+    for field in LIST_FIELDS:
+        canonical[field] = sorted(canonical.get(field) or [])
+    # None and False are treated the same by the matcher
+    canonical["hasFinancialProof"] = bool(canonical.get("hasFinancialProof"))
+    return canonical
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class CriteriaMatchCache:
+    """Bounded LRU of serialized recommendations with hit-rate metrics."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._definitions_fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(
+        self,
+        answers: Dict[str, Any],
+        definitions_fingerprint: str,
+        compute: Callable[[Dict[str, Any]], bytes],
+    ) -> bytes:
+        """
+        Return serialized recommendation bytes for the answers, computing them on a miss.
+
+        Args:
+            answers: Validated questionnaire answers
+            definitions_fingerprint: Hash of the current standard definitions (a change clears the cache)
+            compute: Produces the serialized response from canonical answers
+        """
+        canonical = canonicalize_answers(answers)
+        key = _digest(canonical)
+        fingerprint = definitions_fingerprint
+
+        with self._lock:
+            if fingerprint != self._definitions_fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._definitions_fingerprint = fingerprint
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        value = compute(canonical)
+
+        with self._lock:
+            if fingerprint == self._definitions_fingerprint:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+match_cache = CriteriaMatchCache(maxsize=int(os.getenv("CRITERIA_CACHE_SIZE", "1024")))
@@ -4,8 +4,18 @@ Analyzes questionnaire answers and recommends the best application path and stan
 """
 
 from typing import Dict, List, Any
+import hashlib
+import json
 from app.schemas.schemas import QuestionnaireAnswers, RecommendationData, StandardRecommendation
 
+# Achievements that make each optional criterion worth recommending
+OC1_ACHIEVEMENTS = [
+    "Product Launch with Users/Revenue",
+    "Open Source Contributions",
+    "Technical Innovation",
+    "Tech Blog/Articles",
+]
+
 
 class CriteriaMatcher:
     """Matches user questionnaire answers to Tech Nation criteria and recommends application path."""
@@ -56,6 +66,37 @@ class CriteriaMatcher:
             }
         }
     
+    @property
+    def standard_definitions(self) -> Dict[str, Dict[str, Any]]:
+        return self._standard_definitions
+    
+    @standard_definitions.setter
+    def standard_definitions(self, definitions: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Load new definitions: hashed and turned into shared recommendation objects
+        once here, not on every match. Replace the dict to change them; editing it
+        in place is not picked up.
+        """
+        self._standard_definitions = definitions
+        self._fingerprint = hashlib.sha256(json.dumps(definitions, sort_keys=True).encode()).hexdigest()
+        self._build_recommendations()
+    
+    def definitions_fingerprint(self) -> str:
+        """Hash of the loaded standard_definitions (computed when they were loaded)."""
+        return self._fingerprint
+    
+    def _build_recommendations(self) -> None:
+        """Prebuild one immutable StandardRecommendation per standard, shared by all results."""
+        self._recommendations = {
+            standard: StandardRecommendation(
+                standardType=standard,
+                name=definition["name"],
+                recommendedEvidenceTypes=definition["evidence_types"],
+                description=definition["description"],
+            )
+            for standard, definition in self.standard_definitions.items()
+        }
+    
     def match_criteria(self, answers: Dict[str, Any]) -> RecommendationData:
         """
         Analyze questionnaire answers and generate recommendations.
@@ -87,6 +128,106 @@ class CriteriaMatcher:
             successProbability=success_probability
         )
     
+    def match_criteria_batch(self, answers_list: List[Dict[str, Any]]) -> List[RecommendationData]:
+        """
+        Analyze many questionnaires at once (e.g., for cohort what-if analysis).
+        Results are identical to calling match_criteria on each item.
+        """
+        return [
+            RecommendationData(
+                questionnaireAnswers=answers,
+                recommendedPath=path,
+                recommendedStandards={key: self._recommendations[key.upper()] for key in keys},
+                evidenceQuota=quota,
+                successProbability=probability,
+            )
+            for answers, (path, keys, quota, probability) in zip(answers_list, self._evaluate_batch(answers_list))
+        ]
+    
+    def match_criteria_batch_dicts(self, answers_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Same as match_criteria_batch, but returns JSON-ready dicts built from
+        pre-serialized standard recommendations, skipping model construction.
+        Answers must already be validated (e.g., QuestionnaireAnswers.model_dump()).
+        """
+        serialized = {
+            standard: recommendation.model_dump(mode="json")
+            for standard, recommendation in self._recommendations.items()
+        }
+        return [
+            {
+                "questionnaireAnswers": answers,
+                "recommendedPath": path,
+                "recommendedStandards": {key: serialized[key.upper()] for key in keys},
+                "evidenceQuota": quota,
+                "successProbability": probability,
+            }
+            for answers, (path, keys, quota, probability) in zip(answers_list, self._evaluate_batch(answers_list))
+        ]
+    
+    def _evaluate_batch(self, answers_list: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Encode answers into feature arrays and compute path, standards, quotas and
+        success probability for the whole batch with array operations.
+        Returns (path, standard keys, quota, probability) per item.
+        """
+        if not answers_list:
+            return []
+        import numpy as np
+
+        # Encode answers
+        experienced = np.array([a.get("yearsOfExperience", "") == "≥ 5 years" for a in answers_list])
+        achievement_sets = [a.get("achievements", []) for a in answers_list]
+        has_oc1_achievement = np.array([
+            any(ach in achievements for ach in OC1_ACHIEVEMENTS) for achievements in achievement_sets
+        ])
+        has_launch = np.array(["Product Launch with Users/Revenue" in achievements for achievements in achievement_sets])
+        has_innovation = np.array(["Technical Innovation" in achievements for achievements in achievement_sets])
+        achievement_count = np.array([len(achievements) for achievements in achievement_sets])
+        leadership_count = np.array([len(a.get("leadershipRoles", [])) for a in answers_list])
+        # hasFinancialProof defaults to True when choosing standards, but only counts when set for scoring
+        financial_for_standards = np.array([bool(a.get("hasFinancialProof", True)) for a in answers_list])
+        financial_for_score = np.array([bool(a.get("hasFinancialProof")) for a in answers_list])
+        
+        # Standards
+        oc1 = has_oc1_achievement.copy()
+        oc3 = financial_for_standards | has_launch
+        oc2 = has_innovation
+        neither = ~oc1 & ~oc3
+        oc1 |= neither
+        oc3 |= neither
+        
+        # Quotas: MC 4, each selected OC 3, optional quotas trimmed (not below 2) to keep the total at 10
+        quotas = {"oc1": oc1 * 3, "oc2": oc2 * 3, "oc3": oc3 * 3}
+        total = 4 + quotas["oc1"] + quotas["oc2"] + quotas["oc3"]
+        for key in ["oc1", "oc2", "oc3"]:
+            trim = (quotas[key] > 2) & (total > 10)
+            quotas[key] = quotas[key] - trim
+            total = total - trim
+        
+        # Success probability
+        score = np.full(len(answers_list), 50)
+        score += np.where(experienced, 10, 0)
+        score += np.select([leadership_count >= 2, leadership_count == 1], [15, 8], 0)
+        score += np.select([achievement_count >= 5, achievement_count >= 3, achievement_count >= 1], [15, 10, 5], 0)
+        score += np.where(financial_for_score, 10, 0)
+        score += np.where(1 + oc1.astype(int) + oc2 + oc3 >= 3, 5, 0)
+        score = np.minimum(score, 95)
+        
+        # Same standard order as _determine_standards: mc, oc1, oc3, oc2
+        selected = np.stack([oc1, oc3, oc2], axis=1).tolist()
+        oc1_quota, oc2_quota, oc3_quota = quotas["oc1"].tolist(), quotas["oc2"].tolist(), quotas["oc3"].tolist()
+        totals, scores, experienced = total.tolist(), score.tolist(), experienced.tolist()
+        return [
+            (
+                "ExceptionalTalent" if experienced[i] else "ExceptionalPromise",
+                ["mc"] + [key for key, flag in zip(["oc1", "oc3", "oc2"], selected[i]) if flag],
+                {"mc": 4, "oc1": oc1_quota[i], "oc2": oc2_quota[i], "oc3": oc3_quota[i], "total": totals[i]},
+                scores[i],
+            )
+            for i in range(len(answers_list))
+        ]
+    
     def _determine_standards(
         self, 
         answers: Dict[str, Any], 
@@ -96,63 +237,28 @@ class CriteriaMatcher:
         standards = {}
         
         # MC is always required
-        standards["mc"] = StandardRecommendation(
-            standardType="MC",
-            name=self.standard_definitions["MC"]["name"],
-            recommendedEvidenceTypes=self.standard_definitions["MC"]["evidence_types"],
-            description=self.standard_definitions["MC"]["description"]
-        )
+        standards["mc"] = self._recommendations["MC"]
         
         achievements = answers.get("achievements", [])
         has_financial = answers.get("hasFinancialProof", True)
         role_type = answers.get("roleType", "")
         
         # Recommend OC1 if user has product/technical contributions
-        if any(ach in achievements for ach in [
-            "Product Launch with Users/Revenue",
-            "Open Source Contributions",
-            "Technical Innovation",
-            "Tech Blog/Articles"
-        ]):
-            standards["oc1"] = StandardRecommendation(
-                standardType="OC1",
-                name=self.standard_definitions["OC1"]["name"],
-                recommendedEvidenceTypes=self.standard_definitions["OC1"]["evidence_types"],
-                description=self.standard_definitions["OC1"]["description"]
-            )
+        if any(ach in achievements for ach in OC1_ACHIEVEMENTS):
+            standards["oc1"] = self._recommendations["OC1"]
         
         # Recommend OC3 if user has financial proof or commercial success
         if has_financial or "Product Launch with Users/Revenue" in achievements:
-            standards["oc3"] = StandardRecommendation(
-                standardType="OC3",
-                name=self.standard_definitions["OC3"]["name"],
-                recommendedEvidenceTypes=self.standard_definitions["OC3"]["evidence_types"],
-                description=self.standard_definitions["OC3"]["description"]
-            )
+            standards["oc3"] = self._recommendations["OC3"]
         
         # Recommend OC2 if user has patents or innovation achievements
         if "Technical Innovation" in achievements:
-            standards["oc2"] = StandardRecommendation(
-                standardType="OC2",
-                name=self.standard_definitions["OC2"]["name"],
-                recommendedEvidenceTypes=self.standard_definitions["OC2"]["evidence_types"],
-                description=self.standard_definitions["OC2"]["description"]
-            )
+            standards["oc2"] = self._recommendations["OC2"]
         
         # Default to OC1 and OC3 if no specific matches
         if "oc1" not in standards and "oc3" not in standards:
-            standards["oc1"] = StandardRecommendation(
-                standardType="OC1",
-                name=self.standard_definitions["OC1"]["name"],
-                recommendedEvidenceTypes=self.standard_definitions["OC1"]["evidence_types"],
-                description=self.standard_definitions["OC1"]["description"]
-            )
-            standards["oc3"] = StandardRecommendation(
-                standardType="OC3",
-                name=self.standard_definitions["OC3"]["name"],
-                recommendedEvidenceTypes=self.standard_definitions["OC3"]["evidence_types"],
-                description=self.standard_definitions["OC3"]["description"]
-            )
+            standards["oc1"] = self._recommendations["OC1"]
+            standards["oc3"] = self._recommendations["OC3"]
         
         return standards
     
@@ -0,0 +1,193 @@
+"""
+Local document classifier.
+Scores material text against the evidence types of each standard in
+CriteriaMatcher.standard_definitions using hashed TF-IDF features and a linear
+model, computed with NumPy over a whole batch at once. Runs on CPU with no network.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.services.criteria_matcher import CriteriaMatcher
+
+# Bump whenever features, weights or labels change, so cached results are recomputed
+CLASSIFIER_VERSION = "local-tfidf-1"
+
+N_FEATURES = 2 ** 15
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9]+")
+
+# Extra vocabulary per standard, added to every evidence type of that standard
+STANDARD_KEYWORDS = {
+    "MC": "salary bonus equity compensation payslip offer letter promotion performance review "
+          "leadership team lead head director manager org chart award keynote speaker media interview",
+    "OC1": "users metrics adoption product launch architecture design document open source github "
+           "pull request commits stars maintainer publication article blog impact",
+    "OC2": "patent invention innovation novel research paper publication prior art granted filed "
+           "algorithm prototype breakthrough",
+    "OC3": "revenue profit funding investment contract customers commercial growth market share "
+           "arr mrr sales financial statement partner support letter",
+}
+
+# Per evidence type vocabulary, matched by substring of the evidence type label
+EVIDENCE_TYPE_KEYWORDS = {
+    "Career progression": "promotion performance evaluation review rating salary bonus raise",
+    "Industry recognition": "award media coverage interview keynote speaker press article",
+    "Leadership impact": "team charter scope responsibility reports headcount manager lead",
+    "Product Metrics": "users monthly active dau mau retention revenue growth dashboard",
+    "Open Source": "github repository stars forks pull request commits maintainer contributor",
+    "Financial Data": "revenue funding raised investment series valuation arr profit",
+    "Business Contracts": "contract agreement signed parties client customer terms",
+    "Patents": "patent application granted claims inventor filed",
+}
+
+STRENGTH_THRESHOLDS = np.array([0.05, 0.10, 0.18, 0.28])
+
+
+def _tokens(text: str) -> List[str]:
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def _hash_tokens(text: str) -> np.ndarray:
+    """Feature indices of a text's unigrams and bigrams (stable across processes)."""
+    tokens = _tokens(text)
+    return np.fromiter(
+        (zlib.crc32(token.encode()) % N_FEATURES for token in tokens),
+        dtype=np.int64,
+        count=len(tokens),
+    )
+
+
+def _term_frequencies(texts: List[str]) -> np.ndarray:
+    """Sublinear term-frequency matrix (texts x features)."""
+    matrix = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+    for row, text in enumerate(texts):
+        indices = _hash_tokens(text)
+        if indices.size:
+            np.add.at(matrix[row], indices, 1.0)
+    np.log1p(matrix, out=matrix)
+    return matrix
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _short_label(evidence_type: str) -> str:
+    return evidence_type.split(" (")[0].strip()
+
+
+class DocumentClassifier:
+    """Linear TF-IDF classifier over the evidence types of each standard."""
+
+    def __init__(self, standard_definitions: Optional[Dict] = None):
+        definitions = standard_definitions or CriteriaMatcher().standard_definitions
+        self.labels: List[Tuple[str, str]] = []
+        prototypes = []
+        for standard, definition in definitions.items():
+            for evidence_type in definition["evidence_types"]:
+                extra = " ".join(
+                    words for key, words in EVIDENCE_TYPE_KEYWORDS.items() if key in evidence_type
+                )
+                prototypes.append(" ".join([
+                    evidence_type, evidence_type, extra,
+                    definition["name"], definition["description"],
+                    STANDARD_KEYWORDS.get(standard, ""),
+                ]))
+                self.labels.append((standard, evidence_type))
+
+        self.standards = list(definitions.keys())
+        self._label_standard = np.array(
+            [self.standards.index(standard) for standard, _ in self.labels]
+        )
+
+        tf = _term_frequencies(prototypes)
+        document_frequency = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1 + len(prototypes)) / (1 + document_frequency)) + 1).astype(np.float32)
+        # One weight vector per (standard, evidence type)
+        self.weights = _normalize_rows(tf * self.idf)
+
+    def scores(self, texts: List[str]) -> np.ndarray:
+        """Cosine scores of each text against each label (texts x labels)."""
+        features = _normalize_rows(_term_frequencies(texts) * self.idf)
+        return features @ self.weights.T
+
+    def classify_batch(self, texts: List[str]) -> List[Dict]:
+        """Classify a batch of document texts in one pass."""
+        if not texts:
+            return []
+        label_scores = self.scores(texts)
+
+        # Standard score = best evidence type within that standard
+        standard_scores = np.full((len(texts), len(self.standards)), -1.0, dtype=np.float32)
+        for index in range(len(self.standards)):
+            standard_scores[:, index] = label_scores[:, self._label_standard == index].max(axis=1)
+
+        best_labels = label_scores.argmax(axis=1)
+        best_scores = label_scores[np.arange(len(texts)), best_labels]
+        strengths = 1 + np.searchsorted(STRENGTH_THRESHOLDS, best_scores)
+
+        results = []
+        for row, text in enumerate(texts):
+            standard, evidence_type = self.labels[best_labels[row]]
+            has_text = bool(text.strip())
+            file_type = _short_label(evidence_type) if has_text and best_scores[row] > 0 else "General Document"
+            results.append({
+                "recommendedStandard": standard if has_text else "MC",
+                "fileType": file_type,
+                "strengthRating": int(strengths[row]) if has_text else 1,
+                "aiAnalysis": self._analysis(standard, file_type, float(best_scores[row]), has_text),
+                "scores": {
+                    name: round(float(standard_scores[row, index]), 4)
+                    for index, name in enumerate(self.standards)
+                },
+                "classifierVersion": CLASSIFIER_VERSION,
+            })
+        return results
+
+    def classify(self, text: str) -> Dict:
+        return self.classify_batch([text])[0]
+
+    @staticmethod
+    def _analysis(standard: str, file_type: str, score: float, has_text: bool) -> str:
+        if not has_text:
+            return "No readable text found. Add a description or upload a text-based PDF for a better suggestion."
+        if score < STRENGTH_THRESHOLDS[0]:
+            return "General supporting document. Consider pairing with stronger, more specific evidence."
+        return f"Content reads as {file_type.lower()}, which best supports {standard}."
+
+
+_classifier = None
+
+
+def get_classifier() -> DocumentClassifier:
+    """Return the process-wide classifier, building it on first use."""
+    global _classifier
+    if _classifier is None:
+        _classifier = DocumentClassifier()
+    return _classifier
+
+
+def classify_documents(documents: List[Tuple[Optional[str], Optional[str], Optional[str], str]]) -> List[Dict]:
+    """
+    Classify a batch of materials. Runs in a worker process.
+    Page text is read from the extraction store (extracted now if it is missing).
+
+    Args:
+        documents: (content hash, file type, file name, extra text such as the title) per material
+    """
+    from app.services.text_extraction import load_or_extract_pages
+
+    texts = []
+    for digest, file_type, file_name, extra_text in documents:
+        pages = []
+        if digest is not None:
+            try:
+                pages = load_or_extract_pages(digest, file_type, file_name)
+            except Exception:
+                pages = []
+        texts.append(" ".join([extra_text] + pages))
+    return get_classifier().classify_batch(texts)
@@ -3,10 +3,16 @@ Service for identifying entities (events, products, organizations, programs)
 in text and enriching them with background information.
 """
 
+import os
 import re
 from typing import List, Dict, Optional
-import requests
 from urllib.parse import quote
+from app.services.telemetry import ENRICHMENT_LOOKUPS, get_logger, span
+
+logger = get_logger(__name__)
+
+# Overridable so load tests can point enrichment at a local stub
+WIKIPEDIA_SUMMARY_URL = os.getenv("WIKIPEDIA_SUMMARY_URL", "https://en.wikipedia.org/api/rest_v1/page/summary/")
 
 
 class EntityEnrichmentService:
@@ -83,9 +89,11 @@ class EntityEnrichmentService:
         Search Wikipedia for background information about an entity.
         Returns a brief summary if found.
         """
+        import requests
+
         try:
             # Wikipedia API endpoint
-            url = "https://en.wikipedia.org/api/rest_v1/page/summary/" + quote(entity)
+            url = WIKIPEDIA_SUMMARY_URL + quote(entity)
             # Use shorter timeout to avoid blocking
             response = requests.get(url, timeout=2)
             
@@ -94,13 +102,18 @@ class EntityEnrichmentService:
                 extract = data.get("extract", "")
                 # Limit to first 200 characters for brevity
                 if extract:
+                    ENRICHMENT_LOOKUPS.inc(result="hit")
                     return extract[:200] + "..." if len(extract) > 200 else extract
+            ENRICHMENT_LOOKUPS.inc(result="miss")
         except requests.exceptions.Timeout:
-            print(f"Wikipedia API timeout for {entity}")
+            ENRICHMENT_LOOKUPS.inc(result="timeout")
+            logger.warning("wikipedia_timeout", entity=entity)
         except requests.exceptions.RequestException as e:
-            print(f"Error searching Wikipedia for {entity}: {e}")
+            ENRICHMENT_LOOKUPS.inc(result="error")
+            logger.warning("wikipedia_error", entity=entity, error=str(e))
         except Exception as e:
-            print(f"Unexpected error searching Wikipedia for {entity}: {e}")
+            ENRICHMENT_LOOKUPS.inc(result="error")
+            logger.error("wikipedia_unexpected_error", entity=entity, error=str(e))
         
         return None
 
@@ -125,7 +138,8 @@ class EntityEnrichmentService:
         # Limit to 2 entities max to ensure fast response
         for entity_type, entity_name in all_entities[:2]:
             try:
-                background = EntityEnrichmentService.search_wikipedia(entity_name)
+                with span("enrichment.lookup", entity_type=entity_type):
+                    background = EntityEnrichmentService.search_wikipedia(entity_name)
                 if background:
                     background_info.append({
                         "entity": entity_name,
@@ -137,7 +151,7 @@ class EntityEnrichmentService:
                         f"\n\n[Background: {entity_name}] {background}"
                     )
             except Exception as e:
-                print(f"Error processing entity {entity_name}: {e}")
+                logger.error("enrichment_entity_error", entity=entity_name, error=str(e))
                 continue  # Skip this entity and continue - don't fail the whole request
         
         # Combine original text with enriched sections
@@ -0,0 +1,238 @@
+"""
+Automatic evidence assembly.
+Assigns an application's classified PDF materials to evidence files under the
+evidence quota, the 3-page limit per file and the no-reuse rule.
+
+Solved in two stages, each optimal on its own (the pair is not a joint optimum):
+each evidence file gets a primary material from a maximum-strength assignment
+(Hungarian algorithm over slots x materials); then, with the primaries fixed,
+the page budget left in each standard's files is packed with the unused
+supporting materials of that standard that add the most strength.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.services.text_extraction import is_pdf
+
+PAGE_LIMIT = 3
+STANDARD_KEYS = {"MC": "mc", "OC1": "oc1", "OC2": "oc2", "OC3": "oc3"}
+DEFAULT_STRENGTH = 1
+# Unclassified materials may fill any standard, at a discount
+UNCLASSIFIED_WEIGHT = 0.5
+TIE_BREAK_PER_FREE_PAGE = 0.01
+_INFEASIBLE = 1e9
+
+
+def max_weight_assignment(weights: np.ndarray) -> List[Optional[int]]:
+    """
+    Maximum-weight assignment of rows to distinct columns (rows <= columns).
+    Hungarian algorithm with potentials, O(rows^2 * columns), inner loop vectorized.
+    Entries of -inf are forbidden; rows that can only take forbidden columns get None.
+    """
+    n, m = weights.shape
+    if n == 0:
+        return []
+    # Dummy columns let a row stay empty rather than take a forbidden column
+    cost = np.hstack([
+        np.where(np.isneginf(weights), _INFEASIBLE, -weights),
+        np.zeros((n, n)),
+    ])
+    m_total = m + n
+    u = np.zeros(n + 1)
+    v = np.zeros(m_total + 1)
+    assigned_row = np.zeros(m_total + 1, dtype=int)  # 1-based row per column, 0 = free
+    way = np.zeros(m_total + 1, dtype=int)
+
+    for row in range(1, n + 1):
+        assigned_row[0] = row
+        column = 0
+        min_slack = np.full(m_total + 1, np.inf)
+        used = np.zeros(m_total + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = assigned_row[column]
+            slack = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improve = free & (slack < min_slack[1:])
+            min_slack[1:][improve] = slack[improve]
+            way[1:][improve] = column
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+
+            used_columns = np.flatnonzero(used)
+            u[assigned_row[used_columns]] += delta
+            v[used_columns] -= delta
+            min_slack[1:][free] -= delta
+
+            column = next_column
+            if assigned_row[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            assigned_row[column] = assigned_row[previous]
+            column = previous
+
+    result: List[Optional[int]] = [None] * n
+    for column in range(1, m + 1):
+        row = assigned_row[column]
+        if row and not np.isneginf(weights[row - 1, column - 1]):
+            result[row - 1] = column - 1
+    return result
+
+
+def _pages_used(material: Dict) -> Tuple[int, Optional[str]]:
+    """Pages a material contributes, trimming long documents to the page limit."""
+    pages = max(1, material.get("pageCount") or 1)
+    if pages > PAGE_LIMIT:
+        return PAGE_LIMIT, f"1-{PAGE_LIMIT}"
+    return pages, None
+
+
+def _dedupe(materials: List[Dict]) -> List[Dict]:
+    """Keep the strongest material of each set of uploads with identical content."""
+    best: Dict[str, Dict] = {}
+    for material in materials:
+        group = material.get("contentHash") or material["id"]
+        current = best.get(group)
+        strength = material.get("strengthRating") or DEFAULT_STRENGTH
+        if current is None or strength > (current.get("strengthRating") or DEFAULT_STRENGTH):
+            best[group] = material
+    return list(best.values())
+
+
+def _pack_supporting(
+    capacities: List[int], sizes: List[int], strengths: List[float]
+) -> List[Optional[int]]:
+    """
+    Place items (1 or 2 pages) into files with 1 or 2 free pages, maximizing the
+    strength placed. Returns the file index for each item, or None if left out.
+
+    Size-1 items fit anywhere and a 2-page gap holds two of them, so for each
+    count j of 2-page items (the strongest j, one per 2-page gap) the best choice
+    is the strongest size-1 items that fill the remaining pages; try every j.
+    """
+    ones = sorted((i for i, size in enumerate(sizes) if size == 1), key=lambda i: -strengths[i])
+    twos = sorted((i for i, size in enumerate(sizes) if size == 2), key=lambda i: -strengths[i])
+    gaps_of_two = [f for f, capacity in enumerate(capacities) if capacity == 2]
+    gaps_of_one = [f for f, capacity in enumerate(capacities) if capacity == 1]
+
+    best_count, best_strength = 0, -1.0
+    for count in range(min(len(twos), len(gaps_of_two)) + 1):
+        free_pages = len(gaps_of_one) + 2 * (len(gaps_of_two) - count)
+        strength = sum(strengths[i] for i in twos[:count]) + sum(strengths[i] for i in ones[:free_pages])
+        if strength > best_strength:
+            best_count, best_strength = count, strength
+
+    placement: List[Optional[int]] = [None] * len(sizes)
+    for item, file in zip(twos[:best_count], gaps_of_two):
+        placement[item] = file
+    # Remaining single pages: each 1-page gap once, each unused 2-page gap twice
+    pages = gaps_of_one + [f for f in gaps_of_two[best_count:] for _ in range(2)]
+    for item, file in zip(ones, pages):
+        placement[item] = file
+    return placement
+
+
+def default_quota(materials: List[Dict]) -> Dict[str, int]:
+    """MC 4 plus 3 each for the two optional criteria with the most suggested materials."""
+    counts = {key: 0 for key in ["oc1", "oc2", "oc3"]}
+    for material in materials:
+        key = STANDARD_KEYS.get(material.get("suggestedStandard"))
+        if key in counts:
+            counts[key] += 1
+    top_two = sorted(counts, key=lambda key: (-counts[key], key))[:2]
+    return {"mc": 4, **{key: (3 if key in top_two else 0) for key in counts}}
+
+
+def solve_evidence_assembly(materials: List[Dict], quota: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    Assign materials to evidence files.
+
+    Args:
+        materials: Material dicts (id, fileType, fileName, suggestedStandard,
+            strengthRating, pageCount, contentHash); only PDFs are assigned
+        quota: Evidence files per standard, e.g. {"mc": 4, "oc1": 3, "oc2": 0, "oc3": 3}
+
+    Returns:
+        Evidence files with ordered material selections, unused material ids, and totals
+    """
+    # Only PDFs can be assembled into evidence files
+    candidates = _dedupe([m for m in materials if is_pdf(m.get("fileType"), m.get("fileName"))])
+    quota = quota or default_quota(candidates)
+    slots = [
+        standard
+        for standard, key in STANDARD_KEYS.items()
+        for _ in range(quota.get(key, 0))
+    ]
+
+    strengths = np.array(
+        [material.get("strengthRating") or DEFAULT_STRENGTH for material in candidates], dtype=float
+    )
+    suggested = np.array([material.get("suggestedStandard") or "" for material in candidates])
+    pages = np.array([_pages_used(material)[0] for material in candidates])
+
+    # Slot x material value: full strength for the suggested standard, discounted when unclassified
+    value = np.full((len(slots), len(candidates)), -np.inf)
+    for row, standard in enumerate(slots):
+        value[row, suggested == standard] = strengths[suggested == standard]
+        value[row, suggested == ""] = strengths[suggested == ""] * UNCLASSIFIED_WEIGHT
+    # Between equally strong materials, prefer shorter ones to leave room for supporting material
+    weights = value + TIE_BREAK_PER_FREE_PAGE * (PAGE_LIMIT - pages)
+    primary = max_weight_assignment(weights) if candidates else [None] * len(slots)
+
+    used = {index for index in primary if index is not None}
+    evidence_files = []
+    numbers = {standard: 0 for standard in STANDARD_KEYS}
+    for row, standard in enumerate(slots):
+        numbers[standard] += 1
+        file = {
+            "standard": standard,
+            "evidenceNumber": numbers[standard],
+            "materials": [],
+            "pageCount": 0,
+            "strength": 0.0,
+        }
+        if primary[row] is not None:
+            index = primary[row]
+            page_count, page_range = _pages_used(candidates[index])
+            file["materials"].append({"materialId": candidates[index]["id"], "pageRange": page_range, "order": 1})
+            file["pageCount"] = page_count
+            file["strength"] = float(value[row, index])
+        evidence_files.append(file)
+
+    # Pack leftover page budget with unused materials of the same standard. A primary
+    # takes at least one page, so gaps are 1-2 pages and only 1-2 page materials fit.
+    for standard in STANDARD_KEYS:
+        files = [file for file in evidence_files if file["standard"] == standard and file["materials"]]
+        items = [
+            index for index in range(len(candidates))
+            if index not in used and suggested[index] == standard and pages[index] < PAGE_LIMIT
+        ]
+        placement = _pack_supporting(
+            [PAGE_LIMIT - file["pageCount"] for file in files],
+            [int(pages[index]) for index in items],
+            [float(strengths[index]) for index in items],
+        )
+        for index, position in zip(items, placement):
+            if position is None:
+                continue
+            file = files[position]
+            file["materials"].append({
+                "materialId": candidates[index]["id"],
+                "pageRange": None,
+                "order": len(file["materials"]) + 1,
+            })
+            file["pageCount"] += int(pages[index])
+            file["strength"] += float(strengths[index])
+            used.add(index)
+
+    assigned_ids = {selection["materialId"] for file in evidence_files for selection in file["materials"]}
+    return {
+        "quota": quota,
+        "evidence": evidence_files,
+        "unfilledSlots": sum(1 for file in evidence_files if not file["materials"]),
+        "unusedMaterialIds": [m["id"] for m in materials if m["id"] not in assigned_ids],
+        "totalStrength": round(sum(file["strength"] for file in evidence_files), 2),
+    }
@@ -0,0 +1,240 @@
+"""
+Fonts for the PDF renderer.
+Text is drawn in built-in Helvetica wherever it can be (nothing to embed) and
+falls back per run of characters: to a Unicode TrueType font for other Latin,
+Greek and Cyrillic text, and for Chinese, Japanese and Korean to a CJK TrueType
+font when one is installed or else to Adobe's standard CJK fonts (referenced by
+name, not embedded). TrueType fonts are parsed once per process, in the
+background at startup, and reportlab embeds only the glyphs a document uses.
+Glyph widths are cached per font chain so wrapping text doesn't go back to the
+font tables for every measurement.
+"""
+
+import asyncio
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from app.services.telemetry import get_logger
+
+logger = get_logger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Searched in order; PDF_FONT_DIRS (os.pathsep-separated) is checked after backend/fonts
+FONT_DIRS = [
+    os.path.join(BACKEND_DIR, "fonts"),
+    *[d for d in os.getenv("PDF_FONT_DIRS", "").split(os.pathsep) if d],
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+]
+
+# First file found wins. reportlab reads TrueType outlines only (.ttf/.ttc), not CFF-based .otf
+UNICODE_FONT_FILES = ["NotoSans-Regular.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf", "FreeSans.ttf"]
+UNICODE_BOLD_FONT_FILES = ["NotoSans-Bold.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "FreeSansBold.ttf"]
+CJK_FONT_FILES = ["wqy-microhei.ttc", "wqy-zenhei.ttc", "DroidSansFallbackFull.ttf", "DroidSansFallback.ttf"]
+
+# Adobe CJK fonts every PDF viewer supplies, by the script they cover
+HANGUL = re.compile(r"[\u1100-\u11ff\u3130-\u318f\uac00-\ud7af]")
+HAN_KANA = re.compile(r"[\u2e80-\u2fff\u3000-\u30ff\u3190-\u9fff\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef]")
+
+# Line-breaking tokens: each CJK character on its own, otherwise a word with its trailing space
+TOKEN = re.compile(r"[\u1100-\u11ff\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]|[^\s\u1100-\u11ff\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]+\s*|\s+")
+
+
+class Font:
+    """A registered font: its reportlab name, which characters it has, and their widths."""
+
+    __slots__ = ("name", "covers", "char_width")
+
+    def __init__(self, name: str, covers: Callable[[str], bool], char_width: Callable[[str], float]):
+        self.name = name
+        self.covers = covers
+        # Advance width of one character, in thousandths of the font size
+        self.char_width = char_width
+
+
+class FontChain:
+    """Fonts tried in order for each character; the first one with a glyph draws it."""
+
+    def __init__(self, fonts: List[Font]):
+        self.fonts = fonts
+        self._choice: Dict[str, Font] = {}
+        self._widths: Dict[str, float] = {}
+
+    def font_for(self, char: str) -> Font:
+        font = self._choice.get(char)
+        if font is None:
+            # Characters no font has are left to the primary font's missing-glyph box
+            font = next((f for f in self.fonts if f.covers(char)), self.fonts[0])
+            self._choice[char] = font
+        return font
+
+    def char_width(self, char: str) -> float:
+        width = self._widths.get(char)
+        if width is None:
+            width = self._widths[char] = self.font_for(char).char_width(char)
+        return width
+
+    def width(self, text: str, size: float) -> float:
+        return sum(self.char_width(char) for char in text) * size / 1000
+
+    def runs(self, text: str) -> List[Tuple[Font, str]]:
+        """Split text into runs of consecutive characters drawn with the same font."""
+        runs: List[Tuple[Font, str]] = []
+        for char in text:
+            font = self.font_for(char)
+            if runs and runs[-1][0] is font:
+                runs[-1] = (font, runs[-1][1] + char)
+            else:
+                runs.append((font, char))
+        return runs
+
+    def draw(self, canvas, x: float, y: float, text: str, size: float) -> float:
+        """Draw a line of text, switching fonts per run. Returns the x after the text."""
+        for font, run in self.runs(text):
+            canvas.setFont(font.name, size)
+            canvas.drawString(x, y, run)
+            x += self.width(run, size)
+        return x
+
+    def wrap(self, text: str, size: float, max_width: float) -> List[str]:
+        """
+        Break text into lines no wider than max_width. Lines break at spaces and
+        between CJK characters; a word longer than a line is split anywhere.
+        """
+        lines: List[str] = []
+        line, line_width = "", 0.0
+        for token in TOKEN.findall(" ".join(text.split())):
+            token_width = self.width(token, size)
+            if line and line_width + self.width(token.rstrip(), size) > max_width:
+                lines.append(line.rstrip())
+                line, line_width = "", 0.0
+            if not line and token_width > max_width:
+                for char in token:
+                    char_width = self.width(char, size)
+                    if line and line_width + char_width > max_width:
+                        lines.append(line.rstrip())
+                        line, line_width = "", 0.0
+                    line += char
+                    line_width += char_width
+                continue
+            line += token
+            line_width += token_width
+        if line.strip():
+            lines.append(line.rstrip())
+        return lines
+
+
+def _find_font_file(names: List[str]) -> Optional[str]:
+    wanted = {name.lower(): index for index, name in enumerate(names)}
+    best: Optional[Tuple[int, str]] = None
+    for directory in FONT_DIRS:
+        if not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                rank = wanted.get(file_name.lower())
+                if rank is not None and (best is None or rank < best[0]):
+                    best = (rank, os.path.join(root, file_name))
+        if best is not None:
+            return best[1]
+    return None
+
+
+def _standard_font(name: str) -> Font:
+    from reportlab.pdfbase import pdfmetrics
+
+    metrics = pdfmetrics.getFont(name)
+
+    def covers(char: str) -> bool:
+        # Built-in fonts are drawn with WinAnsi encoding
+        try:
+            char.encode("cp1252")
+        except UnicodeEncodeError:
+            return False
+        return char.isprintable()
+
+    return Font(name, covers, lambda char: metrics.stringWidth(char, 1000))
+
+
+def _truetype_font(name: str, path: str) -> Font:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font = TTFont(name, path)
+    pdfmetrics.registerFont(font)
+    face = font.face
+    return Font(
+        name,
+        lambda char: ord(char) in face.charToGlyph,
+        lambda char: face.charWidths.get(ord(char), face.defaultWidth),
+    )
+
+
+def _cid_font(name: str, script) -> Font:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    font = UnicodeCIDFont(name)
+    pdfmetrics.registerFont(font)
+    return Font(name, lambda char: script.match(char) is not None, lambda char: font.stringWidth(char, 1000))
+
+
+def _load_truetype(name: str, files: List[str]) -> Optional[Font]:
+    path = _find_font_file(files)
+    if path is None:
+        return None
+    try:
+        return _truetype_font(name, path)
+    except Exception as e:
+        logger.warning("font_load_failed", font=name, path=path, error=str(e))
+        return None
+
+
+def build_font_chains() -> Dict[str, FontChain]:
+    """Register the renderer's fonts with reportlab and return the regular and bold chains."""
+    unicode_regular = _load_truetype("UnicodeSans", UNICODE_FONT_FILES)
+    unicode_bold = _load_truetype("UnicodeSans-Bold", UNICODE_BOLD_FONT_FILES) or unicode_regular
+    cjk = _load_truetype("UnicodeCJK", CJK_FONT_FILES)
+    cid = [_cid_font("STSong-Light", HAN_KANA), _cid_font("HYSMyeongJo-Medium", HANGUL)]
+
+    def chain(primary: str, unicode_font: Optional[Font]) -> FontChain:
+        fonts = [_standard_font(primary)]
+        fonts += [f for f in (unicode_font, cjk) if f is not None]
+        return FontChain(fonts + cid)
+
+    logger.info(
+        "fonts_registered",
+        unicode=unicode_regular is not None,
+        unicode_bold=unicode_bold is not unicode_regular,
+        cjk_truetype=cjk is not None,
+    )
+    return {
+        "regular": chain("Helvetica", unicode_regular),
+        "bold": chain("Helvetica-Bold", unicode_bold),
+    }
+
+
+class FontRegistry:
+    """Builds the font chains once per process; started in the background at startup."""
+
+    def __init__(self):
+        self._chains: Optional[Dict[str, FontChain]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, FontChain]:
+        if self._chains is None:
+            with self._lock:
+                if self._chains is None:
+                    self._chains = build_font_chains()
+        return self._chains
+
+    async def chains(self) -> Dict[str, FontChain]:
+        """The font chains, waiting off the event loop if startup hasn't finished loading them."""
+        if self._chains is None:
+            await asyncio.to_thread(self.load)
+        return self._chains
+
+
+font_registry = FontRegistry()
@@ -0,0 +1,138 @@
+"""
+Print-ready derivatives of uploaded images.
+Images are normalized once, at upload, in the worker pool: EXIF orientation is
+applied, metadata stripped, the image downscaled to the PDF target resolution and
+re-encoded (JPEG for photographs, PNG for screenshots and graphics). Derivatives
+are stored next to the original, keyed by content hash, so previews and exports
+embed them as-is with no pixel work on the request path.
+"""
+
+import asyncio
+import io
+import json
+import os
+from typing import Dict, Optional, Tuple
+from app.services.storage import get_object_store, material_key
+from app.services.telemetry import IMAGES_PROCESSED, get_logger
+from app.services.workers import run_in_process
+
+logger = get_logger(__name__)
+
+# Resolution images are prepared for, and the largest area they are shown at (US Letter minus margins)
+TARGET_DPI = int(os.getenv("PDF_IMAGE_DPI", "150"))
+MAX_WIDTH_IN = 7.1
+MAX_HEIGHT_IN = 9.5
+JPEG_QUALITY = 85
+# Images with at most this many distinct colours are treated as graphics and kept lossless
+GRAPHIC_MAX_COLORS = 256
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp", ".heic")
+
+
+def is_image(file_type: Optional[str], file_name: Optional[str]) -> bool:
+    return (file_type or "").startswith("image/") or (file_name or "").lower().endswith(IMAGE_EXTENSIONS)
+
+
+def is_graphic(image) -> bool:
+    """Screenshots and graphics have few colours and sharp edges; JPEG would blur them."""
+    return image.getcolors(GRAPHIC_MAX_COLORS) is not None
+
+
+def derivative_key(digest: str) -> str:
+    return f"derived/images/{digest[:2]}/{digest}"
+
+
+def derivative_info_key(digest: str) -> str:
+    return f"derived/images/{digest[:2]}/{digest}.json"
+
+
+def normalize_image(data: bytes, dpi: int = TARGET_DPI) -> Tuple[bytes, Dict]:
+    """
+    Orient, strip, downscale and re-encode an image.
+
+    Returns:
+        The encoded image and its info: format ("JPEG" or "PNG"), width, height, dpi
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        # JPEGs can be decoded at a reduced scale; square box since orientation isn't applied yet
+        longest = int(max(MAX_WIDTH_IN, MAX_HEIGHT_IN) * dpi)
+        original.draft("RGB", (longest, longest))
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.thumbnail((int(MAX_WIDTH_IN * dpi), int(MAX_HEIGHT_IN * dpi)), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    # Saving without exif/icc/info arguments drops the source metadata
+    if has_alpha or is_graphic(image):
+        image.save(buffer, "PNG", optimize=True)
+        image_format = "PNG"
+    else:
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        image_format = "JPEG"
+    return buffer.getvalue(), {"format": image_format, "width": image.width, "height": image.height, "dpi": dpi}
+
+
+def create_derivative(digest: str) -> Dict:
+    """Normalize a stored image and save its derivative. Runs in a worker process."""
+    store = get_object_store()
+    data = store.get(material_key(digest))
+    if data is None:
+        raise FileNotFoundError(f"Material content {digest} not found")
+    encoded, info = normalize_image(data)
+    content_type = "image/jpeg" if info["format"] == "JPEG" else "image/png"
+    store.put(derivative_key(digest), encoded, content_type)
+    info = {**info, "key": derivative_key(digest), "size": len(encoded)}
+    # Written last: its presence means the derivative is complete
+    store.put(derivative_info_key(digest), json.dumps(info).encode(), "application/json")
+    return info
+
+
+def load_derivative_info(digest: str) -> Optional[Dict]:
+    data = get_object_store().get(derivative_info_key(digest))
+    return json.loads(data) if data is not None else None
+
+
+class ImageDerivativeService:
+    """Schedules derivative creation at upload time and serves derivatives afterwards."""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def schedule(self, digest: str) -> asyncio.Task:
+        """Start normalizing an image in the worker pool (once per content hash)."""
+        task = self._in_flight.get(digest)
+        if task is None:
+            task = asyncio.create_task(run_in_process(create_derivative, digest))
+            self._in_flight[digest] = task
+            task.add_done_callback(lambda finished: self._finished(digest, finished))
+        return task
+
+    def _finished(self, digest: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(digest, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            IMAGES_PROCESSED.inc(status="error")
+            logger.error("image_normalization_failed", digest=digest, error=str(task.exception()))
+        else:
+            IMAGES_PROCESSED.inc(status="normalized")
+
+    async def get(self, digest: str) -> Tuple[bytes, Dict]:
+        """Derivative bytes and info, waiting for or creating the derivative if needed."""
+        task = self._in_flight.get(digest)
+        # Store reads are network requests with S3; keep them off the event loop
+        info = await task if task is not None else await asyncio.to_thread(load_derivative_info, digest)
+        if info is None:
+            info = await self.schedule(digest)
+        data = await asyncio.to_thread(get_object_store().get, info["key"])
+        if data is None:
+            raise FileNotFoundError(f"Derivative for {digest} is missing")
+        return data, info
+
+
+image_derivative_service = ImageDerivativeService()
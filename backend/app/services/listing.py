@@ -0,0 +1,88 @@
+"""
+Helpers for list endpoints: cursor pagination, field projection and cacheable JSON responses.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _sort_key(item: Dict) -> Tuple[str, str]:
+    return (item.get("createdAt", ""), item.get("id", ""))
+
+
+def encode_cursor(item: Dict) -> str:
+    """Opaque cursor pointing just after the given item."""
+    return base64.urlsafe_b64encode(orjson.dumps(list(_sort_key(item)))).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, item_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (created_at, item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    items: Iterable[Dict],
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Return one page of items ordered by (createdAt, id), plus the cursor for the next page.
+    The cursor is stable under inserts and deletes, unlike an offset.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    ordered = sorted(items, key=_sort_key)
+    if cursor:
+        after = decode_cursor(cursor)
+        ordered = [item for item in ordered if _sort_key(item) > after]
+    page = ordered[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(ordered) > limit else None
+    return page, next_cursor
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated `fields=` parameter."""
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    # The id is always returned so clients can address the record
+    if "id" not in selected:
+        selected.insert(0, "id")
+    return selected
+
+
+def project(items: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the requested fields of each item."""
+    if fields is None:
+        return items
+    return [{field: item[field] for field in fields if field in item} for item in items]
+
+
+def json_response(request: Request, payload: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize a payload with orjson and tag it with a weak ETag.
+    Returns 304 when the client already has the current version.
+    """
+    body = orjson.dumps(payload)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    return bytes_response(request, body, etag, {"Cache-Control": "no-cache", **(headers or {})})
+
+
+def bytes_response(request: Request, body: bytes, etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Send pre-serialized JSON with its ETag, or 304 when the client already has it."""
+    response_headers = {"ETag": etag, **(headers or {})}
+    # If-None-Match uses weak comparison
+    if_none_match = request.headers.get("if-none-match", "")
+    client_tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if "*" in client_tags or etag.removeprefix("W/") in client_tags:
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=body, media_type="application/json", headers=response_headers)
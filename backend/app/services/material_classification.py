@@ -0,0 +1,129 @@
+"""
+Batch classification of materials with result caching.
+Results are cached in the object store by (content hash, classifier version), so
+re-uploads and shared blobs are never reclassified, and only entries produced by
+an older classifier version are recomputed after an upgrade.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Tuple
+from app.services.application_summary import summary_service
+from app.services.search_index import search_index
+from app.services.document_classifier import CLASSIFIER_VERSION, classify_documents
+from app.services.storage import get_object_store
+from app.services.text_extraction import is_docx, is_pdf
+from app.services.workers import run_in_process
+
+# Materials per worker call; chunks are classified concurrently across the pool
+CHUNK_SIZE = 16
+
+
+def classification_key(digest: str, version: str = CLASSIFIER_VERSION) -> str:
+    return f"derived/classification/{version}/{digest[:2]}/{digest}.json"
+
+
+def is_current(material: Dict) -> bool:
+    """True if the material has a classification from the current classifier version."""
+    data = material.get("classificationData") or {}
+    return data.get("classifierVersion") == CLASSIFIER_VERSION
+
+
+def _is_cacheable(material: Dict) -> bool:
+    """Text documents are classified on content alone, so their result depends only on the hash."""
+    return bool(material.get("contentHash")) and (
+        is_pdf(material.get("fileType"), material.get("fileName"))
+        or (material.get("fileType") or "").startswith("text/")
+        or is_docx(material.get("fileType"), material.get("fileName"))
+    )
+
+
+def _input_for(material: Dict) -> Tuple:
+    if _is_cacheable(material):
+        return (material["contentHash"], material.get("fileType"), material.get("fileName"), "")
+    # Images and other binaries: classify on what the user told us about the file
+    extra_text = " ".join(
+        part for part in [material.get("title"), material.get("fileName"), material.get("evidenceDescription")]
+        if part
+    )
+    return (None, material.get("fileType"), material.get("fileName"), extra_text)
+
+
+def apply_classification(material: Dict, result: Dict) -> None:
+    """Store a classification on a material and keep the dashboard summary in step."""
+    before = dict(material)
+    material["classificationData"] = result
+    material["suggestedStandard"] = result["recommendedStandard"]
+    material["strengthRating"] = result["strengthRating"]
+    if not material.get("materialType"):
+        material["materialType"] = result["fileType"]
+    material["updatedAt"] = datetime.utcnow().isoformat()
+    summary_service.material_updated(before, material)
+    search_index.material_updated(material)
+
+
+async def classify_materials(materials: List[Dict], force: bool = False) -> Dict:
+    """
+    Classify materials that have no current classification (or all of them when forced).
+
+    Returns counts of classified, cached and skipped materials plus each material's result.
+    """
+    store = get_object_store()
+    pending = [m for m in materials if force or not is_current(m)]
+    skipped = len(materials) - len(pending)
+
+    # Serve what we can from the result cache; group the rest so each blob is classified once.
+    # Store calls are network requests with S3, so they run in threads, concurrently.
+    digests = list({m["contentHash"] for m in pending if _is_cacheable(m)})
+    lookups = await asyncio.gather(*[
+        asyncio.to_thread(store.get, classification_key(digest)) for digest in digests
+    ])
+    cache_entries = dict(zip(digests, lookups))
+
+    results: Dict[str, Dict] = {}
+    cached = 0
+    to_classify: Dict[str, List[Dict]] = {}
+    for material in pending:
+        if _is_cacheable(material):
+            digest = material["contentHash"]
+            cached_result = cache_entries[digest]
+            if cached_result is not None:
+                results[material["id"]] = json.loads(cached_result)
+                cached += 1
+                continue
+            to_classify.setdefault(digest, []).append(material)
+        else:
+            to_classify.setdefault(f"material:{material['id']}", []).append(material)
+
+    groups = list(to_classify.values())
+    chunks = [groups[i:i + CHUNK_SIZE] for i in range(0, len(groups), CHUNK_SIZE)]
+    chunk_results = await asyncio.gather(*[
+        run_in_process(classify_documents, [_input_for(group[0]) for group in chunk])
+        for chunk in chunks
+    ])
+
+    writes = []
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        for group, result in zip(chunk, chunk_result):
+            if _is_cacheable(group[0]):
+                writes.append(asyncio.to_thread(
+                    store.put,
+                    classification_key(group[0]["contentHash"]),
+                    json.dumps(result).encode(),
+                    "application/json",
+                ))
+            for material in group:
+                results[material["id"]] = result
+    await asyncio.gather(*writes)
+
+    for material in pending:
+        apply_classification(material, results[material["id"]])
+
+    return {
+        "classified": len(pending) - cached,
+        "cached": cached,
+        "skipped": skipped,
+        "classifierVersion": CLASSIFIER_VERSION,
+        "results": {m["id"]: m.get("classificationData") for m in materials},
+    }
@@ -0,0 +1,286 @@
+"""
+Async client for the Onerouter AI classification API.
+Documents submitted individually are micro-batched into fewer upstream calls.
+Calls share a pooled HTTP connection set, pass through a token-bucket rate limiter,
+are retried with jittered exponential backoff, and respect per-call deadlines.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_BASE_URL = "https://llm.onerouter.pro/v1"
+DEFAULT_MODEL = "gpt-4o-mini"
+MAX_DOCUMENT_CHARS = 6000
+
+SYSTEM_PROMPT = (
+    "You classify supporting documents for a UK Global Talent (Tech Nation) visa application. "
+    "For each document, choose the standard it best supports: MC (recognition as leading talent), "
+    "OC1 (significant contribution), OC2 (innovation) or OC3 (commercial success). "
+    'Reply with JSON: {"results": [{"id": ..., "recommendedStandard": ..., "fileType": ..., '
+    '"strengthRating": 1-5, "aiAnalysis": ...}]}, one entry per document, in any order.'
+)
+
+
+class OnerouterError(Exception):
+    """Raised when a classification cannot be obtained from Onerouter."""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until `tokens` are available, then take them. Returns False, taking
+        nothing, if that doesn't happen within `timeout` seconds.
+        """
+        try:
+            await asyncio.wait_for(self._take(tokens), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _take(self, tokens: float) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so no call starts for `seconds` (used on upstream 429s)."""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP-date), or None if absent or malformed."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _deadline_error(last_error: Optional[Exception]) -> OnerouterError:
+    detail = f" (last error: {last_error})" if last_error else ""
+    return OnerouterError(f"Classification deadline exceeded{detail}")
+
+
+class _PendingDocument:
+    __slots__ = ("document", "future", "deadline")
+
+    def __init__(self, document: Dict, future: asyncio.Future, deadline: float):
+        self.document = document
+        self.future = future
+        self.deadline = deadline
+
+
+class OnerouterClient:
+    """Batching, rate-limited client for Onerouter document classification."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        max_connections: int = 10,
+        max_batch_size: int = 8,
+        batch_window: float = 0.05,
+        rate_per_second: float = 2.0,
+        burst: float = 5.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+        default_timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key or os.getenv("ONEROUTER_API_KEY", "")
+        self.base_url = (base_url or os.getenv("ONEROUTER_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.model = model or os.getenv("ONEROUTER_MODEL", DEFAULT_MODEL)
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.default_timeout = default_timeout
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=default_timeout,
+            transport=transport,
+        )
+        self._queue: "asyncio.Queue[_PendingDocument]" = asyncio.Queue()
+        self._batcher: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+
+    async def classify(self, document: Dict[str, Any], timeout: Optional[float] = None) -> Dict:
+        """
+        Classify one document ({"id", "fileName", "text"}).
+        The document is sent together with others submitted in the same batch window.
+
+        Raises:
+            OnerouterError: upstream failure after retries, or no time left for another attempt
+            asyncio.TimeoutError: the deadline passed while a request was in flight
+        """
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.create_task(self._batch_loop())
+        timeout = timeout if timeout is not None else self.default_timeout
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingDocument(document, future, time.monotonic() + timeout))
+        return await asyncio.wait_for(future, timeout)
+
+    async def classify_many(self, documents: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict]:
+        """Classify several documents; they are batched like individual calls."""
+        return await asyncio.gather(*[self.classify(document, timeout) for document in documents])
+
+    async def _batch_loop(self) -> None:
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            window_end = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = window_end - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch = [item for item in batch if not item.future.done()]
+            if batch:
+                task = asyncio.create_task(self._dispatch(batch))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[_PendingDocument]) -> None:
+        try:
+            results = await self._send_with_retries(batch)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e if isinstance(e, OnerouterError) else OnerouterError(str(e)))
+            return
+
+        for item in batch:
+            if item.future.done():
+                continue
+            result = results.get(str(item.document["id"]))
+            if result is None:
+                item.future.set_exception(OnerouterError(f"No result for document {item.document['id']}"))
+            else:
+                item.future.set_result(result)
+
+    async def _send_with_retries(self, batch: List[_PendingDocument]) -> Dict[str, Dict]:
+        # The batch must finish before its earliest deadline
+        deadline = min(item.deadline for item in batch)
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _deadline_error(last_error)
+            # Waiting for a rate-limit slot counts against the deadline too
+            if not await self.bucket.acquire(timeout=remaining):
+                raise _deadline_error(last_error)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _deadline_error(last_error)
+            try:
+                response = await self._http.post(
+                    "/chat/completions",
+                    json=self._request_body(batch),
+                    timeout=remaining,
+                )
+            except httpx.TransportError as e:
+                last_error = e
+            else:
+                if response.status_code == 200:
+                    return self._parse_response(response)
+                last_error = OnerouterError(f"Onerouter returned {response.status_code}: {response.text[:200]}")
+                if response.status_code == 429:
+                    # Without a usable Retry-After, the backoff below still spaces out retries
+                    retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                    if retry_after:
+                        self.bucket.pause(retry_after)
+                elif response.status_code < 500:
+                    raise last_error
+
+            # Full jitter: sleep a random time up to the exponential bound
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            if time.monotonic() + delay >= deadline:
+                raise _deadline_error(last_error)
+            await asyncio.sleep(delay)
+        raise OnerouterError(f"Classification failed: {last_error}")
+
+    def _request_body(self, batch: List[_PendingDocument]) -> Dict:
+        documents = [
+            {
+                "id": str(item.document["id"]),
+                "fileName": item.document.get("fileName", ""),
+                "text": (item.document.get("text") or "")[:MAX_DOCUMENT_CHARS],
+            }
+            for item in batch
+        ]
+        return {
+            "model": self.model,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({"documents": documents})},
+            ],
+        }
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Dict[str, Dict]:
+        try:
+            content = response.json()["choices"][0]["message"]["content"]
+            results = json.loads(content)["results"]
+            return {str(result.pop("id")): result for result in results}
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise OnerouterError(f"Unexpected Onerouter response: {e}")
+
+    async def aclose(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+        for task in list(self._in_flight):
+            task.cancel()
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
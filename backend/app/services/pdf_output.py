@@ -0,0 +1,249 @@
+"""
+Size-optimized PDF output for evidence previews and exports.
+Photographic images are stored as quality-tuned JPEG while screenshots and
+graphics stay lossless, identical images are embedded once, and content streams
+are Flate-compressed. With a target size, JPEG quality is lowered step by step
+(re-encoding from the decoded pixels each time) until the file fits.
+"""
+
+import hashlib
+import io
+import os
+import sys
+import zlib
+from typing import Dict, List, Optional
+from app.services.image_derivatives import is_graphic
+
+DEFAULT_JPEG_QUALITY = int(os.getenv("PDF_JPEG_QUALITY", "80"))
+MIN_JPEG_QUALITY = 30
+MAX_JPEG_QUALITY = 95
+QUALITY_STEP = 15
+# Images below this many pixels aren't worth re-encoding
+MIN_IMAGE_PIXELS = 64 * 64
+# An image that is already JPEG is only re-encoded when that saves at least this fraction
+MIN_JPEG_SAVING = 0.1
+LOSSLESS_FILTERS = {"/FlateDecode", "/LZWDecode", "/ASCII85Decode", "/ASCIIHexDecode", "/RunLengthDecode"}
+COLOR_MODES = {"/DeviceRGB": ("RGB", 3), "/DeviceGray": ("L", 1)}
+
+# ASCII85 makes every embedded image a quarter larger; our PDFs are served as binary.
+# useA85 is a process-wide reportlab setting, switched off once here. reportlab reads
+# RL_* variables when it is first imported, so this doesn't import it at startup.
+if "reportlab.rl_config" in sys.modules:
+    sys.modules["reportlab.rl_config"].useA85 = 0
+else:
+    os.environ.setdefault("RL_useA85", "0")
+
+
+def quality_steps(quality: int, target_size: Optional[int]) -> List[int]:
+    """JPEG qualities to try in order: just the requested one, or descending steps for a target size."""
+    quality = max(MIN_JPEG_QUALITY, min(MAX_JPEG_QUALITY, quality))
+    if not target_size:
+        return [quality]
+    steps = list(range(quality, MIN_JPEG_QUALITY, -QUALITY_STEP))
+    return steps + [MIN_JPEG_QUALITY]
+
+
+def new_canvas(buffer, pagesize):
+    """A reportlab canvas with compressed page streams (and binary image data, see useA85 above)."""
+    from reportlab.pdfgen import canvas
+
+    return canvas.Canvas(buffer, pagesize=pagesize, pageCompression=1)
+
+
+class ImageEmbedder:
+    """
+    Draws encoded images on a canvas. JPEG data is embedded as-is, other formats
+    are Flate-compressed, and an image drawn more than once is stored once.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._readers: Dict[str, object] = {}
+
+    def draw(self, data: bytes, x: float, y: float, width: float, height: float) -> None:
+        from reportlab.lib.utils import ImageReader
+
+        # reportlab reuses an XObject whose pixels it has seen; one reader per image keeps that check cheap
+        key = hashlib.sha256(data).hexdigest()
+        reader = self._readers.get(key)
+        if reader is None:
+            reader = self._readers[key] = ImageReader(io.BytesIO(data))
+        self.canvas.drawImage(reader, x, y, width=width, height=height, mask="auto")
+
+
+def _strip_ascii_armour(obj):
+    """Drop a leading ASCII85/ASCIIHex filter, which only inflates binary data."""
+    from PyPDF2.filters import ASCII85Decode, ASCIIHexDecode
+    from PyPDF2.generic import ArrayObject, EncodedStreamObject, NameObject
+
+    filters = _filters(obj)
+    decoders = {"/ASCII85Decode": ASCII85Decode, "/ASCIIHexDecode": ASCIIHexDecode}
+    if len(filters) < 2 or filters[0] not in decoders:
+        return None
+    parms = obj.get("/DecodeParms")
+    if parms is not None and not isinstance(parms, list):
+        return None
+    stream = EncodedStreamObject()
+    stream.update({k: v for k, v in obj.items() if k not in ("/Filter", "/DecodeParms")})
+    stream[NameObject("/Filter")] = ArrayObject(NameObject(f) for f in filters[1:])
+    if parms is not None:
+        stream[NameObject("/DecodeParms")] = ArrayObject(parms[1:])
+    stream._data = decoders[filters[0]].decode(obj._data)
+    return stream
+
+
+def compress_streams(writer) -> None:
+    """
+    Flate-compress streams stored without a filter (page content, forms, font
+    files) and strip ASCII armour from binary streams.
+    """
+    from PyPDF2.generic import EncodedStreamObject, NameObject, StreamObject
+
+    for index, obj in enumerate(writer._objects):
+        if not isinstance(obj, StreamObject):
+            continue
+        if "/Filter" in obj:
+            stripped = _strip_ascii_armour(obj)
+            # ASCII85 abbreviates zero runs, so armour very occasionally comes out smaller
+            if stripped is not None and len(stripped._data) < len(obj._data):
+                writer._objects[index] = stripped
+            continue
+        data = obj.get_data()
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        compressed = zlib.compress(data)
+        if len(compressed) >= len(data):
+            continue
+        stream = EncodedStreamObject()
+        stream.update(obj)
+        stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+        stream._data = compressed
+        writer._objects[index] = stream
+
+
+class _ImageCandidate:
+    __slots__ = ("index", "original", "image", "max_size")
+
+    def __init__(self, index: int, original, image, max_size: int):
+        self.index = index
+        self.original = original
+        self.image = image
+        self.max_size = max_size
+
+
+def _filters(obj) -> List[str]:
+    value = obj.get("/Filter")
+    if value is None:
+        return []
+    return [str(f) for f in value] if isinstance(value, list) else [str(value)]
+
+
+def _collect_images(writer) -> List[_ImageCandidate]:
+    """Photographic images that could be stored smaller as JPEG, with their decoded pixels."""
+    from PIL import Image
+    from PyPDF2.generic import ArrayObject, IndirectObject, StreamObject
+
+    # Soft masks are alpha channels; lossy compression would fray their edges
+    masks = {
+        obj["/SMask"].idnum
+        for obj in writer._objects
+        if isinstance(obj, StreamObject) and isinstance(obj.get("/SMask"), IndirectObject)
+    }
+
+    candidates = []
+    for index, obj in enumerate(writer._objects):
+        if not isinstance(obj, StreamObject) or obj.get("/Subtype") != "/Image" or index + 1 in masks:
+            continue
+        if obj.get("/ImageMask") or "/Decode" in obj or isinstance(obj.get("/Mask"), ArrayObject):
+            continue
+        color = COLOR_MODES.get(obj.get("/ColorSpace"))
+        if color is None or obj.get("/BitsPerComponent") != 8:
+            continue
+        mode, channels = color
+        width, height = int(obj["/Width"]), int(obj["/Height"])
+        if width * height < MIN_IMAGE_PIXELS:
+            continue
+
+        filters = _filters(obj)
+        try:
+            if filters == ["/DCTDecode"]:
+                image = Image.open(io.BytesIO(obj._data))
+                image.load()
+                if image.mode != mode:
+                    continue
+                max_size = int(len(obj._data) * (1 - MIN_JPEG_SAVING))
+            elif set(filters) <= LOSSLESS_FILTERS:
+                data = obj.get_data()
+                if len(data) != width * height * channels:
+                    continue
+                image = Image.frombytes(mode, (width, height), data)
+                # Screenshots and graphics stay lossless
+                if is_graphic(image):
+                    continue
+                max_size = len(obj._data)
+            else:
+                continue
+        except Exception:
+            # Unusual encodings are left exactly as they are
+            continue
+        candidates.append(_ImageCandidate(index, obj, image, max_size))
+    return candidates
+
+
+def _apply_quality(writer, candidates: List[_ImageCandidate], quality: int) -> None:
+    """Re-encode candidates at a JPEG quality, keeping the original wherever it is smaller."""
+    from PyPDF2.generic import EncodedStreamObject, NameObject
+
+    for candidate in candidates:
+        buffer = io.BytesIO()
+        candidate.image.save(buffer, "JPEG", quality=quality, optimize=True)
+        encoded = buffer.getvalue()
+        if len(encoded) >= candidate.max_size:
+            writer._objects[candidate.index] = candidate.original
+            continue
+        stream = EncodedStreamObject()
+        stream.update({k: v for k, v in candidate.original.items() if k not in ("/Filter", "/DecodeParms")})
+        stream[NameObject("/Filter")] = NameObject("/DCTDecode")
+        stream._data = encoded
+        writer._objects[candidate.index] = stream
+
+
+def _serialize(writer) -> bytes:
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def write_optimized(writer, quality: int = DEFAULT_JPEG_QUALITY, target_size: Optional[int] = None) -> bytes:
+    """
+    Serialize a PdfWriter with compressed streams and photographic images as JPEG.
+
+    Args:
+        writer: The document to write (modified in place)
+        quality: JPEG quality for photographic images
+        target_size: Size in bytes to aim for; quality is lowered until the PDF fits
+
+    Returns:
+        The PDF bytes (the smallest attempt if the target can't be met)
+    """
+    compress_streams(writer)
+    candidates = _collect_images(writer)
+    steps = quality_steps(quality, target_size) if candidates else [quality]
+    for step in steps:
+        _apply_quality(writer, candidates, step)
+        output = _serialize(writer)
+        if not target_size or len(output) <= target_size:
+            break
+    return output
+
+
+def optimize_pdf(pdf_bytes: bytes, quality: int = DEFAULT_JPEG_QUALITY, target_size: Optional[int] = None) -> bytes:
+    """Optimize an already-rendered PDF. Runs in a worker process."""
+    from PyPDF2 import PdfReader, PdfWriter
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    optimized = write_optimized(writer, quality, target_size)
+    return optimized if len(optimized) < len(pdf_bytes) else pdf_bytes
@@ -0,0 +1,114 @@
+"""
+Derived-asset service for PDF page thumbnails.
+Pages are rendered with Poppler (via pdf2image) on first request, in the worker
+process pool, and stored in the object store keyed by (content hash, page, size).
+Later requests for the same page are served straight from the store.
+"""
+
+import asyncio
+import io
+from typing import Dict, Optional
+from app.services.storage import get_object_store, material_key
+from app.services.workers import run_in_process
+
+# Fixed widths (in pixels) the workbench can ask for
+THUMBNAIL_SIZES = {
+    "small": 160,
+    "medium": 320,
+    "large": 800,
+}
+
+
+def thumbnail_key(digest: str, page: int, size: str) -> str:
+    """Object-store key for a rendered page."""
+    return f"derived/thumbnails/{digest[:2]}/{digest}/{page}-{size}.png"
+
+
+def count_pages(data: bytes) -> int:
+    """Number of pages in a PDF, or 0 if it can't be read. Runs in a worker process."""
+    from PyPDF2 import PdfReader
+
+    try:
+        return len(PdfReader(io.BytesIO(data)).pages)
+    except Exception:
+        return 0
+
+
+def render_page(source, page: int, width: int) -> bytes:
+    """
+    Render one PDF page to PNG. Runs in a worker process.
+
+    Args:
+        source: Path to the PDF on disk, or the PDF bytes
+        page: 1-based page number
+        width: Target width in pixels (height keeps the aspect ratio)
+    """
+    from pdf2image import convert_from_bytes, convert_from_path
+
+    convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+    images = convert(source, first_page=page, last_page=page, size=(width, None))
+    if not images:
+        raise ValueError(f"Page {page} could not be rendered")
+    buffer = io.BytesIO()
+    images[0].save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class PdfThumbnailService:
+    """Renders and caches page thumbnails for uploaded PDFs."""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def get_thumbnail(self, digest: str, page: int, size: str) -> Optional[bytes]:
+        """
+        Return the PNG thumbnail for a page, rendering it on first request.
+        Concurrent requests for the same thumbnail share one render.
+        """
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Unknown thumbnail size: {size}")
+
+        store = get_object_store()
+        key = thumbnail_key(digest, page, size)
+        # Store calls are network requests with S3; keep them off the event loop
+        cached = await asyncio.to_thread(store.get, key)
+        if cached is not None:
+            return cached
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request rendering it was cancelled; render it here instead
+                return await self.get_thumbnail(digest, page, size)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            source = store.local_path(material_key(digest)) or await asyncio.to_thread(
+                store.get, material_key(digest)
+            )
+            if source is None:
+                future.set_result(None)
+                return None
+            image = await run_in_process(render_page, source, page, THUMBNAIL_SIZES[size])
+            await asyncio.to_thread(store.put, key, image, "image/png")
+            future.set_result(image)
+            return image
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure isn't logged as never retrieved
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled (e.g. the client disconnected): waiters must not hang on the future
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+
+thumbnail_service = PdfThumbnailService()
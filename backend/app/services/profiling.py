@@ -0,0 +1,274 @@
+"""
+On-demand per-request profiling.
+A request is profiled when it carries the admin profiling header or is picked by
+sampling. While it runs, a background thread samples the event-loop thread's call
+stack and tracemalloc records allocations; work the request sends to the process
+pool is sampled inside the worker and its stacks are returned with the result.
+The resulting profile is stored under a server-generated id for download. Requests that
+aren't profiled pay one header lookup and one random draw.
+
+Not covered: allocations made in workers, and code run in other threads
+(asyncio.to_thread, e.g. object store calls), which shows up only as awaiting.
+"""
+
+import asyncio
+import contextvars
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services.storage import get_object_store
+from app.services.telemetry import get_logger, trace_id_var
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+TOP_ALLOCATIONS = 25
+MAX_STACK_DEPTH = 64
+# Root frame of stacks sampled in a worker process, keeping them apart in flame graphs
+WORKER_FRAME = "[worker process]"
+
+logger = get_logger(__name__)
+
+
+def profile_key(profile_id: str) -> str:
+    return f"profiles/{profile_id}.json"
+
+
+def admin_token() -> str:
+    return os.getenv("PROFILE_ADMIN_TOKEN", "")
+
+
+def is_admin(token: Optional[str]) -> bool:
+    expected = admin_token()
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's call stack at a fixed interval, counting folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class _AllocationTracer:
+    """Reference-counted tracemalloc, so overlapping profiled requests share one trace."""
+
+    def __init__(self):
+        self._users = 0
+        self._started_here = False
+        self._lock = threading.Lock()
+
+    def start(self) -> tracemalloc.Snapshot:
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(16)
+                self._started_here = True
+            self._users += 1
+        return tracemalloc.take_snapshot()
+
+    def stop(self, baseline: tracemalloc.Snapshot) -> List[Dict]:
+        snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+        # Leave out the profiler's own bookkeeping
+        exclude = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = snapshot.filter_traces(exclude).compare_to(baseline.filter_traces(exclude), "lineno")
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "sizeDiff": stat.size_diff,
+                "countDiff": stat.count_diff,
+            }
+            for stat in stats[:TOP_ALLOCATIONS]
+        ]
+
+
+_allocations = _AllocationTracer()
+
+
+def profile_call(func: Callable, interval: float, *args: Any) -> Tuple[Any, Dict[str, int], int]:
+    """
+    Run func in a worker process while sampling that process's stack.
+    Returns the result, the collapsed stacks and the number of samples.
+    """
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        result = func(*args)
+    finally:
+        sampler.stop()
+    # Keep only the frames below this one (a forked worker also carries its parent's frames)
+    stacks: Counter = Counter()
+    for stack, count in sampler.stacks.items():
+        frames = stack.split(";")
+        start = next((i + 1 for i, frame in enumerate(frames) if frame.startswith("profile_call (")), 0)
+        stacks[";".join(frames[start:]) or "profile_call"] += count
+    return result, dict(stacks), sampler.samples
+
+
+class RequestProfiler:
+    """
+    Profiles one request: stack samples of the event-loop thread and of its
+    worker-pool calls, plus an allocation diff of this process.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.worker_stacks: Counter = Counter()
+        self.worker_samples = 0
+
+    async def start(self) -> None:
+        # Snapshots walk every traced block; take them off the event loop
+        baseline = await asyncio.to_thread(_allocations.start)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        try:
+            sampler.start()
+        except BaseException:
+            await asyncio.to_thread(_allocations.stop, baseline)
+            raise
+        self._baseline, self._sampler = baseline, sampler
+        self._token = active_profiler.set(self)
+        self._started = time.perf_counter()
+
+    async def stop(self) -> None:
+        """Stop sampling and diff allocations; only call after a successful start()."""
+        self.duration = time.perf_counter() - self._started
+        self._sampler.stop()
+        active_profiler.reset(self._token)
+        try:
+            self.top_allocations = await asyncio.to_thread(_allocations.stop, self._baseline)
+        except Exception as e:
+            logger.error("profile_allocations_failed", error=str(e))
+            self.top_allocations = []
+
+    def add_worker_stacks(self, stacks: Dict[str, int], samples: int) -> None:
+        for stack, count in stacks.items():
+            self.worker_stacks[f"{WORKER_FRAME};{stack}"] += count
+        self.worker_samples += samples
+
+    def to_dict(self) -> Dict:
+        stacks = self._sampler.stacks + self.worker_stacks
+        return {
+            "durationMs": round(self.duration * 1000, 3),
+            "intervalMs": self.interval * 1000,
+            "samples": self._sampler.samples,
+            "workerSamples": self.worker_samples,
+            # Collapsed-stack format ("frame;frame;frame" -> count), readable by flame graph tools
+            "stacks": dict(stacks.most_common()),
+            "topAllocations": self.top_allocations,
+        }
+
+
+# The profiler of the request being handled, seen by run_in_process
+active_profiler: contextvars.ContextVar[Optional[RequestProfiler]] = contextvars.ContextVar(
+    "active_profiler", default=None
+)
+
+
+def save_profile(profile_id: str, profile: Dict) -> None:
+    get_object_store().put(profile_key(profile_id), json.dumps(profile).encode(), "application/json")
+
+
+def load_profile(profile_id: str) -> Optional[Dict]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    data = get_object_store().get(profile_key(profile_id))
+    return json.loads(data) if data is not None else None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests sent with `X-Profile: <PROFILE_ADMIN_TOKEN>`
+    or picked at random with probability PROFILE_SAMPLE_RATE. Profiled responses carry
+    an X-Profile-Id header naming the stored profile.
+
+    The event loop is shared, so samples include whatever else the loop ran meanwhile.
+    Worker-pool calls made by the request are sampled in the worker (see profile_call).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.interval = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+
+    def _should_profile(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return is_admin(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Always generated here: the request id can come from the client and must not
+        # be able to overwrite a stored profile
+        profile_id = os.urandom(16).hex()
+        status = {"code": 500}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = RequestProfiler(self.interval)
+        try:
+            await profiler.start()
+        except Exception as e:
+            # Profiling is best effort; serve the request without it
+            logger.error("profile_start_failed", error=str(e))
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await profiler.stop()
+            profile = {
+                "profileId": profile_id,
+                "requestId": trace_id_var.get(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                **profiler.to_dict(),
+            }
+            try:
+                await asyncio.to_thread(save_profile, profile_id, profile)
+                logger.info("request_profiled", profile_id=profile_id, path=scope["path"], duration_ms=profile["durationMs"])
+            except Exception as e:
+                logger.error("profile_save_failed", profile_id=profile_id, error=str(e))
@@ -0,0 +1,432 @@
+"""
+Stage 4 quality check, computed incrementally.
+Facts about a material's content (dates mentioned per page, how much text each
+page has, image resolution) are derived once per content hash in the worker
+pool and stored next to the material. Readability scores for images and scanned
+pages are added on the first check that needs them, scoring every unscored
+material of the application as one batch. Facts about an evidence file are combined
+from its materials' facts and cached under a fingerprint of the evidence and
+its selections, so re-running the check after an edit only recomputes the
+evidence that changed. The application-wide result (counts, duplicates, score
+and warnings) is a cheap pass over the cached facts.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from app.services.image_derivatives import create_derivative, is_image, load_derivative_info
+from app.services.readability import prepare_samples, score_materials, summarize
+from app.services.storage import get_object_store
+from app.services.telemetry import get_logger
+from app.services.text_extraction import is_pdf, load_or_extract_pages, text_extraction_service
+from app.services.workers import run_in_process
+
+logger = get_logger(__name__)
+
+# Bump when the facts derived from a material change shape or meaning
+FACTS_VERSION = 2
+
+REQUIRED_EVIDENCE = 10
+MC_REQUIRED = 4
+OC_REQUIRED = 3
+OC_CRITERIA_REQUIRED = 2
+OC_STANDARDS = ["OC1", "OC2", "OC3"]
+MAX_EVIDENCE_PAGES = 3
+EVIDENCE_MAX_AGE_YEARS = 5
+# Used when a material has no readability scores (no page renders available):
+# a PDF page with less text than this is probably a scan or a picture of text
+MIN_PAGE_TEXT = 25
+# and an image whose longest side is below this many pixels is likely to be unclear in print
+MIN_IMAGE_SIDE = 600
+
+MONTHS = {
+    name: index + 1
+    for index, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ])
+    for name in names
+}
+_MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+_YEAR = r"((?:19|20)\d{2})"
+DATE_PATTERNS = [
+    # 2021-03-14, 2021/03/14
+    (re.compile(rf"\b{_YEAR}[-/.](\d{{1,2}})[-/.](\d{{1,2}})\b"), lambda m: (m[1], m[2], m[3])),
+    # 14/03/2021, 03-2021 (day-first, the UK convention)
+    (re.compile(rf"\b(?:(\d{{1,2}})[-/.])?(\d{{1,2}})[-/.]{_YEAR}\b"), lambda m: (m[3], m[2], m[1] or 1)),
+    # 14 March 2021, March 2021
+    (re.compile(rf"\b(?:(\d{{1,2}})(?:st|nd|rd|th)?\s+)?{_MONTH},?\s+{_YEAR}\b", re.I), lambda m: (m[3], MONTHS[m[2].lower()], m[1] or 1)),
+    # March 14, 2021
+    (re.compile(rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?,\s+{_YEAR}\b", re.I), lambda m: (m[3], MONTHS[m[1].lower()], m[2])),
+]
+BARE_YEAR = re.compile(rf"\b{_YEAR}\b")
+
+
+def quality_facts_key(digest: str) -> str:
+    return f"derived/quality/{digest[:2]}/{digest}.json"
+
+
+def latest_date(text: str, today: Optional[date] = None) -> Optional[str]:
+    """
+    The most recent past date mentioned in text, as an ISO date. Bare years count
+    as the last day of the year, and only when the text has no fuller date.
+    """
+    today = today or date.today()
+    found: List[date] = []
+    for pattern, parts in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            try:
+                year, month, day = (int(value) for value in parts(match))
+                found.append(date(year, month, day))
+            except ValueError:
+                continue
+    if not found:
+        for match in BARE_YEAR.finditer(text):
+            found.append(date(int(match[1]), 12, 31))
+    past = [d for d in found if d <= today or d.year == today.year]
+    return min(max(past), today).isoformat() if past else None
+
+
+def analyze_material(digest: str, file_type: Optional[str], file_name: Optional[str]) -> Dict:
+    """
+    Derive a material's quality facts and store them under its content hash.
+    Runs in a worker process.
+    """
+    facts: Dict = {"version": FACTS_VERSION, "pageDates": [], "pageText": [], "imageSize": None}
+    if is_image(file_type, file_name):
+        info = load_derivative_info(digest) or create_derivative(digest)
+        # Derivatives are only ever downscaled, so a small one means a small original
+        facts["imageSize"] = [info["width"], info["height"]]
+    else:
+        pages = load_or_extract_pages(digest, file_type, file_name)
+        facts["pageDates"] = [latest_date(text) for text in pages]
+        facts["pageText"] = [len(text.strip()) for text in pages]
+    facts["isPdf"] = is_pdf(file_type, file_name)
+    try:
+        facts["samples"] = prepare_samples(digest, file_type, file_name)
+    except Exception as e:
+        # e.g. poppler isn't installed to render PDF pages; the text-based checks still apply
+        logger.warning("readability_samples_failed", digest=digest, error=str(e))
+        facts["samples"] = 0
+    # Per-page scores, filled in by the first check that includes this material
+    facts["readability"] = None
+    store_material_facts(digest, facts)
+    return facts
+
+
+def store_material_facts(digest: str, facts: Dict) -> None:
+    get_object_store().put(quality_facts_key(digest), json.dumps(facts).encode(), "application/json")
+
+
+def load_material_facts(digest: str) -> Optional[Dict]:
+    data = get_object_store().get(quality_facts_key(digest))
+    if data is None:
+        return None
+    facts = json.loads(data)
+    return facts if facts.get("version") == FACTS_VERSION else None
+
+
+def _selected_pages(page_range: Optional[str], page_count: int) -> List[int]:
+    from app.services.pdf_assembly import parse_page_range
+
+    try:
+        return parse_page_range(page_range, page_count)
+    except ValueError:
+        return list(range(page_count))
+
+
+class EvidenceFacts:
+    """What the check needs to know about one evidence file, derived from its content."""
+
+    __slots__ = ("latest_date", "unclear", "material_ids", "content_hashes")
+
+    def __init__(
+        self,
+        latest_date: Optional[str],
+        unclear: List[Tuple[str, str]],
+        material_ids: List[str],
+        content_hashes: List[str],
+    ):
+        self.latest_date = latest_date
+        # (material id, reason) for materials that may not be clear and readable
+        self.unclear = unclear
+        self.material_ids = material_ids
+        self.content_hashes = content_hashes
+
+
+def evidence_facts(evidence: Dict, materials: Dict[str, Dict], material_facts: Dict[str, Dict]) -> EvidenceFacts:
+    dates = [latest_date(evidence.get("textContent") or "")]
+    unclear: List[Tuple[str, str]] = []
+    material_ids, content_hashes = [], []
+    for selection in evidence.get("materials", []):
+        material = materials.get(selection["materialId"])
+        if material is None:
+            continue
+        material_ids.append(material["id"])
+        digest = material.get("contentHash")
+        facts = material_facts.get(digest)
+        if facts is None:
+            continue
+        content_hashes.append(digest)
+        pages = _selected_pages(selection.get("pageRange"), len(facts["pageText"]))
+        dates.extend(facts["pageDates"][index] for index in pages)
+        if facts.get("readability"):
+            scored = facts["readability"]
+            # Images are a single "page"
+            for index in (pages if facts["isPdf"] else [0]):
+                if index < len(scored) and scored[index]["issues"]:
+                    where = f"page {index + 1} " if facts["isPdf"] else ""
+                    unclear.append((material["id"], f"{where}may be unreadable: {', '.join(scored[index]['issues'])}"))
+            continue
+        if facts["isPdf"]:
+            blank = [index + 1 for index in pages if facts["pageText"][index] < MIN_PAGE_TEXT]
+            if blank:
+                unclear.append((material["id"], f"page {', '.join(map(str, blank))} has no readable text layer"))
+        if facts["imageSize"] and max(facts["imageSize"]) < MIN_IMAGE_SIDE:
+            width, height = facts["imageSize"]
+            unclear.append((material["id"], f"image is only {width}x{height} pixels"))
+    known = [d for d in dates if d]
+    return EvidenceFacts(max(known) if known else None, unclear, material_ids, content_hashes)
+
+
+def _fingerprint(evidence: Dict, materials: Dict[str, Dict]) -> str:
+    """Everything an evidence's facts depend on: its text, selections and the content they point at."""
+    selections = [
+        (s["materialId"], s.get("pageRange"), (materials.get(s["materialId"]) or {}).get("contentHash"))
+        for s in evidence.get("materials", [])
+    ]
+    payload = json.dumps([evidence.get("textContent") or "", selections])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+class QualityChecker:
+    """Runs the Stage 4 check, reusing cached material and evidence facts between runs."""
+
+    def __init__(self):
+        self._material_facts: Dict[str, Dict] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._evidence_facts: Dict[str, Tuple[str, EvidenceFacts]] = {}
+
+    async def _facts_for(self, material: Dict) -> Optional[Dict]:
+        digest = material.get("contentHash")
+        if not digest:
+            return None
+        facts = self._material_facts.get(digest)
+        if facts is not None:
+            return facts
+        task = self._in_flight.get(digest)
+        if task is None:
+            task = asyncio.create_task(self._derive(digest, material.get("fileType"), material.get("fileName")))
+            self._in_flight[digest] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(digest, None))
+        try:
+            facts = await task
+        except Exception as e:
+            logger.warning("quality_facts_failed", digest=digest, error=str(e))
+            return None
+        self._material_facts[digest] = facts
+        return facts
+
+    @staticmethod
+    async def _derive(digest: str, file_type: Optional[str], file_name: Optional[str]) -> Dict:
+        facts = await asyncio.to_thread(load_material_facts, digest)
+        if facts is None:
+            if not is_image(file_type, file_name):
+                # Shares the extraction already started at upload instead of repeating it
+                await text_extraction_service.get_pages(digest, file_type, file_name)
+            facts = await run_in_process(analyze_material, digest, file_type, file_name)
+        return facts
+
+    async def _score_readability(self, evidences: List[Dict], materials: Dict[str, Dict]) -> None:
+        """
+        Add readability scores to the facts of every material the evidence uses
+        that has samples but no scores yet, scoring them all in one worker call.
+        """
+        selected = {
+            s["materialId"]: materials[s["materialId"]]
+            for evidence in evidences
+            for s in evidence.get("materials", [])
+            if s["materialId"] in materials
+        }
+        facts_list = await asyncio.gather(*[self._facts_for(material) for material in selected.values()])
+        by_digest = {m["contentHash"]: f for m, f in zip(selected.values(), facts_list) if f is not None}
+        pending = [d for d, f in by_digest.items() if f.get("samples") and f.get("readability") is None]
+        if pending:
+            try:
+                scores = await run_in_process(score_materials, pending)
+            except Exception as e:
+                # Retried on the next check; until then the text and image-size checks apply
+                logger.warning("readability_scoring_failed", materials=len(pending), error=str(e))
+                scores = {}
+            for digest in pending:
+                if digest not in scores:
+                    continue
+                if scores[digest] is None:
+                    # Unusable samples: fall back to the heuristics for good rather than retry
+                    logger.warning("readability_samples_unusable", digest=digest)
+                    by_digest[digest]["samples"] = 0
+                else:
+                    by_digest[digest]["readability"] = scores[digest]
+                await asyncio.to_thread(store_material_facts, digest, by_digest[digest])
+        for material in selected.values():
+            facts = by_digest.get(material.get("contentHash"))
+            if facts and facts.get("readability"):
+                material["readability"] = summarize(facts["readability"])
+
+    async def _evidence_facts_for(self, evidence: Dict, materials: Dict[str, Dict]) -> EvidenceFacts:
+        fingerprint = _fingerprint(evidence, materials)
+        cached = self._evidence_facts.get(evidence["id"])
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        selected = [materials[s["materialId"]] for s in evidence.get("materials", []) if s["materialId"] in materials]
+        # Materials are analyzed concurrently, each in the worker pool
+        facts_list = await asyncio.gather(*[self._facts_for(material) for material in selected])
+        material_facts = {m.get("contentHash"): f for m, f in zip(selected, facts_list) if f is not None}
+        facts = evidence_facts(evidence, materials, material_facts)
+        # A material that couldn't be analyzed is retried on the next run
+        if all(f is not None for f in facts_list):
+            self._evidence_facts[evidence["id"]] = (fingerprint, facts)
+        return facts
+
+    async def check(self, evidences: List[Dict], materials: Dict[str, Dict], strengths: List[int]) -> Dict:
+        """
+        Check an application's evidence.
+
+        Args:
+            evidences: The application's evidence records, in evidence-number order
+            materials: Material records by id (those the evidence refers to)
+            strengths: Strength ratings of the application's rated materials
+
+        Returns:
+            A dict shaped like QualityCheckResult
+        """
+        await self._score_readability(evidences, materials)
+        facts = await asyncio.gather(*[self._evidence_facts_for(evidence, materials) for evidence in evidences])
+        today = date.today()
+        oldest_allowed = _years_before(today, EVIDENCE_MAX_AGE_YEARS).isoformat()
+        warnings: List[Dict] = []
+
+        counts = {standard: 0 for standard in ["MC", *OC_STANDARDS]}
+        for evidence in evidences:
+            if evidence.get("standard") in counts:
+                counts[evidence["standard"]] += 1
+        covered = sorted(OC_STANDARDS, key=lambda s: -counts[s])[:OC_CRITERIA_REQUIRED]
+        if len(evidences) != REQUIRED_EVIDENCE:
+            warnings.append({
+                "type": "high",
+                "message": f"{len(evidences)}/{REQUIRED_EVIDENCE} evidence files",
+                "suggestion": f"Submit exactly {REQUIRED_EVIDENCE} evidence files",
+            })
+        if counts["MC"] < MC_REQUIRED:
+            warnings.append({
+                "type": "high",
+                "message": f"MC only has {counts['MC']} evidence, needs {MC_REQUIRED}",
+                "suggestion": "Add evidence for the mandatory criteria",
+            })
+        for standard in covered:
+            if counts[standard] < OC_REQUIRED:
+                warnings.append({
+                    "type": "high",
+                    "message": f"{standard} only has {counts[standard]} evidence, needs {OC_REQUIRED}",
+                    "suggestion": f"Add evidence for {standard} or move suitable evidence to it",
+                })
+
+        within_pages = within_years = readable = True
+        for number, (evidence, evidence_fact) in enumerate(zip(evidences, facts), start=1):
+            label = f"Evidence #{number}"
+            page_count = evidence.get("pageCount") or 0
+            if page_count > MAX_EVIDENCE_PAGES:
+                within_pages = False
+                warnings.append({
+                    "type": "medium",
+                    "message": f"{label} has {page_count} pages, exceeds {MAX_EVIDENCE_PAGES}-page limit",
+                    "evidenceId": evidence["id"],
+                    "suggestion": "Select fewer pages from its materials",
+                })
+            if evidence_fact.latest_date is None:
+                warnings.append({
+                    "type": "low",
+                    "message": f"{label} has no recognisable date",
+                    "evidenceId": evidence["id"],
+                    "suggestion": "Make sure the date of the achievement is visible",
+                })
+            elif evidence_fact.latest_date < oldest_allowed:
+                within_years = False
+                warnings.append({
+                    "type": "high",
+                    "message": f"{label} date is {evidence_fact.latest_date}, more than {EVIDENCE_MAX_AGE_YEARS} years ago",
+                    "evidenceId": evidence["id"],
+                    "suggestion": f"Use evidence from the last {EVIDENCE_MAX_AGE_YEARS} years",
+                })
+            for material_id, reason in evidence_fact.unclear:
+                readable = False
+                warnings.append({
+                    "type": "medium",
+                    "message": f"{label}: {(materials.get(material_id) or {}).get('fileName')} {reason}",
+                    "evidenceId": evidence["id"],
+                    "materialId": material_id,
+                    "suggestion": "Upload a sharper, higher-resolution scan or a text-based PDF",
+                })
+
+        # The same material, or the same file uploaded twice, used by more than one evidence
+        users: Dict[str, List[str]] = {}
+        for evidence, evidence_fact in zip(evidences, facts):
+            keys = set(evidence_fact.material_ids) | {f"hash:{h}" for h in evidence_fact.content_hashes}
+            for key in keys:
+                users.setdefault(key, []).append(evidence["id"])
+        duplicates = {key: ids for key, ids in users.items() if len(ids) > 1}
+        reported = set()
+        for key, evidence_ids in duplicates.items():
+            if tuple(evidence_ids) in reported:
+                continue
+            reported.add(tuple(evidence_ids))
+            numbers = [str(1 + next(i for i, e in enumerate(evidences) if e["id"] == eid)) for eid in evidence_ids]
+            warnings.append({
+                "type": "medium",
+                "message": f"Evidence #{', #'.join(numbers)} use the same material",
+                "evidenceId": evidence_ids[-1],
+                "materialId": None if key.startswith("hash:") else key,
+                "suggestion": "Use each material in one evidence file only",
+            })
+
+        # Coverage is worth 40 points, each of the four checks 15
+        coverage = (
+            min(counts["MC"], MC_REQUIRED) + sum(min(counts[s], OC_REQUIRED) for s in covered)
+        ) / (MC_REQUIRED + OC_REQUIRED * OC_CRITERIA_REQUIRED)
+        score = round(40 * coverage + 15 * sum([within_pages, within_years, readable, not duplicates]))
+        average_strength = sum(strengths) / len(strengths) if strengths else 1
+        probability = min(95, round(score * 0.75 + average_strength / 5 * 20))
+
+        return {
+            "evidenceCount": len(evidences),
+            "mcCount": counts["MC"],
+            "oc1Count": counts["OC1"],
+            "oc2Count": counts["OC2"],
+            "oc3Count": counts["OC3"],
+            "allWithinFiveYears": within_years,
+            "allWithinPageLimit": within_pages,
+            "filesClearAndReadable": readable,
+            "noDuplicateMaterials": not duplicates,
+            "warnings": warnings,
+            "overallScore": score,
+            "successProbability": probability,
+        }
+
+    def prune(self, existing_ids) -> None:
+        """Drop cached facts for evidence that no longer exists."""
+        for evidence_id in [e for e in self._evidence_facts if e not in existing_ids]:
+            del self._evidence_facts[evidence_id]
+
+
+quality_checker = QualityChecker()
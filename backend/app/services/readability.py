@@ -0,0 +1,251 @@
+"""
+Readability analysis for scanned pages and images, without OCR.
+Each page or image is reduced once, in the worker pool, to a small grayscale
+sample (longest side ANALYSIS_SIZE) that is stored under its content hash.
+An application's samples are then scored together as NumPy batches:
+- sharpness: variance of the Laplacian, also normalized by the image's own variance
+- contrast: spread between the darkest and lightest 1% of pixels
+- text density: share of pixels on strong edges (ink strokes)
+- effective DPI: source pixels per inch when printed across the page
+"""
+
+import io
+from typing import Dict, List, Optional, Tuple
+from app.services.image_derivatives import MAX_HEIGHT_IN, MAX_WIDTH_IN, is_image
+from app.services.storage import get_object_store, material_key
+from app.services.text_extraction import is_pdf
+
+ANALYSIS_SIZE = 512
+# PDF pages are rendered at this resolution, which fits a Letter/A4 page in the sample size
+ANALYSIS_DPI = 60
+# Samples scored per array operation, bounding memory to a few tens of MB
+BATCH_SIZE = 32
+
+# |Laplacian| above this (on a 0-1 scale) counts as an ink edge
+EDGE_THRESHOLD = 0.1
+# A page whose contrast is below this is blank (heavy blur also removes edges, so density can't tell)
+BLANK_CONTRAST = 0.05
+# Laplacian variance relative to pixel variance; crisp scans score ~5, unreadable blur < 0.1
+MIN_SHARPNESS = 0.2
+MIN_CONTRAST = 0.25
+MIN_EFFECTIVE_DPI = 90
+
+
+def samples_key(digest: str) -> str:
+    return f"derived/readability/{digest[:2]}/{digest}.npz"
+
+
+def _to_sample(image):
+    import numpy as np
+
+    image = image.convert("L")
+    image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+    return np.asarray(image, dtype=np.uint8)
+
+
+def _scan_dpi(page) -> Optional[float]:
+    """Resolution of a page's largest image if it fills the page (a scan), else None."""
+    width_in = float(page.mediabox.width) / 72
+    height_in = float(page.mediabox.height) / 72
+    resources = page.get("/Resources") or {}
+    xobjects = resources.get("/XObject") or {}
+    best = None
+    for xobject in xobjects.values():
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") != "/Image":
+            continue
+        pixels_w, pixels_h = int(xobject["/Width"]), int(xobject["/Height"])
+        # Scans share the page's aspect ratio (either orientation)
+        ratio = (pixels_w / pixels_h) / (width_in / height_in)
+        if 0.9 < ratio < 1.1 or 0.9 < 1 / ratio < 1.1:
+            dpi = max(pixels_w, pixels_h) / max(width_in, height_in)
+            best = dpi if best is None else max(best, dpi)
+    return best
+
+
+def prepare_samples(digest: str, file_type: Optional[str], file_name: Optional[str]) -> int:
+    """
+    Reduce a material's pages or image to grayscale samples and store them.
+    Runs in a worker process. Returns the number of samples (0 for other formats).
+    """
+    import numpy as np
+    from PIL import Image
+
+    store = get_object_store()
+    source = store.local_path(material_key(digest)) or store.get(material_key(digest))
+    if source is None:
+        raise FileNotFoundError(f"Material content {digest} not found")
+
+    samples, dpis = [], []
+    if is_image(file_type, file_name):
+        data = source if isinstance(source, bytes) else open(source, "rb").read()
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            image.draft("L", (ANALYSIS_SIZE, ANALYSIS_SIZE))
+            samples.append(_to_sample(image))
+        # Printed as large as the page content area allows
+        printed_in = min(MAX_WIDTH_IN, MAX_HEIGHT_IN * width / height)
+        dpis.append(width / printed_in)
+    elif is_pdf(file_type, file_name):
+        from pdf2image import convert_from_bytes, convert_from_path
+        from PyPDF2 import PdfReader
+
+        convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+        for page_image in convert(source, dpi=ANALYSIS_DPI, grayscale=True):
+            samples.append(_to_sample(page_image))
+        reader = PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+        for page in reader.pages[:len(samples)]:
+            # Pages without a full-page image are vector content, sharp at any size
+            dpi = _scan_dpi(page)
+            dpis.append(np.nan if dpi is None else dpi)
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, *samples, dpi=np.array(dpis, dtype=np.float64))
+    store.put(samples_key(digest), buffer.getvalue(), "application/octet-stream")
+    return len(samples)
+
+
+def load_samples(digest: str) -> Optional[Tuple[List, List[Optional[float]]]]:
+    import numpy as np
+
+    data = get_object_store().get(samples_key(digest))
+    if data is None:
+        return None
+    with np.load(io.BytesIO(data)) as archive:
+        dpis = [None if np.isnan(d) else float(d) for d in archive["dpi"]]
+        samples = [archive[f"arr_{index}"] for index in range(len(dpis))]
+    return samples, dpis
+
+
+def score_samples(samples: List) -> Dict[str, List[float]]:
+    """
+    Score grayscale samples (uint8 arrays, any size up to ANALYSIS_SIZE) with
+    batched array operations. Returns per-sample sharpness, relative sharpness,
+    contrast and text density.
+    """
+    import numpy as np
+
+    results: Dict[str, List[float]] = {"sharpness": [], "relativeSharpness": [], "contrast": [], "textDensity": []}
+    for start in range(0, len(samples), BATCH_SIZE):
+        chunk = samples[start:start + BATCH_SIZE]
+        count = len(chunk)
+        height = max(sample.shape[0] for sample in chunk)
+        width = max(sample.shape[1] for sample in chunk)
+        # Pad to one shape; the mask marks real pixels
+        pixels = np.zeros((count, height, width), dtype=np.float32)
+        mask = np.zeros((count, height, width), dtype=bool)
+        for index, sample in enumerate(chunk):
+            pixels[index, :sample.shape[0], :sample.shape[1]] = sample
+            mask[index, :sample.shape[0], :sample.shape[1]] = True
+        values = pixels.astype(np.uint8)
+        pixels /= 255
+
+        # 4-neighbour Laplacian; only where all five pixels are real
+        centre = pixels[:, 1:-1, 1:-1]
+        laplacian = (
+            pixels[:, :-2, 1:-1] + pixels[:, 2:, 1:-1] + pixels[:, 1:-1, :-2] + pixels[:, 1:-1, 2:] - 4 * centre
+        )
+        inner = (
+            mask[:, 1:-1, 1:-1] & mask[:, :-2, 1:-1] & mask[:, 2:, 1:-1] & mask[:, 1:-1, :-2] & mask[:, 1:-1, 2:]
+        )
+        inner_count = np.maximum(inner.sum(axis=(1, 2)), 1)
+        laplacian = np.where(inner, laplacian, 0)
+        lap_mean = laplacian.sum(axis=(1, 2)) / inner_count
+        lap_var = (laplacian ** 2).sum(axis=(1, 2)) / inner_count - lap_mean ** 2
+        density = (np.abs(laplacian) > EDGE_THRESHOLD).sum(axis=(1, 2)) / inner_count
+
+        pixel_count = np.maximum(mask.sum(axis=(1, 2)), 1)
+        masked = np.where(mask, pixels, 0)
+        pixel_mean = masked.sum(axis=(1, 2)) / pixel_count
+        pixel_var = (masked ** 2).sum(axis=(1, 2)) / pixel_count - pixel_mean ** 2
+
+        # Percentiles from one histogram per sample: bincount over (sample, value) pairs
+        indices = (np.arange(count)[:, None, None] * 256 + values)[mask]
+        histograms = np.bincount(indices, minlength=count * 256).reshape(count, 256)
+        cumulative = histograms.cumsum(axis=1) / pixel_count[:, None]
+        low = (cumulative < 0.01).sum(axis=1)
+        high = (cumulative < 0.99).sum(axis=1)
+
+        results["sharpness"].extend(lap_var.tolist())
+        results["relativeSharpness"].extend((lap_var / np.maximum(pixel_var, 1e-6)).tolist())
+        results["contrast"].extend(((high - low) / 255).tolist())
+        results["textDensity"].extend(density.tolist())
+    return results
+
+
+def judge(scores: Dict, dpi: Optional[float]) -> List[str]:
+    """Reasons a page or image may not be clear and readable (empty if it looks fine)."""
+    issues = []
+    if dpi is not None and dpi < MIN_EFFECTIVE_DPI:
+        issues.append(f"low resolution ({round(dpi)} dpi)")
+    if scores["contrast"] >= BLANK_CONTRAST:
+        if scores["contrast"] < MIN_CONTRAST:
+            issues.append("low contrast")
+        if scores["relativeSharpness"] < MIN_SHARPNESS:
+            issues.append("blurry")
+    return issues
+
+
+def _load_checked(digest: str) -> Optional[Tuple[List, List[Optional[float]]]]:
+    """A material's samples, checked to be non-empty 2-D uint8 arrays. Raises if unusable."""
+    import numpy as np
+
+    entry = load_samples(digest)
+    if entry is not None:
+        for sample in entry[0]:
+            if sample.ndim != 2 or sample.dtype != np.uint8 or not sample.size:
+                raise ValueError(f"Malformed readability sample for {digest}")
+    return entry
+
+
+def _page_results(entry: Tuple[List, List[Optional[float]]], scores: Dict[str, List[float]], offset: int) -> List[Dict]:
+    pages = []
+    for index, dpi in enumerate(entry[1]):
+        page = {name: round(values[offset + index], 5) for name, values in scores.items()}
+        page["dpi"] = round(dpi) if dpi is not None else None
+        page["issues"] = judge(page, dpi)
+        pages.append(page)
+    return pages
+
+
+def score_materials(digests: List[str]) -> Dict[str, Optional[List[Dict]]]:
+    """
+    Score the stored samples of several materials as one batch. Runs in a worker
+    process. Returns, per content hash, one entry per page (or image), or None
+    for a material whose samples can't be read or scored; the others still are.
+    """
+    results: Dict[str, Optional[List[Dict]]] = {}
+    loaded = {}
+    for digest in digests:
+        try:
+            entry = _load_checked(digest)
+        except Exception:
+            results[digest] = None
+            continue
+        if entry is None:
+            results[digest] = []
+        else:
+            loaded[digest] = entry
+
+    try:
+        scores = score_samples([sample for samples, _ in loaded.values() for sample in samples])
+    except Exception:
+        # Find the culprit: score each material on its own
+        for digest, entry in loaded.items():
+            try:
+                results[digest] = _page_results(entry, score_samples(entry[0]), 0)
+            except Exception:
+                results[digest] = None
+        return results
+
+    offset = 0
+    for digest, entry in loaded.items():
+        results[digest] = _page_results(entry, scores, offset)
+        offset += len(entry[0])
+    return results
+
+
+def summarize(pages: List[Dict]) -> Dict:
+    """Per-material summary stored on the material record."""
+    issues = sorted({issue for page in pages for issue in page["issues"]})
+    return {"readable": not issues, "issues": issues, "pagesAnalyzed": len(pages)}
@@ -0,0 +1,206 @@
+"""
+Full-text search over an application's materials and evidence, kept up to date
+on every write. Backed by an SQLite FTS5 index held in memory next to the
+in-memory material and evidence stores. Each row is tagged with a token derived
+from its application id, so a search only walks that application's postings.
+Material text is added once extraction (started at upload) has finished.
+"""
+
+import asyncio
+import hashlib
+import html
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set
+from app.services.telemetry import get_logger
+from app.services.text_extraction import text_extraction_service
+
+logger = get_logger(__name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SNIPPET_TOKENS = 16
+# Column weights for ranking: title, type, content (the scope column never scores)
+RANK = "bm25(search, 0, 5.0, 2.0, 1.0)"
+# Snippet markers that can't occur in text; swapped for <mark> after escaping
+START, END = "\x02", "\x03"
+WORD = re.compile(r"\w+")
+
+
+def _scope(application_id: str) -> str:
+    """A single-token stand-in for an application id (ids contain separators the tokenizer splits on)."""
+    return "app" + hashlib.sha256(application_id.encode()).hexdigest()[:24]
+
+
+def build_query(application_id: str, text: str) -> Optional[str]:
+    """
+    FTS5 query for the words of a free-text search, all required, the last one
+    as a prefix so results appear while typing. None if there are no words.
+    """
+    words = WORD.findall(text)
+    if not words:
+        return None
+    terms = " ".join(f'"{word}"' for word in words[:-1])
+    terms = f'{terms} "{words[-1]}" *'.strip()
+    return f'scope : "{_scope(application_id)}" AND {{title type content}} : ({terms})'
+
+
+def _highlight(snippet: str) -> str:
+    return html.escape(snippet).replace(START, "<mark>").replace(END, "</mark>")
+
+
+class SearchIndex:
+    """Materials and evidence indexed by title, type and text, searchable per application."""
+
+    def __init__(self):
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE items (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                label TEXT,
+                UNIQUE (kind, item_id)
+            );
+            CREATE VIRTUAL TABLE search USING fts5(
+                scope, title, type, content, tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _row(self, kind: str, item_id: str) -> Optional[int]:
+        row = self._db.execute("SELECT id FROM items WHERE kind = ? AND item_id = ?", (kind, item_id)).fetchone()
+        return row[0] if row else None
+
+    def _upsert(
+        self, kind: str, item_id: str, application_id: str, label: str, title: str, type_: str,
+        content: Optional[str] = None,
+    ) -> None:
+        """Insert or update an item; content=None leaves existing content as it is."""
+        with self._lock, self._db:
+            rowid = self._row(kind, item_id)
+            if rowid is None:
+                rowid = self._db.execute(
+                    "INSERT INTO items (kind, item_id, label) VALUES (?, ?, ?)", (kind, item_id, label)
+                ).lastrowid
+                self._db.execute(
+                    "INSERT INTO search (rowid, scope, title, type, content) VALUES (?, ?, ?, ?, ?)",
+                    (rowid, _scope(application_id), title, type_, content or ""),
+                )
+                return
+            self._db.execute("UPDATE items SET label = ? WHERE id = ?", (label, rowid))
+            if content is None:
+                self._db.execute(
+                    "UPDATE search SET scope = ?, title = ?, type = ? WHERE rowid = ?",
+                    (_scope(application_id), title, type_, rowid),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE search SET scope = ?, title = ?, type = ?, content = ? WHERE rowid = ?",
+                    (_scope(application_id), title, type_, content, rowid),
+                )
+
+    def _remove(self, kind: str, item_id: str) -> None:
+        with self._lock, self._db:
+            rowid = self._row(kind, item_id)
+            if rowid is not None:
+                self._db.execute("DELETE FROM search WHERE rowid = ?", (rowid,))
+                self._db.execute("DELETE FROM items WHERE id = ?", (rowid,))
+
+    def _index_material(self, material: Dict) -> None:
+        titles = [material.get("title"), material.get("fileName")]
+        types = [material.get("materialType"), material.get("suggestedStandard"), material.get("fileType")]
+        self._upsert(
+            "material",
+            material["id"],
+            material["applicationId"],
+            material.get("title") or material.get("fileName") or "",
+            " ".join(dict.fromkeys(t for t in titles if t)),
+            " ".join(str(t) for t in types if t),
+        )
+
+    async def _index_text(self, material: Dict) -> None:
+        try:
+            pages = await text_extraction_service.get_pages(
+                material["contentHash"], material.get("fileType"), material.get("fileName")
+            )
+        except Exception as e:
+            logger.warning("search_index_text_failed", material_id=material["id"], error=str(e))
+            return
+        with self._lock, self._db:
+            # The material may have been deleted while its text was extracted
+            rowid = self._row("material", material["id"])
+            if rowid is not None:
+                self._db.execute("UPDATE search SET content = ? WHERE rowid = ?", ("\n\n".join(pages), rowid))
+
+    def material_added(self, material: Dict) -> None:
+        """Index a new material now and its extracted text once that is ready."""
+        self._index_material(material)
+        if material.get("contentHash"):
+            task = asyncio.get_running_loop().create_task(self._index_text(material))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def material_updated(self, material: Dict) -> None:
+        self._index_material(material)
+
+    def material_removed(self, material: Dict) -> None:
+        self._remove("material", material["id"])
+
+    def evidence_added(self, evidence: Dict) -> None:
+        evidence_type = evidence.get("evidenceType") or ""
+        standard = evidence.get("standard") or ""
+        self._upsert(
+            "evidence",
+            evidence["id"],
+            evidence["applicationId"],
+            f"{evidence_type} ({standard})" if standard else evidence_type,
+            evidence_type,
+            standard,
+            evidence.get("textContent") or "",
+        )
+
+    def evidence_removed(self, evidence: Dict) -> None:
+        self._remove("evidence", evidence["id"])
+
+    def search(
+        self, application_id: str, text: str, kind: Optional[str] = None, limit: int = DEFAULT_LIMIT
+    ) -> List[Dict]:
+        """
+        Best matches for a free-text search within one application, each with a
+        snippet of the matching text (HTML-escaped, matches wrapped in <mark>).
+        """
+        query = build_query(application_id, text)
+        if query is None:
+            return []
+        limit = max(1, min(limit, MAX_LIMIT))
+        sql = f"""
+            SELECT items.kind, items.item_id, items.label, {RANK},
+                snippet(search, 3, '{START}', '{END}', '…', {SNIPPET_TOKENS}),
+                snippet(search, 1, '{START}', '{END}', '…', {SNIPPET_TOKENS})
+            FROM search JOIN items ON items.id = search.rowid
+            WHERE search MATCH ? {"AND items.kind = ?" if kind else ""}
+            ORDER BY {RANK}
+            LIMIT ?
+        """
+        params = (query, kind, limit) if kind else (query, limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [
+            {
+                "kind": row_kind,
+                "id": item_id,
+                "title": label,
+                # Matches in the text make the best snippet; otherwise show the matching title
+                "snippet": _highlight(content if START in content else title).strip(),
+                "score": round(-rank, 6),
+            }
+            for row_kind, item_id, label, rank, content, title in rows
+        ]
+
+
+search_index = SearchIndex()
@@ -0,0 +1,113 @@
+"""
+Object storage for uploaded materials and derived assets.
+Objects are addressed by key; uploaded blobs are keyed by the SHA-256 of their content
+so identical uploads share one stored copy and derived assets can be keyed off the hash.
+Uses S3 when S3_BUCKET_NAME is configured, otherwise a local directory.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hex SHA-256 digest used to address content in the store."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def material_key(digest: str) -> str:
+    """Key under which the original bytes of an uploaded material are stored."""
+    return f"materials/{digest[:2]}/{digest}"
+
+
+class LocalObjectStore:
+    """Stores objects as files under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of an object, so callers can mmap or stream it."""
+        path = os.path.join(self.root, key)
+        return path if os.path.exists(path) else None
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.root, key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.local_path(key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial object
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str) -> None:
+        path = os.path.join(self.root, key)
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class S3ObjectStore:
+    """Stores objects in an S3 bucket."""
+
+    def __init__(self, bucket: str, region: Optional[str] = None):
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", region_name=region)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception:
+            return False
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except Exception:
+            return None
+        return response["Body"].read()
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_object_store():
+    """Return the process-wide object store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                bucket = os.getenv("S3_BUCKET_NAME")
+                if bucket:
+                    _store = S3ObjectStore(bucket, os.getenv("S3_REGION"))
+                else:
+                    _store = LocalObjectStore(os.getenv("STORAGE_DIR", "./storage"))
+    return _store
@@ -0,0 +1,178 @@
+"""
+Text extraction for uploaded materials.
+Text is extracted once per content hash, one page at a time, and stored in the
+object store as JSON lines (one page per line), so classification, enrichment,
+date checks and search read precomputed text instead of re-parsing documents.
+"""
+
+import asyncio
+import io
+import json
+import mmap
+import zipfile
+from typing import Dict, Iterator, List, Optional
+from xml.etree import ElementTree
+from app.services.storage import get_object_store, material_key
+from app.services.telemetry import get_logger
+from app.services.workers import run_in_process
+
+logger = get_logger(__name__)
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def is_pdf(file_type: Optional[str], file_name: Optional[str]) -> bool:
+    return file_type == "application/pdf" or (file_name or "").lower().endswith(".pdf")
+
+
+def is_docx(file_type: Optional[str], file_name: Optional[str]) -> bool:
+    return (
+        file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        or (file_name or "").lower().endswith(".docx")
+    )
+
+
+def text_key(digest: str) -> str:
+    return f"derived/text/{digest[:2]}/{digest}.jsonl"
+
+
+def _iter_pdf_pages(stream) -> Iterator[str]:
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(stream)
+    # Pages are parsed lazily, so only one page's objects are live at a time
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def _iter_docx_pages(stream) -> Iterator[str]:
+    """Stream paragraphs from word/document.xml, splitting pages at rendered or explicit page breaks."""
+    with zipfile.ZipFile(stream) as archive, archive.open("word/document.xml") as document:
+        page: List[str] = []
+        paragraph: List[str] = []
+        for event, element in ElementTree.iterparse(document, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if tag == f"{WORD_NAMESPACE}lastRenderedPageBreak" or (
+                    tag == f"{WORD_NAMESPACE}br" and element.get(f"{WORD_NAMESPACE}type") == "page"
+                ):
+                    page.append("".join(paragraph))
+                    paragraph = []
+                    yield "\n".join(page).strip()
+                    page = []
+                continue
+            if tag == f"{WORD_NAMESPACE}t":
+                paragraph.append(element.text or "")
+            elif tag == f"{WORD_NAMESPACE}tab":
+                paragraph.append("\t")
+            elif tag == f"{WORD_NAMESPACE}p":
+                page.append("".join(paragraph))
+                paragraph = []
+                element.clear()
+        if page or paragraph:
+            page.append("".join(paragraph))
+            yield "\n".join(page).strip()
+
+
+def iter_pages(source, file_type: Optional[str], file_name: Optional[str]) -> Iterator[str]:
+    """
+    Yield the text of a material one page at a time.
+
+    Args:
+        source: Path to the file on disk, or its bytes
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            if is_pdf(file_type, file_name):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield from _iter_pdf_pages(mapped)
+                return
+            if is_docx(file_type, file_name):
+                # zipfile reads members from the file on demand
+                yield from _iter_docx_pages(f)
+                return
+            source = f.read()
+
+    if is_pdf(file_type, file_name):
+        yield from _iter_pdf_pages(io.BytesIO(source))
+    elif is_docx(file_type, file_name):
+        yield from _iter_docx_pages(io.BytesIO(source))
+    elif (file_type or "").startswith("text/"):
+        yield source.decode("utf-8", errors="replace")
+
+
+def extract_pages(data: bytes, file_type: Optional[str], file_name: Optional[str]) -> List[str]:
+    """Extract the text of a material held in memory, one string per page."""
+    return list(iter_pages(data, file_type, file_name))
+
+
+def extract_and_store(digest: str, file_type: Optional[str], file_name: Optional[str]) -> List[str]:
+    """
+    Extract a stored material's text and save it under its content hash.
+    Runs in a worker process. Formats without a text layer store no pages.
+    """
+    store = get_object_store()
+    source = store.local_path(material_key(digest)) or store.get(material_key(digest))
+    if source is None:
+        raise FileNotFoundError(f"Material content {digest} not found")
+
+    pages = []
+    lines = []
+    try:
+        for text in iter_pages(source, file_type, file_name):
+            pages.append(text)
+            lines.append(json.dumps(text))
+    except Exception:
+        # Unreadable or encrypted documents are treated as having no text
+        pages, lines = [], []
+    store.put(text_key(digest), "\n".join(lines).encode(), "application/x-ndjson")
+    return pages
+
+
+def load_pages(digest: str) -> Optional[List[str]]:
+    """Return precomputed page texts, or None if the material hasn't been extracted yet."""
+    data = get_object_store().get(text_key(digest))
+    if data is None:
+        return None
+    return [json.loads(line) for line in data.decode().splitlines() if line]
+
+
+def load_or_extract_pages(digest: str, file_type: Optional[str], file_name: Optional[str]) -> List[str]:
+    """Precomputed page texts, extracting them now if needed (for use inside worker processes)."""
+    pages = load_pages(digest)
+    return pages if pages is not None else extract_and_store(digest, file_type, file_name)
+
+
+class TextExtractionService:
+    """Schedules extraction at upload time and serves the stored text afterwards."""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def schedule(self, digest: str, file_type: Optional[str], file_name: Optional[str]) -> asyncio.Task:
+        """Start extracting a material in the worker pool (once per content hash)."""
+        task = self._in_flight.get(digest)
+        if task is None:
+            task = asyncio.create_task(run_in_process(extract_and_store, digest, file_type, file_name))
+            self._in_flight[digest] = task
+            task.add_done_callback(lambda finished: self._finished(digest, finished))
+        return task
+
+    def _finished(self, digest: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(digest, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("text_extraction_failed", digest=digest, error=str(task.exception()))
+
+    async def get_pages(self, digest: str, file_type: Optional[str], file_name: Optional[str]) -> List[str]:
+        """Return a material's page texts, waiting for or starting extraction if needed."""
+        task = self._in_flight.get(digest)
+        if task is not None:
+            return await task
+        # A store read (a network request with S3); keep it off the event loop
+        pages = await asyncio.to_thread(load_pages, digest)
+        if pages is not None:
+            return pages
+        return await self.schedule(digest, file_type, file_name)
+
+
+text_extraction_service = TextExtractionService()
@@ -0,0 +1,49 @@
+"""
+Optional warm-up of lazily imported dependencies.
+Routers import heavy libraries on first use so the process answers /health quickly;
+with WARMUP_ON_STARTUP enabled they are imported in a background thread right
+after startup instead, so the first real request doesn't pay for them either.
+"""
+
+import importlib
+import os
+import time
+from typing import Dict, List
+from app.services.telemetry import get_logger
+
+# Imported on first use by the API; listed roughly by how soon a user needs them
+HEAVY_MODULES = [
+    "app.services.material_classification",
+    "app.services.criteria_matcher",
+    "numpy",
+    "PyPDF2",
+    "app.services.pdf_assembly",
+    "PIL.Image",
+    "reportlab.pdfgen.canvas",
+    "reportlab.lib.pagesizes",
+    "requests",
+    "app.services.evidence_solver",
+    "app.models.database",
+    "app.services.application_aggregate",
+]
+
+logger = get_logger(__name__)
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ON_STARTUP", "").lower() in ("1", "true", "yes")
+
+
+def warm_up(modules: List[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """Import the given modules, returning milliseconds spent on each."""
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning("warmup_import_failed", module=name, error=str(e))
+            continue
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("warmup_complete", total_ms=round(sum(timings.values()), 1), modules=timings)
+    return timings
@@ -0,0 +1,51 @@
+"""
+Shared process pool for CPU-bound work (PDF rendering, text extraction, image processing).
+Keeps that work off the event loop and out of the GIL.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+from app.services.profiling import active_profiler, profile_call
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the process-wide worker pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                max_workers = int(os.getenv("WORKER_PROCESSES", "0")) or None
+                _pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _pool
+
+
+async def run_in_process(func: Callable, *args: Any) -> Any:
+    """
+    Run a picklable function in the worker pool and await its result.
+    During a profiled request the call is sampled in the worker and its stacks
+    are added to the request's profile.
+    """
+    loop = asyncio.get_running_loop()
+    profiler = active_profiler.get()
+    if profiler is None:
+        return await loop.run_in_executor(get_process_pool(), func, *args)
+    result, stacks, samples = await loop.run_in_executor(
+        get_process_pool(), profile_call, func, profiler.interval, *args
+    )
+    profiler.add_worker_stacks(stacks, samples)
+    return result
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker pool (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
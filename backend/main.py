@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
@@ -11,6 +13,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+from app.services.admission import AdmissionMiddleware
+
+# Inside CORS, so rejections from admission control still carry CORS headers
+app.add_middleware(AdmissionMiddleware)
+
 # CORS configuration
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -19,8 +26,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Response headers the frontend (another origin) needs to read
+    expose_headers=["ETag", "X-Page-Count"],
 )
 
+from app.services.profiling import ProfilingMiddleware
+from app.services.telemetry import MetricsMiddleware, registry, shutdown_logging
+
+# Added last runs first: metrics assigns the request id that profiling records in each profile
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "Tech Nation Application Tool API", "status": "running"}
@@ -29,22 +45,48 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def load_fonts():
+    from app.services.fonts import font_registry
+    # Parsing font files takes a while; do it once, off the request path
+    asyncio.get_running_loop().run_in_executor(None, font_registry.load)
+
+@app.on_event("startup")
+async def warm_up_imports():
+    from app.services.warmup import warm_up, warmup_enabled
+    if warmup_enabled():
+        # Don't hold up startup: the server answers requests while modules load
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    from app.services.workers import shutdown_process_pool
+    shutdown_process_pool()
+    shutdown_logging()
+
 # Import routers
-from app.api import criteria, documents, classification, achievements, evidence
+from app.api import criteria, documents, classification, achievements, evidence, assembly, applications, profiles, export, search
 
 app.include_router(criteria.router, prefix="/api/criteria", tags=["criteria"])
 app.include_router(achievements.router, prefix="/api/achievements", tags=["achievements"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(classification.router, prefix="/api/classification", tags=["classification"])
 app.include_router(evidence.router, prefix="/api/evidence", tags=["evidence"])
+app.include_router(assembly.router, prefix="/api/assembly", tags=["assembly"])
+app.include_router(applications.router, prefix="/api/applications", tags=["applications"])
+app.include_router(profiles.router, prefix="/api/profiles", tags=["profiles"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(search.router, prefix="/api/search", tags=["search"])
 
 # Additional routers will be added as they are created
-# from app.api import auth, documents, classification, assembly, export
+# from app.api import auth, documents, classification, assembly
 # app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 # app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 # app.include_router(classification.router, prefix="/api/classification", tags=["classification"])
-# app.include_router(assembly.router, prefix="/api/assembly", tags=["assembly"])
-# app.include_router(export.router, prefix="/api/export", tags=["export"])
 
 if __name__ == "__main__":
     import uvicorn
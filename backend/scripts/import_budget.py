@@ -0,0 +1,110 @@
+"""
+Import-time budget check for the API entrypoint.
+Imports `main` under `python -X importtime` in a fresh interpreter, reports the
+slowest modules, and fails if startup exceeds the budget or pulls in a module
+that should only be imported on first use.
+
+Usage (from backend/):
+    python -m scripts.import_budget
+    python -m scripts.import_budget --budget-ms 800 --runs 5 --top 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Top-level packages that routers import lazily; importing any of them at startup is a regression
+DEFERRED_PACKAGES = [
+    "reportlab",
+    "PIL",
+    "requests",
+    "numpy",
+    "sqlalchemy",
+    "PyPDF2",
+    "pdf2image",
+    "httpx",
+    "boto3",
+]
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "800"))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(entrypoint: str = "main") -> List[Tuple[str, int, float, float]]:
+    """
+    Import the entrypoint in a fresh interpreter.
+    Returns (module, depth, self ms, cumulative ms) in import order.
+    """
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entrypoint}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {entrypoint} failed:\n{result.stderr}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        modules.append((raw_name.strip(), depth, self_us / 1000, cumulative_us / 1000))
+    return modules
+
+
+def deferred_imports(modules: List[Tuple[str, int, float, float]]) -> List[str]:
+    loaded = {name.split(".")[0] for name, _, _, _ in modules}
+    return [package for package in DEFERRED_PACKAGES if package in loaded]
+
+
+def report(modules: List[Tuple[str, int, float, float]], top: int) -> str:
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for name, _, self_ms, cumulative_ms in sorted(modules, key=lambda m: -m[3])[:top]:
+        lines.append(f"{cumulative_ms:>14.1f} {self_ms:>9.1f}  {name}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entrypoint", default="main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh imports to take the fastest of")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # The fastest run is the least disturbed by disk cache and machine noise
+    runs = [measure(args.entrypoint) for _ in range(args.runs)]
+    totals: Dict[int, float] = {
+        index: next(m[3] for m in modules if m[0] == args.entrypoint and m[1] == 0)
+        for index, modules in enumerate(runs)
+    }
+    best = min(totals, key=totals.get)
+    modules = runs[best]
+    total_ms = totals[best]
+
+    print(report(modules, args.top))
+    print(f"\nimport {args.entrypoint}: {total_ms:.1f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    eager = deferred_imports(modules)
+    if eager:
+        print(f"FAIL: imported at startup but should load on first use: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""
+Load generator that replays synthetic applicant sessions against the API.
+A full session walks the applicant flow: questionnaire -> template fetch ->
+uploads -> classification -> preview -> save -> list. Lighter session types
+are mixed in by weight. External calls are stubbed by the local mock server.
+
+Reports throughput, per-route latency percentiles and error rates, and the
+server's resident memory sampled over the run.
+
+Usage (from backend/):
+    # Start the mock and the API (1 or more uvicorn workers) and run 50 concurrent users for 60s
+    python -m scripts.loadtest --spawn --workers 2 --users 50 --duration 60
+
+    # Against an already running server; pass its pid(s) to sample RSS
+    python -m scripts.loadtest --base-url http://127.0.0.1:8000 --server-pid 1234 --users 20 --duration 30
+
+    # Custom session mix and a JSON report
+    python -m scripts.loadtest --spawn --mix full=0.5,browse=0.3,preview=0.2 --output report.json
+
+Each session uses a single keep-alive connection, so with several workers it
+stays on one process and sees the materials it uploaded (state is per process).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUESTIONNAIRE = {
+    "yearsOfExperience": "≥ 5 years",
+    "roleType": "Technical",
+    "selectedRoles": ["Software Engineer"],
+    "leadershipRoles": ["Tech Lead"],
+    "achievements": ["Technical Innovation", "Open Source Contributions", "Media Coverage/Interviews"],
+    "hasFinancialProof": True,
+}
+
+DOCUMENT_TEXTS = [
+    "Offer letter confirming annual salary of 180,000 GBP with equity grant and performance bonus.",
+    "Article in TechCrunch covering the launch of our platform, which reached 2 million monthly active users.",
+    "Patent granted for a distributed caching technique used in production at Google.",
+    "Conference agenda: keynote talk at Summit Berlin on scaling machine learning systems.",
+    "Letter of recommendation from the CTO of Microsoft describing technical leadership.",
+    "GitHub repository statistics: 12,000 stars and 300 contributors to the open source library.",
+]
+
+PREVIEW_TEXT = (
+    "I led the migration of our payments platform at Stripe Technologies and presented the results "
+    "at Conference Berlin. The work was featured by Google and adopted by Microsoft teams."
+)
+
+# Session type -> default weight
+DEFAULT_MIX = {"full": 0.6, "browse": 0.3, "preview": 0.1}
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, float]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SESSIONS:
+            raise SystemExit(f"Unknown session type '{name}' (choose from {', '.join(SESSIONS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_pdf(text: str) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for page in range(random.randint(1, 3)):
+        c.drawString(50, 780, f"Page {page + 1}")
+        y = 750
+        for line in [text[i:i + 90] for i in range(0, len(text), 90)]:
+            c.drawString(50, y, line)
+            y -= 14
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "errorRate": round(self.errors[route] / len(values), 4),
+                "p50Ms": round(_percentile(values, 50) * 1000, 1),
+                "p90Ms": round(_percentile(values, 90) * 1000, 1),
+                "p99Ms": round(_percentile(values, 99) * 1000, 1),
+                "maxMs": round(values[-1] * 1000, 1),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "elapsedSeconds": round(elapsed, 2),
+            "requests": total,
+            "throughputRps": round(total / elapsed, 1) if elapsed else 0,
+            "errors": sum(self.errors.values()),
+            "sessions": dict(self.sessions),
+            "routes": routes,
+        }
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Session:
+    """One synthetic applicant, on its own connection."""
+
+    def __init__(self, client: httpx.AsyncClient, stats: Stats):
+        self.client = client
+        self.stats = stats
+        self.application_id = f"load-{uuid.uuid4().hex[:12]}"
+
+    async def call(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(route, time.perf_counter() - started, ok=False)
+            return None
+        self.stats.record(route, time.perf_counter() - started, ok=response.status_code < 400)
+        return response
+
+    async def questionnaire(self) -> None:
+        await self.call("POST /api/criteria/match", "POST", "/api/criteria/match", json=QUESTIONNAIRE)
+
+    async def templates(self) -> None:
+        await self.call("GET /api/achievements/templates", "GET", "/api/achievements/templates")
+
+    async def upload(self, count: int) -> List[str]:
+        ids = []
+        for _ in range(count):
+            text = f"{random.choice(DOCUMENT_TEXTS)} Reference {uuid.uuid4().hex}."
+            if random.random() < 0.7:
+                upload = ("evidence.pdf", make_pdf(text), "application/pdf")
+            else:
+                upload = ("notes.txt", text.encode(), "text/plain")
+            response = await self.call(
+                "POST /api/documents/upload", "POST", "/api/documents/upload",
+                files={"file": upload}, data={"applicationId": self.application_id},
+            )
+            if response is not None and response.status_code == 200:
+                ids.append(response.json()["id"])
+        return ids
+
+    async def classify(self) -> None:
+        await self.call(
+            "POST /api/classification/classify-all/{id}", "POST",
+            f"/api/classification/classify-all/{self.application_id}",
+        )
+
+    async def preview(self) -> None:
+        await self.call(
+            "POST /api/evidence/generate-preview", "POST", "/api/evidence/generate-preview",
+            data={"textContent": PREVIEW_TEXT, "evidenceType": "Technical Innovation", "standard": "OC2"},
+            # Admission control queues previews per application, as the frontend does
+            headers={"X-Application-Id": self.application_id},
+        )
+
+    async def save(self, material_ids: List[str]) -> None:
+        selections = [{"materialId": material_id, "pageRange": "1", "order": i + 1} for i, material_id in enumerate(material_ids[:2])]
+        await self.call(
+            "POST /api/evidence/save", "POST", "/api/evidence/save",
+            data={
+                "evidenceType": "Technical Innovation",
+                "standard": random.choice(["MC", "OC1", "OC2", "OC3"]),
+                "textContent": PREVIEW_TEXT,
+                "applicationId": self.application_id,
+                "materials": json.dumps(selections),
+            },
+        )
+
+    async def lists(self) -> None:
+        await self.call("GET /api/documents", "GET", "/api/documents", params={"applicationId": self.application_id})
+        await self.call(
+            "GET /api/evidence/list", "GET", "/api/evidence/list",
+            params={"applicationId": self.application_id, "fields": "id,standard,evidenceType,pageCount"},
+        )
+
+
+async def full_session(session: Session) -> None:
+    await session.questionnaire()
+    await session.templates()
+    material_ids = await session.upload(random.randint(2, 5))
+    await session.classify()
+    await session.preview()
+    await session.save(material_ids)
+    await session.lists()
+
+
+async def browse_session(session: Session) -> None:
+    await session.questionnaire()
+    await session.templates()
+    await session.lists()
+
+
+async def preview_session(session: Session) -> None:
+    # Admission only honours ids of applications that have content
+    await session.upload(1)
+    for _ in range(3):
+        await session.preview()
+
+
+SESSIONS = {"full": full_session, "browse": browse_session, "preview": preview_session}
+
+
+async def user_loop(base_urls: List[str], mix: Dict[str, float], stats: Stats, deadline: float, think_ms: float) -> None:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+        async with httpx.AsyncClient(base_url=random.choice(base_urls), limits=limits, timeout=60) as client:
+            await SESSIONS[name](Session(client, stats))
+        stats.sessions[name] += 1
+        if think_ms:
+            await asyncio.sleep(random.expovariate(1000 / think_ms))
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+async def sample_rss(pids: List[int], samples: List[Dict], started: float, interval: float = 1.0) -> None:
+    """Sample resident memory of the server processes (and their worker children) from /proc."""
+    while True:
+        processes = set(pids)
+        for pid in pids:
+            processes.update(_children(pid))
+        per_process = {pid: round(_rss_mb(pid), 1) for pid in sorted(processes)}
+        samples.append({
+            "t": round(time.monotonic() - started, 1),
+            "totalMb": round(sum(per_process.values()), 1),
+            "processes": per_process,
+        })
+        await asyncio.sleep(interval)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def spawn_servers(workers: int, mock_latency_ms: float) -> Tuple[str, List[subprocess.Popen], str]:
+    """Start the mock server and the API under uvicorn with local storage and stubbed externals."""
+    storage_dir = tempfile.mkdtemp(prefix="loadtest-storage-")
+    mock_port, api_port = _free_port(), _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=BACKEND_DIR,
+        STORAGE_DIR=storage_dir,
+        WIKIPEDIA_SUMMARY_URL=f"http://127.0.0.1:{mock_port}/wiki/summary/",
+        ONEROUTER_BASE_URL=f"http://127.0.0.1:{mock_port}/v1",
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+    )
+    env.pop("S3_BUCKET_NAME", None)
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "scripts.onerouter_mock", "--port", str(mock_port), "--latency-ms", str(mock_latency_ms)],
+        cwd=BACKEND_DIR, env=env,
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    return f"http://127.0.0.1:{api_port}", [mock, api], storage_dir
+
+
+async def run(args) -> Dict:
+    processes: List[subprocess.Popen] = []
+    storage_dir = None
+    base_urls = args.base_url or []
+    pids = list(args.server_pid or [])
+    if args.spawn:
+        url, processes, storage_dir = spawn_servers(args.workers, args.mock_latency_ms)
+        base_urls = [url]
+        pids = [processes[1].pid]
+        await _wait_ready(f"{url}/health")
+    if not base_urls:
+        raise SystemExit("Pass --spawn or at least one --base-url")
+
+    stats = Stats()
+    rss_samples: List[Dict] = []
+    started = time.monotonic()
+    sampler = asyncio.create_task(sample_rss(pids, rss_samples, started)) if pids else None
+    try:
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            user_loop(base_urls, parse_mix(args.mix), stats, deadline, args.think_ms)
+            for _ in range(args.users)
+        ])
+        elapsed = time.monotonic() - started
+    finally:
+        if sampler:
+            sampler.cancel()
+        for process in reversed(processes):
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if storage_dir:
+            shutil.rmtree(storage_dir, ignore_errors=True)
+
+    report = stats.summary(elapsed)
+    report["config"] = {"users": args.users, "duration": args.duration, "mix": parse_mix(args.mix), "workers": args.workers if args.spawn else None}
+    if rss_samples:
+        totals = [sample["totalMb"] for sample in rss_samples]
+        report["rss"] = {"startMb": totals[0], "peakMb": max(totals), "endMb": totals[-1], "samples": rss_samples}
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{report['requests']} requests in {report['elapsedSeconds']}s: "
+          f"{report['throughputRps']} req/s, {report['errors']} errors, sessions {report['sessions']}")
+    print(f"\n{'route':<48} {'count':>7} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for route, row in report["routes"].items():
+        print(f"{route:<48} {row['count']:>7} {row['errorRate'] * 100:>6.1f} "
+              f"{row['p50Ms']:>8.1f} {row['p90Ms']:>8.1f} {row['p99Ms']:>8.1f} {row['maxMs']:>8.1f}")
+    if "rss" in report:
+        rss = report["rss"]
+        print(f"\nServer RSS: start {rss['startMb']} MB, peak {rss['peakMb']} MB, end {rss['endMb']} MB")
+        step = max(1, len(rss["samples"]) // 10)
+        print("  " + "  ".join(f"{s['t']}s:{s['totalMb']}" for s in rss["samples"][::step]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", action="append", help="server to target (repeat for several)")
+    parser.add_argument("--server-pid", type=int, action="append", help="server pid to sample RSS from (repeatable)")
+    parser.add_argument("--spawn", action="store_true", help="start the mock server and the API locally")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when spawning")
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated applicants")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a user's sessions")
+    parser.add_argument("--mix", help=f"session weights, e.g. full=0.6,browse=0.3,preview=0.1 (types: {', '.join(SESSIONS)})")
+    parser.add_argument("--mock-latency-ms", type=float, default=50, help="stubbed external API latency")
+    parser.add_argument("--output", help="write the full report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
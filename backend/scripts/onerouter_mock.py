@@ -0,0 +1,140 @@
+"""
+Local mock of the Onerouter chat-completions API (and of the Wikipedia summary
+API used by entity enrichment) for tests, load tests and benchmarks.
+Answers classification requests with the local classifier, after a simulated
+latency, and injects errors and rate limiting on demand.
+
+Usage (from backend/):
+    python -m scripts.onerouter_mock --port 8900 --latency-ms 400 --error-rate 0.05
+    ONEROUTER_BASE_URL=http://127.0.0.1:8900/v1 python -m scripts.onerouter_mock --bench 200
+    WIKIPEDIA_SUMMARY_URL=http://127.0.0.1:8900/wiki/summary/ uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Onerouter mock")
+
+settings = {
+    "latency_ms": 300.0,
+    "jitter_ms": 100.0,
+    "error_rate": 0.0,
+    "rate_limit": 0.0,  # requests per second before returning 429 (0 = unlimited)
+    "retry_after": "1",  # Retry-After sent with 429s (seconds or an HTTP-date)
+    "fail_next": 0,  # fail this many upcoming requests with a 503, then answer normally
+}
+_window = {"start": time.monotonic(), "count": 0}
+stats = {"requests": 0, "documents": 0, "errors": 0, "rate_limited": 0, "wiki_requests": 0}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    stats["requests"] += 1
+    now = time.monotonic()
+    if now - _window["start"] >= 1.0:
+        _window.update(start=now, count=0)
+    _window["count"] += 1
+    if settings["rate_limit"] and _window["count"] > settings["rate_limit"]:
+        stats["rate_limited"] += 1
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": settings["retry_after"]})
+
+    await asyncio.sleep(max(0.0, settings["latency_ms"] + random.uniform(-1, 1) * settings["jitter_ms"]) / 1000)
+    if settings["fail_next"] > 0:
+        settings["fail_next"] -= 1
+        stats["errors"] += 1
+        return JSONResponse({"error": "upstream error"}, status_code=503)
+    if random.random() < settings["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": "upstream error"}, status_code=random.choice([500, 502, 503]))
+
+    from app.services.document_classifier import get_classifier
+
+    body = await request.json()
+    documents = json.loads(body["messages"][-1]["content"])["documents"]
+    stats["documents"] += len(documents)
+    classified = get_classifier().classify_batch(
+        [f"{document.get('fileName', '')} {document.get('text', '')}" for document in documents]
+    )
+    results = [
+        {
+            "id": document["id"],
+            "recommendedStandard": result["recommendedStandard"],
+            "fileType": result["fileType"],
+            "strengthRating": result["strengthRating"],
+            "aiAnalysis": result["aiAnalysis"],
+        }
+        for document, result in zip(documents, classified)
+    ]
+    return {
+        "id": f"mock-{stats['requests']}",
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps({"results": results})}}],
+    }
+
+
+@app.get("/wiki/summary/{title}")
+async def wiki_summary(title: str):
+    stats["wiki_requests"] += 1
+    # Real summary lookups are much faster than LLM calls
+    await asyncio.sleep(max(0.0, settings["latency_ms"] / 4 + random.uniform(-1, 1) * settings["jitter_ms"] / 4) / 1000)
+    if random.random() < 0.2:
+        return JSONResponse({"title": "Not found"}, status_code=404)
+    return {"title": title, "extract": f"{title} is a well-known organisation in the technology sector. " * 4}
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+async def run_benchmark(count: int) -> None:
+    """Classify `count` documents as a burst through the real client and report throughput."""
+    from app.services.onerouter_client import OnerouterClient, OnerouterError
+
+    documents = [
+        {"id": str(i), "fileName": f"doc-{i}.pdf", "text": random.choice([
+            "Annual salary and bonus statement", "2M monthly active users", "Patent granted", "Series A funding",
+        ])}
+        for i in range(count)
+    ]
+    async with OnerouterClient(api_key="mock") as client:
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*[client.classify(d) for d in documents], return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    failures = [o for o in outcomes if isinstance(o, (OnerouterError, asyncio.TimeoutError))]
+    print(f"{count} documents in {elapsed:.2f}s ({count / elapsed:.1f} docs/s), {len(failures)} failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=settings["jitter_ms"])
+    parser.add_argument("--error-rate", type=float, default=settings["error_rate"])
+    parser.add_argument("--rate-limit", type=float, default=settings["rate_limit"])
+    parser.add_argument("--bench", type=int, metavar="N", help="run a client benchmark of N documents instead of serving")
+    args = parser.parse_args()
+
+    if args.bench:
+        asyncio.run(run_benchmark(args.bench))
+        return
+
+    settings.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
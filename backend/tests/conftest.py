@@ -0,0 +1,12 @@
+import os
+
+# The models only need a database for these tests; SQLite keeps them self-contained
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy.dialects.postgresql import UUID  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
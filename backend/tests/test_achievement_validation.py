@@ -0,0 +1,20 @@
+"""
+Date fields must hold a whole ISO date, not merely start with one.
+"""
+
+import pytest
+
+from app.services.achievement_templates import MaterialField, MaterialFieldType
+from app.services.achievement_validation import CompiledField
+
+field = CompiledField(MaterialField("event_date", "Event Date", MaterialFieldType.DATE, True, "When?"))
+
+
+@pytest.mark.parametrize("value", ["2023-01-01", "2024-02-29"])
+def test_date_field_accepts_iso_dates(value):
+    assert field.validate(value, None) == []
+
+
+@pytest.mark.parametrize("value", ["2023-01-01xyz", "2023-01-01 trailing", "2023-02-30", "01/02/2023", "2023", "20230101", 20230101])
+def test_date_field_rejects_anything_else(value):
+    assert field.validate(value, None) == ["must be a date (YYYY-MM-DD)"]
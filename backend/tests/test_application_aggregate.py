@@ -0,0 +1,104 @@
+"""
+The aggregate endpoint must load an application in a fixed number of queries,
+however many materials and evidence files it has.
+"""
+
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, count_queries
+from app.models.models import (
+    Application, Evidence, EvidenceMaterial, Material, PathType, StandardType, User,
+)
+from app.services.application_aggregate import (
+    build_memory_aggregate, load_application_aggregate, serialize_aggregate,
+)
+
+# application, materials, evidence, evidence-material links joined to materials
+EXPECTED_SELECTS = 4
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _application(db: Session, materials: int, evidence: int) -> uuid.UUID:
+    user = User(email=f"{uuid.uuid4()}@example.com", name="Applicant")
+    application = Application(user=user, path_type=PathType.EXCEPTIONAL_TALENT)
+    stored = [
+        Material(
+            application=application, file_name=f"m{i}.pdf", file_path=f"materials/m{i}.pdf",
+            file_type="application/pdf", file_size=1000, upload_date=date(2024, 1, 1),
+            suggested_standard=StandardType.MC,
+        )
+        for i in range(materials)
+    ]
+    for number in range(1, evidence + 1):
+        item = Evidence(
+            application=application, evidence_number=number, standard_type=StandardType.MC,
+            evidence_type="Letter", title=f"Evidence {number}",
+        )
+        for order, material in enumerate(stored[:3]):
+            item.evidence_materials.append(EvidenceMaterial(material=material, order=order, page_range="1"))
+    db.add(application)
+    db.commit()
+    application_id = application.id
+    # Start from an empty identity map so nothing is served without a query
+    db.expunge_all()
+    return application_id
+
+
+def _load_counting_selects(db: Session, application_id: uuid.UUID):
+    """Load and serialize the aggregate; returns (statements issued, payload), checking all were SELECTs."""
+    statements = []
+    connection = db.connection()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        with count_queries(connection) as queries:
+            payload = serialize_aggregate(load_application_aggregate(db, application_id))
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    return queries[0], payload
+
+
+@pytest.mark.parametrize("materials,evidence", [(1, 1), (5, 3), (30, 10)])
+def test_aggregate_query_count_is_fixed(db, materials, evidence):
+    application_id = _application(db, materials, evidence)
+    count, payload = _load_counting_selects(db, application_id)
+    assert count == EXPECTED_SELECTS
+    assert len(payload["materials"]) == materials
+    assert len(payload["evidence"]) == evidence
+    assert [m["order"] for m in payload["evidence"][0]["materials"]] == list(range(min(3, materials)))
+
+
+def test_memory_aggregate_numbers_evidence_per_standard():
+    materials = [
+        {"id": "m1", "applicationId": "app1", "fileName": "a.pdf"},
+        {"id": "m2", "applicationId": "other", "fileName": "b.pdf"},
+    ]
+    evidences = [
+        {"id": "e2", "applicationId": "app1", "standard": "MC", "createdAt": "2024-01-02",
+         "materials": [{"materialId": "m1", "order": 0}]},
+        {"id": "e1", "applicationId": "app1", "standard": "MC", "createdAt": "2024-01-01", "materials": []},
+        {"id": "e3", "applicationId": "app1", "standard": "OC1", "createdAt": "2024-01-03", "materials": []},
+    ]
+    payload = build_memory_aggregate("app1", materials, evidences, 3)
+    assert [m["id"] for m in payload["materials"]] == ["m1"]
+    assert [(e["id"], e["standardType"], e["evidenceNumber"]) for e in payload["evidence"]] == [
+        ("e1", "MC", 1), ("e2", "MC", 2), ("e3", "OC1", 1),
+    ]
+    assert payload["evidence"][1]["materials"][0]["fileName"] == "a.pdf"
@@ -0,0 +1,44 @@
+"""
+Cached /api/criteria/match responses must still echo each request's own answers.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import criteria
+from app.services.criteria_cache import match_cache
+
+app = FastAPI()
+app.include_router(criteria.router, prefix="/api/criteria")
+client = TestClient(app)
+
+ANSWERS = {
+    "yearsOfExperience": "≥ 5 years",
+    "roleType": "Technical",
+    "leadershipRoles": ["Tech Lead", "Founder"],
+    "achievements": ["Technical Innovation", "Open Source Contributions"],
+}
+
+
+def test_cached_response_echoes_submitted_answers():
+    match_cache.clear()
+    first = client.post("/api/criteria/match", json={**ANSWERS, "hasFinancialProof": False})
+    reordered = {
+        **ANSWERS,
+        "leadershipRoles": ["Founder", "Tech Lead"],
+        "achievements": list(reversed(ANSWERS["achievements"])),
+        "hasFinancialProof": None,
+    }
+    second = client.post("/api/criteria/match", json=reordered)
+    assert first.status_code == second.status_code == 200
+    assert match_cache.stats()["hits"] == 1
+
+    echoed = second.json()["questionnaireAnswers"]
+    assert echoed["leadershipRoles"] == ["Founder", "Tech Lead"]
+    assert echoed["achievements"] == reordered["achievements"]
+    assert echoed["hasFinancialProof"] is None
+    assert echoed["selectedRoles"] is None
+
+    expected = criteria.criteria_matcher.match_criteria(reordered).model_dump(mode="json")
+    assert second.json() == expected
+    assert list(second.json()) == list(expected)
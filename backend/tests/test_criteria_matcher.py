@@ -0,0 +1,81 @@
+"""
+The vectorized batch path must give exactly the same recommendations as
+match_criteria, checked on randomly generated questionnaires.
+"""
+
+import random
+
+import pytest
+
+from app.schemas.schemas import QuestionnaireAnswers
+from app.services.criteria_matcher import OC1_ACHIEVEMENTS, CriteriaMatcher
+
+ACHIEVEMENTS = OC1_ACHIEVEMENTS + [
+    "Salary/Equity/Bonus",
+    "Patents",
+    "Industry Awards",
+    "Media Coverage",
+    "Speaking Engagements",
+]
+LEADERSHIP_ROLES = ["Team Lead", "Engineering Manager", "CTO", "Founder", "Tech Lead"]
+ROLES = ["Software Engineer", "Product Manager", "Data Scientist", "Designer"]
+
+
+def random_answers(rng: random.Random) -> dict:
+    answers = {
+        "yearsOfExperience": rng.choice(["< 5 years", "≥ 5 years", ""]),
+        "roleType": rng.choice(["Technical", "Business", "Both"]),
+        "selectedRoles": rng.choice([None, rng.sample(ROLES, rng.randint(0, 2))]),
+        "leadershipRoles": rng.sample(LEADERSHIP_ROLES, rng.randint(0, 3)),
+        "achievements": rng.sample(ACHIEVEMENTS, rng.randint(0, len(ACHIEVEMENTS))),
+    }
+    # Absent, null, true and false all take different paths through the matcher
+    choice = rng.choice(["absent", None, True, False])
+    if choice != "absent":
+        answers["hasFinancialProof"] = choice
+    return answers
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return CriteriaMatcher()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_single(matcher, seed):
+    rng = random.Random(seed)
+    answers_list = [random_answers(rng) for _ in range(200)]
+
+    expected = [matcher.match_criteria(answers).model_dump(mode="json") for answers in answers_list]
+    batch = [result.model_dump(mode="json") for result in matcher.match_criteria_batch(answers_list)]
+    assert batch == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_dicts_match_single(matcher, seed):
+    rng = random.Random(seed)
+    # The dicts variant expects validated answers, as the /match/batch endpoint passes them
+    answers_list = [QuestionnaireAnswers(**random_answers(rng)).model_dump() for _ in range(200)]
+
+    expected = [matcher.match_criteria(answers).model_dump(mode="json") for answers in answers_list]
+    assert matcher.match_criteria_batch_dicts(answers_list) == expected
+
+
+def test_empty_batch(matcher):
+    assert matcher.match_criteria_batch([]) == []
+    assert matcher.match_criteria_batch_dicts([]) == []
+
+
+def test_fingerprint_follows_definitions():
+    matcher = CriteriaMatcher()
+    before = matcher.definitions_fingerprint()
+    assert matcher.definitions_fingerprint() == before
+    definitions = {key: dict(value) for key, value in matcher.standard_definitions.items()}
+    definitions["OC2"]["name"] = "Innovation"
+    matcher.standard_definitions = definitions
+    assert matcher.definitions_fingerprint() != before
+    result = matcher.match_criteria({
+        "yearsOfExperience": "≥ 5 years", "roleType": "Technical", "leadershipRoles": [],
+        "achievements": ["Technical Innovation"],
+    })
+    assert result.recommendedStandards["oc2"].name == "Innovation"
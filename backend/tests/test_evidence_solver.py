@@ -0,0 +1,164 @@
+"""
+Automatic evidence assembly: the solver's constraints, its optimality on small
+cases (checked against brute force), and quota validation in the endpoint.
+"""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import assembly
+from app.services.evidence_solver import (
+    PAGE_LIMIT,
+    _pack_supporting,
+    max_weight_assignment,
+    solve_evidence_assembly,
+)
+
+app = FastAPI()
+app.include_router(assembly.router, prefix="/api/assembly")
+client = TestClient(app)
+
+STANDARDS = ["MC", "OC1", "OC2", "OC3", None]
+
+
+def random_materials(rng: random.Random, count: int):
+    materials = []
+    for i in range(count):
+        is_pdf = rng.random() < 0.85
+        materials.append({
+            "id": f"m{i}",
+            "fileType": "application/pdf" if is_pdf else "image/png",
+            "fileName": f"doc-{i}.pdf" if is_pdf else f"photo-{i}.png",
+            "suggestedStandard": rng.choice(STANDARDS),
+            "strengthRating": rng.choice([None, 1, 2, 3, 4, 5]),
+            "pageCount": rng.randint(1, 6),
+            # Some uploads share content, as re-uploads of the same file do
+            "contentHash": f"h{rng.randint(0, count)}",
+        })
+    return materials
+
+
+def test_files_respect_page_limit_and_never_reuse_materials():
+    rng = random.Random(7)
+    for _ in range(50):
+        materials = random_materials(rng, rng.randint(0, 30))
+        by_id = {m["id"]: m for m in materials}
+        result = solve_evidence_assembly(materials, {"mc": 4, "oc1": 3, "oc2": 0, "oc3": 3})
+
+        selected = [s["materialId"] for file in result["evidence"] for s in file["materials"]]
+        assert len(selected) == len(set(selected))
+        hashes = [by_id[material_id]["contentHash"] for material_id in selected]
+        assert len(hashes) == len(set(hashes))
+        assert set(selected).isdisjoint(result["unusedMaterialIds"])
+        assert set(selected) | set(result["unusedMaterialIds"]) == set(by_id)
+
+        assert len(result["evidence"]) == 10
+        for file in result["evidence"]:
+            assert file["pageCount"] <= PAGE_LIMIT
+            pages = 0
+            for selection in file["materials"]:
+                material = by_id[selection["materialId"]]
+                assert material["fileType"] == "application/pdf"
+                assert material["suggestedStandard"] in (file["standard"], None)
+                pages += min(material["pageCount"], PAGE_LIMIT)
+            assert pages == file["pageCount"]
+
+
+def test_non_pdf_materials_are_never_assigned():
+    materials = [
+        {"id": "img", "fileType": "image/png", "fileName": "award.png", "suggestedStandard": "MC",
+         "strengthRating": 5, "pageCount": 1},
+        {"id": "pdf", "fileType": "application/pdf", "fileName": "award.pdf", "suggestedStandard": "MC",
+         "strengthRating": 1, "pageCount": 1},
+    ]
+    result = solve_evidence_assembly(materials, {"mc": 4, "oc1": 0, "oc2": 0, "oc3": 0})
+    selected = [s["materialId"] for file in result["evidence"] for s in file["materials"]]
+    assert selected == ["pdf"]
+    assert result["unusedMaterialIds"] == ["img"]
+    assert result["unfilledSlots"] == 3
+
+
+def brute_force_assignment(weights: np.ndarray) -> float:
+    rows, columns = weights.shape
+    best = 0.0
+    # Each row takes a distinct column or stays empty (None)
+    for choice in itertools.product([None, *range(columns)], repeat=rows):
+        taken = [column for column in choice if column is not None]
+        if len(taken) != len(set(taken)):
+            continue
+        values = [weights[row, column] for row, column in enumerate(choice) if column is not None]
+        if any(np.isneginf(values)):
+            continue
+        best = max(best, float(sum(values)))
+    return best
+
+
+def test_assignment_matches_brute_force():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        rows = int(rng.integers(1, 5))
+        columns = int(rng.integers(rows, 6))
+        weights = rng.integers(1, 6, size=(rows, columns)).astype(float)
+        weights[rng.random((rows, columns)) < 0.3] = -np.inf
+
+        assignment = max_weight_assignment(weights)
+        taken = [column for column in assignment if column is not None]
+        assert len(taken) == len(set(taken))
+        assert all(not np.isneginf(weights[row, column]) for row, column in enumerate(assignment) if column is not None)
+        total = sum(weights[row, column] for row, column in enumerate(assignment) if column is not None)
+        assert total == pytest.approx(brute_force_assignment(weights))
+
+
+def brute_force_packing(capacities, sizes, strengths) -> float:
+    best = 0.0
+    for choice in itertools.product([None, *range(len(capacities))], repeat=len(sizes)):
+        load = [0] * len(capacities)
+        for item, file in enumerate(choice):
+            if file is not None:
+                load[file] += sizes[item]
+        if all(used <= capacity for used, capacity in zip(load, capacities)):
+            best = max(best, sum(strengths[item] for item, file in enumerate(choice) if file is not None))
+    return best
+
+
+def test_supporting_packing_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(300):
+        capacities = [rng.choice([1, 2]) for _ in range(rng.randint(0, 3))]
+        sizes = [rng.choice([1, 2]) for _ in range(rng.randint(0, 6))]
+        strengths = [float(rng.randint(1, 5)) for _ in sizes]
+
+        placement = _pack_supporting(capacities, sizes, strengths)
+        load = [0] * len(capacities)
+        for item, file in enumerate(placement):
+            if file is not None:
+                load[file] += sizes[item]
+        assert all(used <= capacity for used, capacity in zip(load, capacities))
+        placed = sum(strengths[item] for item, file in enumerate(placement) if file is not None)
+        assert placed == pytest.approx(brute_force_packing(capacities, sizes, strengths))
+
+
+@pytest.mark.parametrize("quota, detail", [
+    ({"mc": 3, "oc1": 3, "oc2": 3, "oc3": 0, "total": 9}, "must include 4 MC"),
+    ({"mc": 4, "oc1": 3, "oc2": 3, "oc3": 3, "total": 13}, "cannot exceed 10"),
+    ({"mc": 4, "oc1": 3, "oc2": 3, "oc3": 0, "total": 8}, "does not match its parts"),
+    ({"mc": 4, "oc1": -3, "oc2": 3, "oc3": 3, "total": 7}, "cannot be negative"),
+])
+def test_auto_assemble_rejects_invalid_quotas(quota, detail):
+    response = client.post("/api/assembly/auto-assemble/app-1", json=quota)
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+
+
+def test_auto_assemble_accepts_a_valid_quota():
+    quota = {"mc": 4, "oc1": 3, "oc2": 0, "oc3": 3, "total": 10}
+    response = client.post("/api/assembly/auto-assemble/no-such-application", json=quota)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["quota"] == {"mc": 4, "oc1": 3, "oc2": 0, "oc3": 3}
+    assert body["unfilledSlots"] == 10
@@ -0,0 +1,168 @@
+"""
+OnerouterClient against the local Onerouter mock (scripts/onerouter_mock.py),
+served in-process: batching, 429 handling, retries and deadlines.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.services.document_classifier import get_classifier
+from app.services.onerouter_client import OnerouterClient, OnerouterError, _PendingDocument, retry_after_seconds
+from scripts import onerouter_mock
+
+
+@pytest.fixture(scope="module", autouse=True)
+def warm_classifier():
+    # The mock runs on the test's event loop; loading the classifier mid-test would stall batching
+    get_classifier()
+
+
+@pytest.fixture(autouse=True)
+def mock_settings():
+    saved = dict(onerouter_mock.settings)
+    onerouter_mock.settings.update(latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=0.0, fail_next=0)
+    onerouter_mock.stats.update({key: 0 for key in onerouter_mock.stats})
+    onerouter_mock._window.update(start=time.monotonic(), count=0)
+    yield onerouter_mock.settings
+    onerouter_mock.settings.clear()
+    onerouter_mock.settings.update(saved)
+
+
+def make_client(**options) -> OnerouterClient:
+    options = {"backoff_base": 0.01, "backoff_cap": 0.05, **options}
+    return OnerouterClient(
+        api_key="mock",
+        base_url="http://mock/v1",
+        transport=httpx.ASGITransport(app=onerouter_mock.app),
+        **options,
+    )
+
+
+def documents(count: int):
+    return [{"id": str(i), "fileName": f"doc-{i}.pdf", "text": "Patent granted for a new search algorithm"} for i in range(count)]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_documents_are_batched():
+    async def scenario():
+        async with make_client(max_batch_size=8, batch_window=0.05, burst=10) as client:
+            return await client.classify_many(documents(20))
+
+    results = run(scenario())
+    assert len(results) == 20
+    assert all(result["recommendedStandard"] in {"MC", "OC1", "OC2", "OC3"} for result in results)
+    assert onerouter_mock.stats["requests"] == 3
+    assert onerouter_mock.stats["documents"] == 20
+
+
+def test_rate_limited_call_waits_for_retry_after(mock_settings):
+    mock_settings.update(rate_limit=1, retry_after="1")
+
+    async def scenario():
+        async with make_client(max_batch_size=1, rate_per_second=10, burst=10) as client:
+            started = time.monotonic()
+            results = await client.classify_many(documents(2), timeout=10)
+            return results, time.monotonic() - started
+
+    results, elapsed = run(scenario())
+    assert len(results) == 2
+    assert onerouter_mock.stats["rate_limited"] == 1
+    # The 429 drains the bucket for the Retry-After period before the retry
+    assert elapsed >= 1.0
+
+
+def test_rate_limited_call_honours_http_date_retry_after(mock_settings):
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=2)
+    mock_settings.update(rate_limit=1, retry_after=format_datetime(retry_at, usegmt=True))
+
+    async def scenario():
+        async with make_client(max_batch_size=1, rate_per_second=10, burst=10) as client:
+            started = time.monotonic()
+            results = await client.classify_many(documents(2), timeout=10)
+            return results, time.monotonic() - started
+
+    results, elapsed = run(scenario())
+    assert len(results) == 2
+    assert onerouter_mock.stats["rate_limited"] == 1
+    # HTTP-dates have one-second resolution
+    assert elapsed >= 0.9
+
+
+def test_http_date_retry_after():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= retry_after_seconds(format_datetime(retry_at, usegmt=True)) <= 30
+    assert retry_after_seconds("2.5") == 2.5
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+def test_server_errors_are_retried(mock_settings):
+    mock_settings.update(fail_next=2)
+
+    async def scenario():
+        async with make_client() as client:
+            return await client.classify(documents(1)[0], timeout=5)
+
+    assert run(scenario())["recommendedStandard"]
+    assert onerouter_mock.stats["errors"] == 2
+    assert onerouter_mock.stats["requests"] == 3
+
+
+def test_retries_give_up(mock_settings):
+    mock_settings.update(error_rate=1.0)
+
+    async def scenario():
+        async with make_client(max_retries=2) as client:
+            await client.classify(documents(1)[0], timeout=5)
+
+    with pytest.raises(OnerouterError, match="Classification failed"):
+        run(scenario())
+    assert onerouter_mock.stats["requests"] == 3
+
+
+def test_deadline_while_waiting_for_rate_limit():
+    async def scenario():
+        async with make_client(rate_per_second=0.1, burst=1, max_batch_size=1) as client:
+            await client.classify(documents(1)[0])
+            started = time.monotonic()
+            with pytest.raises((OnerouterError, asyncio.TimeoutError)):
+                await client.classify(documents(1)[0], timeout=0.3)
+            return time.monotonic() - started
+
+    assert run(scenario()) < 1.0
+    # The second call never reached the upstream
+    assert onerouter_mock.stats["requests"] == 1
+
+
+def test_deadline_while_request_in_flight(mock_settings):
+    mock_settings.update(latency_ms=500.0)
+
+    async def scenario():
+        async with make_client() as client:
+            await client.classify(documents(1)[0], timeout=0.1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(scenario())
+
+
+def test_no_attempt_without_time_left():
+    async def scenario():
+        client = make_client()
+        try:
+            future = asyncio.get_running_loop().create_future()
+            item = _PendingDocument(documents(1)[0], future, time.monotonic() - 1)
+            with pytest.raises(OnerouterError, match="deadline exceeded"):
+                await client._send_with_retries([item])
+        finally:
+            await client.aclose()
+
+    run(scenario())
+    assert onerouter_mock.stats["requests"] == 0
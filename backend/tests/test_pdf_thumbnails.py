@@ -0,0 +1,76 @@
+"""
+Concurrent requests for one thumbnail share a single render, and cancelling the
+request that renders it must not leave the others waiting forever.
+"""
+
+import asyncio
+
+from app.services import pdf_thumbnails
+from app.services.pdf_thumbnails import PdfThumbnailService
+from app.services.storage import material_key
+
+
+class MemoryStore:
+    def __init__(self):
+        self.objects = {}
+
+    def get(self, key):
+        return self.objects.get(key)
+
+    def put(self, key, data, content_type=None):
+        self.objects[key] = data
+
+    def local_path(self, key):
+        return None
+
+
+def test_waiters_render_after_cancelled_render(monkeypatch):
+    store = MemoryStore()
+    store.put(material_key("abc"), b"%PDF")
+    renders = []
+
+    async def render(func, source, page, width):
+        renders.append(page)
+        if len(renders) == 1:
+            await asyncio.sleep(3600)  # the first render never finishes on its own
+        return b"png"
+
+    monkeypatch.setattr(pdf_thumbnails, "get_object_store", lambda: store)
+    monkeypatch.setattr(pdf_thumbnails, "run_in_process", render)
+
+    async def scenario():
+        service = PdfThumbnailService()
+        first = asyncio.create_task(service.get_thumbnail("abc", 1, "small"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(service.get_thumbnail("abc", 1, "small"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await asyncio.wait_for(second, 5)
+        assert first.cancelled()
+        return service, result
+
+    service, result = asyncio.run(scenario())
+    assert result == b"png"
+    assert len(renders) == 2
+    assert service._in_flight == {}
+
+
+def test_concurrent_requests_share_one_render(monkeypatch):
+    store = MemoryStore()
+    store.put(material_key("abc"), b"%PDF")
+    renders = []
+
+    async def render(func, source, page, width):
+        renders.append(page)
+        await asyncio.sleep(0.05)
+        return b"png"
+
+    monkeypatch.setattr(pdf_thumbnails, "get_object_store", lambda: store)
+    monkeypatch.setattr(pdf_thumbnails, "run_in_process", render)
+
+    async def scenario():
+        service = PdfThumbnailService()
+        return await asyncio.gather(*[service.get_thumbnail("abc", 1, "small") for _ in range(5)])
+
+    assert asyncio.run(scenario()) == [b"png"] * 5
+    assert len(renders) == 1
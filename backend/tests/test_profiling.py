@@ -0,0 +1,51 @@
+"""
+Profiled requests are stored under server-generated ids, and a profiler that
+fails to start leaves the request unaffected.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import profiling
+from app.services.profiling import ProfilingMiddleware
+from app.services.telemetry import MetricsMiddleware
+
+
+@pytest.fixture
+def client(monkeypatch):
+    saved = {}
+    monkeypatch.setenv("PROFILE_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "save_profile", lambda profile_id, profile: saved.__setitem__(profile_id, profile))
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app), saved
+
+
+def test_client_request_id_cannot_choose_profile_id(client):
+    test_client, saved = client
+    headers = {"X-Profile": "secret", "X-Request-Id": "known-id"}
+    first = test_client.get("/ping", headers=headers)
+    second = test_client.get("/ping", headers=headers)
+    ids = {first.headers["x-profile-id"], second.headers["x-profile-id"]}
+    assert len(ids) == 2 and "known-id" not in ids
+    assert set(saved) == ids
+
+
+def test_request_served_when_profiler_cannot_start(client, monkeypatch):
+    test_client, saved = client
+
+    async def broken_start(self):
+        raise RuntimeError("tracemalloc unavailable")
+
+    monkeypatch.setattr(profiling.RequestProfiler, "start", broken_start)
+    response = test_client.get("/ping", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert saved == {}
@@ -0,0 +1,112 @@
+"""
+Readability scoring degrades per material: unusable samples affect only their
+own material, and a failed scoring call leaves the quality check running on its
+text and image-size heuristics.
+"""
+
+import asyncio
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.services import quality_check, readability
+from app.services.quality_check import QualityChecker
+from app.services.readability import samples_key, score_materials
+
+
+class MemoryStore:
+    def __init__(self):
+        self.objects = {}
+
+    def get(self, key):
+        return self.objects.get(key)
+
+    def put(self, key, data, content_type=None):
+        self.objects[key] = data
+
+
+def save_samples(store, digest, samples, dpis):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, *samples, dpi=np.array(dpis, dtype=np.float64))
+    store.put(samples_key(digest), buffer.getvalue())
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(readability, "get_object_store", lambda: store)
+    monkeypatch.setattr(quality_check, "get_object_store", lambda: store)
+    return store
+
+
+def test_bad_samples_affect_only_their_material(store):
+    rng = np.random.default_rng(0)
+    page = rng.integers(0, 256, (120, 90), dtype=np.uint8)
+    photo = rng.integers(0, 256, (64, 64), dtype=np.uint8)
+    save_samples(store, "good", [page, photo], [300.0, np.nan])
+    save_samples(store, "malformed", [rng.random((8, 8, 3))], [np.nan])
+    store.put(samples_key("corrupt"), b"not an archive")
+
+    results = score_materials(["good", "malformed", "corrupt", "missing"])
+    assert results["malformed"] is None
+    assert results["corrupt"] is None
+    assert results["missing"] == []
+    assert len(results["good"]) == 2
+    assert results["good"] == score_materials(["good"])["good"]
+    assert results["good"][0]["dpi"] == 300 and results["good"][1]["dpi"] is None
+
+
+def test_batch_scores_match_individual_scores(store):
+    rng = np.random.default_rng(1)
+    digests = [f"d{i}" for i in range(5)]
+    for index, digest in enumerate(digests):
+        samples = [rng.integers(0, 256, (40 + 10 * j, 30 + index), dtype=np.uint8) for j in range(index + 1)]
+        save_samples(store, digest, samples, [150.0] * len(samples))
+    batch = score_materials(digests)
+    for digest in digests:
+        alone = score_materials([digest])[digest]
+        assert len(batch[digest]) == len(alone)
+        for batched_page, page in zip(batch[digest], alone):
+            # Padding to the batch's shape changes float32 rounding in the last digits
+            assert batched_page == {key: pytest.approx(value, rel=1e-4) for key, value in page.items()}
+
+
+def test_check_survives_scoring_failure(store, monkeypatch):
+    facts = {"samples": 1, "readability": None, "isPdf": True, "pageText": [500], "pageDates": [None]}
+
+    async def facts_for(self, material):
+        return facts
+
+    async def broken_pool(func, *args):
+        raise RuntimeError("worker pool is broken")
+
+    monkeypatch.setattr(QualityChecker, "_facts_for", facts_for)
+    monkeypatch.setattr(quality_check, "run_in_process", broken_pool)
+    material = {"id": "m1", "contentHash": "abc"}
+    evidence = {"id": "e1", "materials": [{"materialId": "m1"}]}
+
+    asyncio.run(QualityChecker()._score_readability([evidence], {"m1": material}))
+    assert facts["readability"] is None
+    assert "readability" not in material
+
+
+def test_unusable_samples_fall_back_for_good(store, monkeypatch):
+    facts = {"samples": 1, "readability": None}
+
+    async def facts_for(self, material):
+        return facts
+
+    async def inline(func, *args):
+        return func(*args)
+
+    store.put(samples_key("abc"), b"not an archive")
+    monkeypatch.setattr(QualityChecker, "_facts_for", facts_for)
+    monkeypatch.setattr(quality_check, "run_in_process", inline)
+    material = {"id": "m1", "contentHash": "abc"}
+    evidence = {"id": "e1", "materials": [{"materialId": "m1"}]}
+
+    asyncio.run(QualityChecker()._score_readability([evidence], {"m1": material}))
+    assert facts == {"samples": 0, "readability": None}
+    assert json.loads(store.get(quality_check.quality_facts_key("abc")))["samples"] == 0
@@ -82,6 +82,8 @@ export default function EvidenceBuilder({ evidence }: EvidenceBuilderProps) {
         {
           headers: {
             "Content-Type": "multipart/form-data",
+            // Lets the backend queue preview requests per application
+            "X-Application-Id": "demo-app", // TODO: Get from auth
           },
           responseType: "blob",
           timeout: 30000, // 30 second timeout
@@ -95,10 +95,12 @@ export const assemblyApi = {
 
 // Evidence API
 export const evidenceApi = {
-  generatePreview: async (formData: FormData) => {
+  generatePreview: async (formData: FormData, applicationId: string) => {
     const response = await apiClient.post("/api/evidence/generate-preview", formData, {
       headers: {
         "Content-Type": "multipart/form-data",
+        // Lets the backend queue preview requests per application
+        "X-Application-Id": applicationId,
       },
       responseType: "blob",
     });